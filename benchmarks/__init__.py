@@ -0,0 +1,8 @@
+"""
+Lexer and parser benchmarks, run from the root of the repository.
+
+The suite is run with ``PYTHONPATH=src python -m benchmarks``, and each of the
+comparisons in the ``bench_*`` modules with
+``PYTHONPATH=src python -m benchmarks.bench_<name>``. The measurements they share
+are in :mod:`benchmarks.util`.
+"""
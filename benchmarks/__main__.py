@@ -0,0 +1,119 @@
+"""
+Lexer and parser benchmarks over the synthetic corpora of :mod:`benchmarks.corpus`.
+
+Reports tokens/s and MB/s for the lexers, nodes/s and MB/s for the parser, and the
+peak memory traced while parsing. Results can be written as JSON and compared
+against the results of another run, e.g. one from a previous commit::
+
+    PYTHONPATH=src python -m benchmarks --output before.json
+    PYTHONPATH=src python -m benchmarks --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+from typing import Any, Dict, List, Optional
+
+from benchmarks.corpus import KINDS, generate
+from benchmarks.util import best, count_nodes, peak_memory
+from ksl.lex import BufferLexer, Lexer
+from ksl.parse import parse_module
+from ksl.version import __version__
+
+# bumped whenever the layout of the results changes
+FORMAT = 1
+
+Results = Dict[str, Dict[str, float]]
+
+
+def bench_corpus(source: str, repeat: int) -> Results:
+    megabytes = len(source.encode("utf-8")) / 1e6
+    results: Results = {}
+    for lexer_type in (Lexer, BufferLexer):
+        count = sum(1 for _ in lexer_type(source=source, path=""))
+        seconds = best(
+            lambda: sum(1 for _ in lexer_type(source=source, path="")), repeat
+        )
+        results[f"lex.{lexer_type.__name__}"] = {
+            "seconds": seconds,
+            "tokens_per_sec": count / seconds,
+            "mb_per_sec": megabytes / seconds,
+        }
+    nodes = count_nodes(parse_module(source))
+    seconds = best(lambda: parse_module(source), repeat)
+    results["parse"] = {
+        "seconds": seconds,
+        "nodes_per_sec": nodes / seconds,
+        "mb_per_sec": megabytes / seconds,
+        "peak_bytes": peak_memory(lambda: parse_module(source)),
+    }
+    return results
+
+
+def run(kinds: List[str], size: int, seed: int, repeat: int) -> Dict[str, Any]:
+    results: Results = {}
+    for kind in kinds:
+        source = generate(kind, size, seed)
+        for name, metrics in bench_corpus(source, repeat).items():
+            results[f"{name}.{kind}"] = metrics
+    return {
+        "format": FORMAT,
+        "ksl": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "size": size,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def report(run: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    old: Results = baseline["results"] if baseline is not None else {}
+    for name, metrics in run["results"].items():
+        print(name)
+        for metric, value in metrics.items():
+            if metric == "seconds":
+                continue
+            line = f"  {metric:16}{value:>16,.{0 if value >= 1000 else 2}f}"
+            prev = old.get(name, {}).get(metric)
+            if prev:
+                line += f"  {value / prev:6.2f}x"
+            print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--kind",
+        action="append",
+        choices=[*KINDS, "mixed"],
+        help="corpus to run on, may be repeated (default: all)",
+    )
+    parser.add_argument("--size", type=int, default=1_000_000, help="in characters")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("format") != FORMAT:
+            sys.exit(f"{args.compare}: unsupported results format")
+        if (baseline["size"], baseline["seed"]) != (args.size, args.seed):
+            print("warning: baseline was run on different corpora", file=sys.stderr)
+
+    results = run(args.kind or [*KINDS, "mixed"], args.size, args.seed, args.repeat)
+    report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
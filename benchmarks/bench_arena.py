@@ -0,0 +1,28 @@
+"""
+Compares the memory retained by a module's :mod:`ksl.ast` tree against that of the
+same module stored in a :class:`ksl.arena.Arena`.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_arena``.
+"""
+
+from benchmarks.corpus import generate
+from benchmarks.util import count_nodes, retained
+from ksl.arena import Arena
+from ksl.parse import parse_module
+
+
+def main() -> None:
+    print(f"{'':10}{'nodes':>10}{'ast MB':>10}{'arena MB':>10}{'ratio':>8}")
+    for kind in ("mixed", "nested", "numeric"):
+        source = generate(kind, 4_000_000)
+        nodes = count_nodes(parse_module(source))
+        tree = retained(lambda: parse_module(source))
+        arena = retained(lambda: Arena.from_ast(parse_module(source)))
+        print(
+            f"{kind:10}{nodes:>10,}{tree / 1e6:>10.1f}{arena / 1e6:>10.1f}"
+            f"{tree / arena:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Compares :func:`ksl.check.check` against :func:`ksl.parse.parse_module` on the
+corpora of :mod:`benchmarks.corpus`, in time and in peak memory traced.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_check``.
+"""
+
+from benchmarks.corpus import KINDS, generate
+from benchmarks.util import best, peak_memory
+from ksl.check import check
+from ksl.parse import parse_module
+
+
+def main() -> None:
+    print(
+        f"{'':10}{'parse ms':>10}{'check ms':>10}{'speedup':>9}{'parse MB':>10}", end=""
+    )
+    print(f"{'check MB':>10}")
+    for kind in [*KINDS, "mixed"]:
+        source = generate(kind, 1_000_000)
+        parse = best(lambda: parse_module(source), repeat=3)
+        checked = best(lambda: check(source), repeat=3)
+        parse_peak = peak_memory(lambda: parse_module(source))
+        check_peak = peak_memory(lambda: check(source))
+        print(
+            f"{kind:10}{parse * 1e3:>10.0f}{checked * 1e3:>10.0f}"
+            f"{parse / checked:>8.2f}x"
+            f"{parse_peak / 1e6:>10.1f}{check_peak / 1e6:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compares eager parsing against lazy parsing, which only lexes past paragraph bodies
+until they're used, on corpora of :mod:`benchmarks.corpus`.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_lazy``.
+"""
+
+from typing import Any
+
+from benchmarks.corpus import generate
+from benchmarks.util import best
+from ksl.parse import parse_module
+
+
+def lazy_first(source: str) -> Any:
+    """Parses lazily, then uses the body of the first paragraph"""
+    module = parse_module(source, lazy=True)
+    return len(module[0])
+
+
+def lazy_all(source: str) -> Any:
+    """Parses lazily, then uses the bodies of every paragraph"""
+    module = parse_module(source, lazy=True)
+    return [len(block) for block in module]
+
+
+def main() -> None:
+    print(f"{'':10}{'eager ms':>10}{'lazy ms':>10}{'+ one body':>12}{'+ all':>10}")
+    for kind in ("deep", "mixed"):
+        source = generate(kind, 2_000_000)
+        eager = best(lambda: parse_module(source), repeat=3)
+        lazy = best(lambda: parse_module(source, lazy=True), repeat=3)
+        one = best(lambda: lazy_first(source), repeat=3)
+        every = best(lambda: lazy_all(source), repeat=3)
+        print(
+            f"{kind:10}{eager * 1e3:>10.0f}{lazy * 1e3:>10.0f}{one * 1e3:>12.0f}"
+            f"{every * 1e3:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compares the per-token cost of :class:`ksl.lex.Lexer` dispatching on each character
+through its table of actions against the chain of comparisons it used before.
+
+Both cost about the same per token: what a token costs is moving through its
+characters and building it, not choosing what to do with its first character.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_lex_dispatch``.
+"""
+
+from typing import Type
+
+import ksl.tokens as tokens
+from benchmarks.util import best
+from ksl.lex import Lexer
+
+
+class ChainLexer(Lexer):
+    """Lexer with the old ``_lex``"""
+
+    def _lex(self) -> None:
+        while True:
+            if self._curr in self._whitespace:
+                self._next()
+                continue
+            if self._curr in ("\n", self._START):
+                self._next()
+                self._reset()
+                self._start = self._pos
+                while self._curr in self._whitespace:
+                    self._save_and_next()
+                if self._curr in ("\n", "#", self._END):
+                    continue
+                return self._indent("".join(self._capture))
+            if self._curr == "#":
+                while self._curr not in ("\n", self._END):
+                    self._next()
+                continue
+            self._start = self._pos
+            if self._curr == "-":
+                if self._peek() in self._digits:
+                    return self._capture_number()
+                else:
+                    return self._capture_name()
+            if self._curr == "0":
+                if self._peek() in ("x", "X"):
+                    return self._capture_hex()
+                elif self._peek() in ("o", "O"):
+                    return self._capture_octal()
+                elif self._peek() in ("b", "B"):
+                    return self._capture_binary()
+                else:
+                    return self._capture_number()
+            if self._curr in self._digits:
+                self._capture_number()
+                return
+            if self._curr in self._name_chars or self._curr == "\\":
+                self._capture_name()
+                return
+            if self._curr in ('"', "'"):
+                return self._capture_string()
+            if self._curr == "(":
+                self._next()
+                return self._emit(tokens.LParen)
+            if self._curr == ")":
+                self._next()
+                return self._emit(tokens.RParen)
+            if self._curr == "{":
+                self._next()
+                return self._emit(tokens.LCurly)
+            if self._curr == "}":
+                self._next()
+                return self._emit(tokens.RCurly)
+            if self._curr == "[":
+                self._next()
+                return self._emit(tokens.LBracket)
+            if self._curr == "]":
+                self._next()
+                return self._emit(tokens.RBracket)
+            if self._curr == ":":
+                self._next()
+                return self._emit(tokens.Colon)
+            if self._curr == ",":
+                self._next()
+                return self._emit(tokens.Comma)
+            if self._curr == ";":
+                self._next()
+                return self._emit(tokens.Semicolon)
+            if self._curr == "`":
+                self._next()
+                return self._emit(tokens.Tick)
+            if self._curr == self._END:
+                return self._end()
+            raise self._error(f"unexpected character {self._curr!r}")
+
+
+# sources made almost entirely of one kind of token
+SOURCES = {
+    "Name": "abc " * 20_000,
+    "Integer": "123 " * 20_000,
+    "Float": "1.5 " * 20_000,
+    "Integer (hex)": "0x1f " * 20_000,
+    "String": "'s' " * 20_000,
+    "Nodent": "a\n" * 20_000,
+    **{
+        ttype.__name__: char * 20_000
+        for char, ttype in (
+            ("(", tokens.LParen),
+            (")", tokens.RParen),
+            ("{", tokens.LCurly),
+            ("}", tokens.RCurly),
+            ("[", tokens.LBracket),
+            ("]", tokens.RBracket),
+            (":", tokens.Colon),
+            (",", tokens.Comma),
+            (";", tokens.Semicolon),
+            ("`", tokens.Tick),
+        )
+    },
+}
+
+
+def per_token(lexer_type: Type[Lexer], source: str) -> float:
+    count = sum(1 for _ in lexer_type(source=source, path=""))
+    return best(lambda: sum(1 for _ in lexer_type(source=source, path=""))) / count
+
+
+def main() -> None:
+    print(f"{'ns/token':16}{'chain':>10}{'table':>10}")
+    for name, source in SOURCES.items():
+        before = per_token(ChainLexer, source)
+        after = per_token(Lexer, source)
+        print(
+            f"{name:16}{before * 1e9:>10.0f}{after * 1e9:>10.0f}"
+            f"  ({before / after:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compares decoding literals through :func:`ast.literal_eval`, as the lexers used to,
+against :mod:`ksl.literals`, then times lexing a number-dense module.
+
+Strings full of escapes decode in about the time :func:`ast.literal_eval` takes:
+the escaped string about 1.1x faster, and the one mostly made of escaped
+backslashes, which first have to be set apart from the other escapes, about 1.15x
+slower.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_literals``.
+"""
+
+import random
+from ast import literal_eval
+from typing import Callable, List
+
+from benchmarks.util import best
+from ksl.lex import BufferLexer
+from ksl.literals import decode_based_int, decode_float, decode_int, decode_string
+
+
+def literal_eval_int(string: str) -> int:
+    # the old Lexer._parse_int
+    if string[0] == "-":
+        negative = "-"
+        string = string[1:]
+    else:
+        negative = ""
+    fixed_string = "".join((negative, string[:-1].lstrip("0"), string[-1]))
+    return literal_eval(fixed_string)
+
+
+def literal_eval_string(string: str) -> str:
+    # the old Lexer._parse_string
+    s = string[0]
+    return literal_eval(f"{s}{s}{string}{s}{s}")
+
+
+def make_literals(n: int, seed: int = 0) -> List[str]:
+    """Literals shaped like a data table: mostly small ints, some big, some floats"""
+    rng = random.Random(seed)
+    literals = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.5:
+            literals.append(str(rng.randint(-2, 9)))
+        elif r < 0.7:
+            literals.append(str(rng.randint(-(10**9), 10**9)))
+        elif r < 0.8:
+            literals.append(hex(rng.getrandbits(32)))
+        else:
+            literals.append(f"{rng.uniform(-1e3, 1e3):.6g}")
+    return literals
+
+
+def decode_all(
+    literals: List[str],
+    int_decoder: Callable[[str], int],
+    based_decoder: Callable[[str], int],
+    float_decoder: Callable[[str], float],
+) -> None:
+    for text in literals:
+        if text.startswith(("0x", "-0x")):
+            based_decoder(text)
+        elif "." in text or "e" in text:
+            float_decoder(text)
+        else:
+            int_decoder(text)
+
+
+def main() -> None:
+    literals = make_literals(100_000)
+    before = best(
+        lambda: decode_all(literals, literal_eval_int, literal_eval, literal_eval)
+    )
+    after = best(
+        lambda: decode_all(literals, decode_int, decode_based_int, decode_float)
+    )
+    print(f"decode {len(literals)} literals")
+    print(f"  literal_eval: {before * 1e3:8.1f} ms")
+    print(f"  ksl.literals: {after * 1e3:8.1f} ms  ({before / after:.1f}x)")
+
+    rows = [literals[i : i + 10] for i in range(0, len(literals), 10)]
+    source = "".join(f"row [{', '.join(row)},]\n" for row in rows)
+    lex = best(lambda: sum(1 for _ in BufferLexer(source=source, path="")))
+    print(f"lex {len(source)} characters of number-dense source")
+    print(f"  BufferLexer:  {lex * 1e3:8.1f} ms")
+
+    for name, body in [
+        ("plain", "lorem ipsum dolor\n" * 50_000),
+        ("escaped", "lorem \\'ipsum\\' dolor\\n" * 50_000),
+        ("backslashed", "a\\\\b\\\\\\n" * 50_000),
+    ]:
+        string = f"'{body}'"
+        before = best(lambda: literal_eval_string(string))
+        after = best(lambda: decode_string(string, 1, len(string) - 1))
+        print(f"decode {len(string)} character {name} string")
+        print(f"  literal_eval: {before * 1e3:8.1f} ms")
+        print(f"  ksl.literals: {after * 1e3:8.1f} ms  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
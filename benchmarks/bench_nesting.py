@@ -0,0 +1,50 @@
+"""
+Compares the recursive :class:`ksl.parse.Parser` against :class:`ksl.parse.StackParser`
+on deeply nested modules, and on the ``deep`` corpus of :mod:`benchmarks.corpus`.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_nesting``.
+"""
+
+from typing import Callable, Dict, Optional, Type
+
+from benchmarks.corpus import generate
+from benchmarks.util import best
+from ksl.parse import Parser, StackParser
+from ksl.table import tokenize
+
+SHAPES: Dict[str, Callable[[int], str]] = {
+    "parens": lambda n: "a " + "(" * n + "x" + ")" * n + "\n",
+    "lists": lambda n: "a " + "[" * n + "x" + ",]" * n + "\n",
+    "maps": lambda n: "a " + "{k: " * n + "x" + ",}" * n + "\n",
+    "blocks": lambda n: "".join(" " * i + "a b\n" for i in range(n)),
+}
+
+
+def time_parse(parser_type: Type[Parser], source: str) -> Optional[float]:
+    """Seconds to parse the pre-lexed ``source``, or None if it's nested too deep"""
+    table = tokenize(source)
+    try:
+        return best(lambda: parser_type(table, "").parse_module())
+    except RecursionError:
+        return None
+
+
+def main() -> None:
+    def ms(seconds: Optional[float]) -> str:
+        return "too deep" if seconds is None else f"{seconds * 1e3:.2f}ms"
+
+    print(f"{'':16}{'Parser':>14}{'StackParser':>14}")
+    for name, shape in SHAPES.items():
+        for depth in (10, 100, 1000, 10000):
+            source = shape(depth)
+            before = time_parse(Parser, source)
+            after = time_parse(StackParser, source)
+            print(f"{name + ' ' + str(depth):16}{ms(before):>14}{ms(after):>14}")
+    source = generate("deep", 1_000_000)
+    before = time_parse(Parser, source)
+    after = time_parse(StackParser, source)
+    print(f"{'deep corpus':16}{ms(before):>14}{ms(after):>14}")
+
+
+if __name__ == "__main__":
+    main()
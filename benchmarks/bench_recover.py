@@ -0,0 +1,68 @@
+"""
+Compares finding every error in a module with a single recovering parse, against
+parsing it over and over, fixing the error each parse stops at, on the corpora of
+:mod:`benchmarks.corpus` with a broken line every so often. Also compares the
+recovering parse against the plain one on the intact corpora.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_recover``.
+"""
+
+import random
+from typing import List
+
+from benchmarks.corpus import KINDS, generate
+from benchmarks.util import best
+from ksl.parse import ParseError, parse_module
+from ksl.source import SourceError
+
+ERRORS = 20
+
+
+def broken(source: str, seed: int = 0) -> str:
+    """The source with ERRORS of its lines starting with a stray bracket"""
+    lines = source.split("\n")
+    rng = random.Random(seed)
+    for i in rng.sample(range(len(lines) - 1), ERRORS):
+        lines[i] = lines[i][: len(lines[i]) - len(lines[i].lstrip())] + ")"
+    return "\n".join(lines)
+
+
+def one_at_a_time(source: str) -> int:
+    """Parses until there are no errors, dropping the line of each; returns passes"""
+    passes = 0
+    while True:
+        passes += 1
+        try:
+            parse_module(source)
+        except ParseError as e:
+            start = source.rfind("\n", 0, e.offset) + 1
+            end = source.find("\n", e.offset)
+            source = source[:start] + source[end + 1 :]
+        else:
+            return passes
+
+
+def main() -> None:
+    print(
+        f"{'':10}{'parse ms':>10}{'recover ms':>11}{'passes':>8}{'repeat ms':>11}",
+        end="",
+    )
+    print(f"{'1 pass ms':>11}{'errors':>8}")
+    for kind in [*KINDS, "mixed"]:
+        source = generate(kind, 300_000)
+        parse = best(lambda: parse_module(source), repeat=3)
+        recover = best(lambda: parse_module(source, errors=[]), repeat=3)
+        source = broken(source)
+        passes = one_at_a_time(source)
+        repeated = best(lambda: one_at_a_time(source), repeat=3)
+        errors: List[SourceError] = []
+        single = best(lambda: parse_module(source, errors=[]), repeat=3)
+        parse_module(source, errors=errors)
+        print(
+            f"{kind:10}{parse * 1e3:>10.0f}{recover * 1e3:>11.0f}{passes:>8}"
+            f"{repeated * 1e3:>11.0f}{single * 1e3:>11.0f}{len(errors):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Compares :mod:`ksl.serialize` against pickle on the size of an encoded module and
+the time to encode and decode it.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_serialize``.
+"""
+
+import pickle
+
+from benchmarks.util import best
+from ksl.parse import parse_module
+from ksl.serialize import dump, load
+
+
+def make_source(n: int) -> str:
+    return "".join(
+        f"def f{i} [x, -{i},]:\n"
+        f"  print (add x {i}.5 'message {i % 7}')\n"
+        f"  z {{a: 1, b: {{}},}} {{1, 2,}}\n"
+        for i in range(n)
+    )
+
+
+def main() -> None:
+    module = parse_module(make_source(3000))
+    encodings = [
+        ("pickle", lambda: pickle.dumps(module, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ("ksl.serialize", lambda: dump(module), load),
+    ]
+    print(f"{'':16}{'size':>12}{'dump':>12}{'load':>12}")
+    for name, encode, decode in encodings:
+        data = encode()
+        dump_time = best(encode)
+        load_time = best(lambda: decode(data))
+        print(
+            f"{name:16}{len(data):>12}"
+            f"{dump_time * 1e3:>10.1f}ms{load_time * 1e3:>10.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
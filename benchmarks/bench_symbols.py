@@ -0,0 +1,29 @@
+"""
+Compares the memory retained by modules parsed with and without a
+:class:`ksl.symbols.SymbolTable`, and the time taken to parse them.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_symbols``.
+"""
+
+from benchmarks.corpus import generate
+from benchmarks.util import best, retained
+from ksl.parse import parse_module
+from ksl.symbols import SymbolTable
+
+
+def main() -> None:
+    print(f"{'':10}{'MB':>8}{'interned MB':>13}{'ms':>10}{'interned ms':>13}")
+    for kind in ("infix", "deep", "numeric", "mixed"):
+        source = generate(kind, 2_000_000)
+        plain = retained(lambda: parse_module(source))
+        interned = retained(lambda: parse_module(source, symbols=SymbolTable()))
+        before = best(lambda: parse_module(source), repeat=3)
+        after = best(lambda: parse_module(source, symbols=SymbolTable()), repeat=3)
+        print(
+            f"{kind:10}{plain / 1e6:>8.1f}{interned / 1e6:>13.1f}"
+            f"{before * 1e3:>10.0f}{after * 1e3:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
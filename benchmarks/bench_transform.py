@@ -0,0 +1,62 @@
+"""
+Compares :func:`ksl.transform.to_prefix` against the infix rewrite as the README
+words it, recursing on the rest of each expression, on lines of thousands of
+operands, and on the corpora of :mod:`benchmarks.corpus`.
+
+Run with ``PYTHONPATH=src python -m benchmarks.bench_transform``.
+"""
+
+from typing import Callable, List
+
+import ksl.ast as ast
+from benchmarks.corpus import KINDS, generate
+from benchmarks.util import best
+from ksl.parse import parse_module
+from ksl.transform import to_prefix
+
+
+def recursive(node: ast.Node) -> ast.Node:
+    """The README's rules, applied by recursion, rebuilding every container"""
+    if isinstance(node, ast.Map):
+        pairs = [(recursive(key), recursive(value)) for key, value in node]
+        return ast.Map(pairs)
+    if not isinstance(node, list):
+        return node
+    children = [recursive(child) for child in node]
+    if type(node) in (ast.Expression, ast.Line):
+        return type(node)(_swap(children))
+    return type(node)(children)  # type: ignore
+
+
+def _swap(elems: List[ast.Node]) -> List[ast.Node]:
+    if len(elems) < 3:
+        return elems
+    rest = _swap(elems[2:])
+    return [elems[1], elems[0], rest[0] if len(rest) == 1 else ast.Expression(rest)]
+
+
+def ms(stmt: Callable[[], object], repeat: int = 5) -> str:
+    """Milliseconds ``stmt`` takes, or "too deep" if it recurses too deep"""
+    try:
+        return f"{best(stmt, repeat) * 1e3:.2f}ms"
+    except RecursionError:
+        return "too deep"
+
+
+def main() -> None:
+    print(f"{'':16}{'recursive':>14}{'to_prefix':>14}")
+    for operands in (1000, 10_000, 100_000):
+        source = "x = " + " + ".join(f"a{i}" for i in range(operands)) + "\n"
+        module = parse_module(source)
+        before = ms(lambda: recursive(module))
+        after = ms(lambda: to_prefix(module))
+        print(f"{str(operands) + ' operands':16}{before:>14}{after:>14}")
+    for kind in [*KINDS, "mixed"]:
+        module = parse_module(generate(kind, 1_000_000))
+        before = ms(lambda: recursive(module), repeat=3)
+        after = ms(lambda: to_prefix(module), repeat=3)
+        print(f"{kind:16}{before:>14}{after:>14}")
+
+
+if __name__ == "__main__":
+    main()
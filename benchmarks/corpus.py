@@ -0,0 +1,121 @@
+"""
+Seeded generator of synthetic KSL modules.
+
+Each kind of corpus stresses a different part of the lexer and parser; ``mixed``
+interleaves all of them. The same kind, size, and seed always give the same text, so
+results can be compared between commits.
+"""
+
+import random
+from typing import Callable, Dict, List
+
+_NAMES = ["x", "y", "count", "total", "item", "self.value", "acc", "node", "i", "n"]
+_OPERATORS = ["+", "-", "*", "/", "==", "<=", "and", "or", "->", "%"]
+_WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing"]
+_INDENT = "  "
+
+
+def _name(rng: random.Random) -> str:
+    return rng.choice(_NAMES)
+
+
+def _number(rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.4:
+        return str(rng.randint(-9, 99))
+    if r < 0.6:
+        return str(rng.randint(-(10**12), 10**12))
+    if r < 0.7:
+        return hex(rng.getrandbits(32))
+    if r < 0.75:
+        return "0b" + bin(rng.getrandbits(12))[2:]
+    return f"{rng.uniform(-1e6, 1e6):.9g}"
+
+
+def _deep(rng: random.Random) -> List[str]:
+    """A function whose body nests conditionals and loops many levels deep"""
+    lines = [f"def f{rng.randrange(1000)} [{_name(rng)}, {_name(rng)},]:"]
+    depth = 1
+    for _ in range(rng.randint(10, 40)):
+        indent = _INDENT * depth
+        if depth < 24 and rng.random() < 0.6:
+            keyword = rng.choice(["if", "while", "for", "with"])
+            lines.append(f"{indent}{keyword} ({_name(rng)} < {_number(rng)}):")
+            depth += 1
+            lines.append(f"{_INDENT * depth}set {_name(rng)} {_number(rng)}")
+        else:
+            lines.append(f"{indent}call {_name(rng)} {_name(rng)} {_number(rng)}")
+            depth = rng.randint(1, depth)
+    return lines
+
+
+def _infix(rng: random.Random) -> List[str]:
+    """Long lines of names and operators, with some parenthesized sub-expressions"""
+    parts = ["set", _name(rng), "="]
+    for _ in range(rng.randint(20, 80)):
+        if rng.random() < 0.15:
+            parts.append(f"({_name(rng)} {rng.choice(_OPERATORS)} {_number(rng)})")
+        else:
+            parts.append(_name(rng))
+        parts.append(rng.choice(_OPERATORS))
+    parts.append(_number(rng))
+    return [" ".join(parts)]
+
+
+def _numeric(rng: random.Random) -> List[str]:
+    """Rows of a data table"""
+    row = ", ".join(_number(rng) for _ in range(rng.randint(8, 32)))
+    return [f"row {rng.randrange(10**6)} [{row},]"]
+
+
+def _strings(rng: random.Random) -> List[str]:
+    """Large string literals, some with escapes and some spanning lines"""
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(50, 500))]
+    if rng.random() < 0.5:
+        body = " ".join(words)
+    else:
+        body = "\\n".join(" ".join(words[i : i + 8]) for i in range(0, len(words), 8))
+    if rng.random() < 0.3:
+        body = body.replace("sit", "\\'sit\\'").replace(" amet", "\n amet")
+    return [f"doc {_name(rng)} '{body}'"]
+
+
+def _literal(rng: random.Random, depth: int) -> str:
+    r = rng.random()
+    if depth <= 0 or r < 0.3:
+        return _number(rng) if rng.random() < 0.5 else f"'{rng.choice(_WORDS)}'"
+    items = [_literal(rng, depth - 1) for _ in range(rng.randint(1, 4))]
+    if r < 0.55:
+        return "[" + "".join(f"{item}, " for item in items) + "]"
+    if r < 0.8:
+        keys = [f"{rng.choice(_WORDS)}{i}" for i in range(len(items))]
+        return "{" + "".join(f"{k}: {v}, " for k, v in zip(keys, items)) + "}"
+    return "{" + "".join(f"{item}, " for item in items) + "}"
+
+
+def _nested(rng: random.Random) -> List[str]:
+    """Configuration-like nested list, set, and map literals"""
+    return [f"config {_name(rng)} {_literal(rng, rng.randint(3, 7))}"]
+
+
+KINDS: Dict[str, Callable[[random.Random], List[str]]] = {
+    "deep": _deep,
+    "infix": _infix,
+    "numeric": _numeric,
+    "strings": _strings,
+    "nested": _nested,
+}
+
+
+def generate(kind: str, size: int, seed: int = 0) -> str:
+    """Generates a module of about ``size`` characters out of blocks of ``kind``"""
+    rng = random.Random(f"{kind}:{seed}")
+    makers = list(KINDS.values()) if kind == "mixed" else [KINDS[kind]]
+    lines: List[str] = []
+    total = 0
+    while total < size:
+        maker = rng.choice(makers)
+        for line in maker(rng):
+            lines.append(line)
+            total += len(line) + 1
+    return "\n".join(lines) + "\n"
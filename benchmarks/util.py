@@ -0,0 +1,53 @@
+"""Measurements shared by the benchmarks"""
+
+import gc
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+import ksl.ast as ast
+
+
+def count_nodes(node: ast.Node) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, ast.Map):
+            for key, value in node:
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
+    return count
+
+
+def best(stmt: Callable[[], object], repeat: int = 5) -> float:
+    """Seconds the fastest of ``repeat`` runs of ``stmt`` took"""
+    return min(timeit.repeat(stmt, number=1, repeat=repeat))
+
+
+def peak_memory(stmt: Callable[[], object]) -> int:
+    """Peak bytes traced while running ``stmt``"""
+    tracemalloc.start()
+    try:
+        stmt()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def retained(build: Callable[[], Any]) -> int:
+    """Bytes still allocated once ``build`` returns, held by what it returned"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - before
+        del result
+        return size
+    finally:
+        tracemalloc.stop()
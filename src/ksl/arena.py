@@ -0,0 +1,224 @@
+"""
+Compact store for large ASTs.
+
+An :class:`Arena` holds a tree as parallel arrays with one entry per node: its kind,
+its span, and where its children are. The children of each node are stored next to
+each other, so a node only needs the index of its first child and their number.
+Names and literal values are kept once each in a pool, which leaves take the index
+of in place of a first child. :class:`Cursor` objects navigate the arena without
+building nodes.
+"""
+
+from array import array
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Tuple, Union
+
+import ksl.ast as ast
+
+# nodes are stored by the same kinds as they're serialized by
+from ksl.serialize import (
+    _CLASSES,
+    _ENCODED,
+    _LITERALS,
+    EXPRESSION,
+    FLOAT,
+    INTEGER,
+    LINE,
+    LIST,
+    MAP,
+    MODULE,
+    NAME,
+    PARAGRAPH,
+    SET,
+    STRING,
+)
+
+__all__ = [
+    "Arena",
+    "Cursor",
+    "MODULE",
+    "EXPRESSION",
+    "LINE",
+    "PARAGRAPH",
+    "LIST",
+    "SET",
+    "MAP",
+    "NAME",
+    "STRING",
+    "INTEGER",
+    "FLOAT",
+]
+
+
+class Arena:
+    """
+    AST stored as parallel arrays, indexed by node.
+
+    ``first`` is the index of a container's first child, or the index in ``pool`` of
+    a leaf's name or value; ``counts`` is the number of children, with keys and values
+    interleaved for maps. The root is node 0.
+    """
+
+    def __init__(self) -> None:
+        self.kinds = array("B")
+        self.first = array("I")
+        self.counts = array("I")
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self.pool: List[Any] = []
+        self._pooled: Dict[Tuple[type, Any], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def root(self) -> "Cursor":
+        return Cursor(self, 0)
+
+    @classmethod
+    def from_ast(cls, node: ast.Node) -> "Arena":
+        """Stores an AST"""
+        arena = cls()
+        arena._append(node)
+        # nodes are stored breadth first, so the children of each are appended
+        # together when it's reached
+        pending: Deque[ast.Node] = deque([node])
+        index = 0
+        while pending:
+            node = pending.popleft()
+            if type(node) in _ENCODED:
+                children: List[ast.Node]
+                if isinstance(node, ast.Map):
+                    children = [child for pair in node for child in pair]
+                else:
+                    children = node  # type: ignore
+                arena.first[index] = len(arena.kinds)
+                arena.counts[index] = len(children)
+                for child in children:
+                    arena._append(child)
+                pending.extend(children)
+            index += 1
+        del arena._pooled
+        return arena
+
+    def _append(self, node: ast.Node) -> None:
+        if isinstance(node, ast.Name):
+            kind = NAME
+            value: Any = node.name
+        elif isinstance(node, ast.Literal):
+            value = node.value
+            kind = _LITERALS.get(type(value), -1)
+            if kind < 0:
+                raise ValueError(f"can't store literal {value!r}")
+        elif type(node) in _ENCODED:
+            kind = _ENCODED[type(node)]
+            value = None
+        else:
+            raise ValueError(f"can't store node {node!r}")
+        first = 0
+        if value is not None:
+            # -0.0 == 0.0, but they're different literals
+            key = (float, repr(value)) if kind == FLOAT else (type(value), value)
+            first = self._pooled.get(key, -1)
+            if first < 0:
+                first = self._pooled[key] = len(self.pool)
+                self.pool.append(value)
+        self.kinds.append(kind)
+        self.first.append(first)
+        self.counts.append(0)
+        self.starts.append(node.start)
+        self.ends.append(node.end)
+
+    def to_ast(self, index: int = 0) -> ast.Node:
+        """Builds the AST of the subtree at ``index``"""
+        root = self._node(index)
+        stack = [(root, index)] if self.kinds[index] < NAME else []
+        while stack:
+            node, index = stack.pop()
+            first = self.first[index]
+            children = [self._node(i) for i in range(first, first + self.counts[index])]
+            if isinstance(node, ast.Map):
+                node.extend(zip(children[::2], children[1::2]))
+            else:
+                node.extend(children)
+            for i, child in enumerate(children, first):
+                if self.kinds[i] < NAME:
+                    stack.append((child, i))
+        return root
+
+    def _node(self, index: int) -> Any:
+        """Builds the node at ``index``, without any children"""
+        kind = self.kinds[index]
+        start = self.starts[index]
+        end = self.ends[index]
+        if kind == NAME:
+            return ast.Name(self.pool[self.first[index]], start, end)
+        if kind > NAME:
+            return ast.Literal(self.pool[self.first[index]], start, end)
+        node = _CLASSES[kind]()
+        node.start = start
+        node.end = end
+        return node
+
+
+class Cursor:
+    """
+    A node of an :class:`Arena`.
+
+    Containers are sequences of cursors for their children, or for maps, of pairs of
+    cursors for their keys and values.
+    """
+
+    __slots__ = ("arena", "index")
+
+    def __init__(self, arena: Arena, index: int):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def kind(self) -> int:
+        return self.arena.kinds[self.index]
+
+    @property
+    def start(self) -> int:
+        return self.arena.starts[self.index]
+
+    @property
+    def end(self) -> int:
+        return self.arena.ends[self.index]
+
+    @property
+    def value(self) -> Any:
+        """Name of a Name, or value of a literal"""
+        if self.kind < NAME:
+            raise TypeError("containers have no value")
+        return self.arena.pool[self.arena.first[self.index]]
+
+    def __len__(self) -> int:
+        kind = self.kind
+        if kind >= NAME:
+            return 0
+        count = self.arena.counts[self.index]
+        return count // 2 if kind == MAP else count
+
+    def __getitem__(self, i: int) -> Union["Cursor", Tuple["Cursor", "Cursor"]]:
+        size = len(self)
+        if i < 0:
+            i += size
+        if not 0 <= i < size:
+            raise IndexError("child index out of range")
+        first = self.arena.first[self.index]
+        if self.kind == MAP:
+            key = first + 2 * i
+            return Cursor(self.arena, key), Cursor(self.arena, key + 1)
+        return Cursor(self.arena, first + i)
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"Cursor({self.index})"
+
+    def to_ast(self) -> ast.Node:
+        return self.arena.to_ast(self.index)
@@ -1,10 +1,14 @@
 import typing
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 class Node:
     """ """
 
+    # offsets into the source of the node's first character and the one past its last
+    start: int = 0
+    end: int = 0
+
 
 class Expression(typing.List["Node"], Node):
     """ """
@@ -26,6 +30,87 @@ class Paragraph(Block):
     """ """
 
 
+class LazyParagraph(Paragraph):
+    """
+    Paragraph whose body is only parsed, by calling ``load``, when it's first used.
+
+    Until then it holds just the expressions before the body. Using it as a sequence
+    in any way adds the body, and it then becomes a plain :class:`Paragraph`.
+    """
+
+    def __init__(
+        self,
+        exprs: typing.Iterable[Node],
+        load: typing.Callable[[], typing.List[Node]],
+    ):
+        super().__init__(exprs)
+        self._load = load
+
+    def expand(self) -> None:
+        body = self._load()
+        del self._load
+        self.__class__ = Paragraph  # type: ignore
+        self.extend(body)
+
+
+class LazyModule(Module):
+    """
+    Module whose blocks from ``moved_from`` on are yet to have their spans moved by
+    ``delta``, see :class:`ksl.incremental.Document`.
+
+    Using it as a sequence in any way moves them, and it then becomes a plain
+    :class:`Module`.
+    """
+
+    def __init__(self, blocks: typing.Iterable[Node], moved_from: int, delta: int):
+        super().__init__(blocks)
+        self.moved_from = moved_from
+        self.delta = delta
+
+    def expand(self) -> None:
+        for block in list.__getitem__(self, slice(self.moved_from, None)):
+            shift(block, self.delta)
+        del self.moved_from, self.delta
+        self.__class__ = Module  # type: ignore
+
+
+def _expanding(name: str) -> typing.Callable[..., typing.Any]:
+    def expanding(self: typing.Any, *args: typing.Any) -> typing.Any:
+        self.expand()
+        return getattr(self, name)(*args)
+
+    expanding.__name__ = name
+    return expanding
+
+
+for _method in (
+    *("__len__", "__iter__", "__reversed__", "__contains__", "__getitem__"),
+    *("__setitem__", "__delitem__", "__add__", "__iadd__", "__mul__", "__rmul__"),
+    *("__imul__", "__eq__", "__ne__", "__lt__", "__le__", "__gt__", "__ge__"),
+    *("__repr__", "__reduce_ex__", "append", "extend", "insert", "pop", "remove"),
+    *("clear", "copy", "count", "index", "reverse", "sort"),
+):
+    setattr(LazyParagraph, _method, _expanding(_method))
+    setattr(LazyModule, _method, _expanding(_method))
+
+
+def shift(node: Node, delta: int) -> None:
+    """Moves the spans of a subtree by ``delta``"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        # spans don't take part in comparisons or hashing, so moving them is safe even
+        # on the frozen value nodes
+        object.__setattr__(node, "start", node.start + delta)
+        object.__setattr__(node, "end", node.end + delta)
+        if isinstance(node, Map):
+            for key, value in node:
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
 class Value(Node):
     """ """
 
@@ -35,6 +120,8 @@ class Literal(Value):
     """ """
 
     value: typing.Any
+    start: int = field(default=0, compare=False, repr=False)
+    end: int = field(default=0, compare=False, repr=False)
 
 
 @dataclass(frozen=True)
@@ -42,6 +129,17 @@ class Name(Value):
     """ """
 
     name: str
+    start: int = field(default=0, compare=False, repr=False)
+    end: int = field(default=0, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class Error(Node):
+    """Part of a source which couldn't be parsed, because of ``error``"""
+
+    error: Exception
+    start: int = field(default=0, compare=False, repr=False)
+    end: int = field(default=0, compare=False, repr=False)
 
 
 class Composite(Value):
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import pathlib
+import tempfile
+import time
+from typing import Dict, Optional, TextIO, Tuple, Union
+
+import ksl.ast as ast
+from ksl.parse import parse_module
+from ksl.serialize import dump, load
+from ksl.types import Path
+from ksl.version import __version__
+
+# bumped whenever the layout of entries changes
+FORMAT = 2
+
+_MAGIC = b"KSLC"
+_SUFFIX = ".kslc"
+_HEADER_SIZE = len(_MAGIC) + 1 + hashlib.sha256().digest_size
+# seconds a file must have gone unmodified for its mtime to tell of any change to it,
+# as mtimes may be as coarse as this
+_MTIME_GRANULARITY = 2
+
+
+class ParseCache:
+    """
+    Directory of parsed modules, keyed by the content of their source.
+
+    Keys cover the source text, the ksl version, and the indentation setting, so an
+    entry is only ever used for a source that would parse to the same AST. A hit
+    loads the AST without lexing or parsing. Entries are written atomically, and the
+    least recently used ones are evicted once the directory grows past ``max_size``
+    bytes. Entries which are unreadable, or written by another format or key, are
+    dropped and the source is parsed again.
+
+    Like Python's bytecode cache, files are only read and hashed again once their
+    size or modification time changes; the key of each file is remembered for as
+    long as the cache object lives. Files modified too recently for their mtime to be
+    trusted are always hashed.
+    """
+
+    def __init__(self, directory: Path, max_size: int = 64 * 1024 * 1024):
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # keys of the files seen, by path and indentation, with the mtime and size of
+        # the file when they were hashed
+        self._files: Dict[Tuple[str, Optional[str]], Tuple[int, int, bytes]] = {}
+
+    def parse_module(
+        self,
+        source: Optional[Union[str, TextIO]] = None,
+        path: Path = "",
+        indentation: Optional[str] = None,
+    ) -> ast.Module:
+        """Like :func:`ksl.parse.parse_module`, but going through the cache"""
+        if source is None:
+            key = self._file_key(path, indentation)
+        else:
+            if not isinstance(source, str):
+                source = source.read()
+            key = self._key(b"text", source.encode("utf-8"), indentation)
+        entry = self.directory / (key.hex() + _SUFFIX)
+
+        cached = self._load(entry, key)
+        if cached is not None:
+            return cached
+        module = parse_module(source, path, indentation)
+        if source is None:
+            # don't store an AST for contents other than the ones hashed
+            with open(path, "rb") as f:
+                if self._key(b"file", f.read(), indentation) != key:
+                    return module
+        self._store(entry, key, module)
+        return module
+
+    def _file_key(self, path: Path, indentation: Optional[str]) -> bytes:
+        """Key of a file, hashing it only if it changed since it was last hashed"""
+        name = os.path.abspath(path)
+        stat = os.stat(name)
+        known = self._files.get((name, indentation))
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+        # files are lexed as bytes, so node spans are byte offsets; keep them apart
+        # from text with the same content
+        with open(name, "rb") as f:
+            key = self._key(b"file", f.read(), indentation)
+        if time.time() - stat.st_mtime > _MTIME_GRANULARITY:
+            self._files[name, indentation] = (stat.st_mtime_ns, stat.st_size, key)
+        return key
+
+    def clear(self) -> None:
+        """Removes all entries"""
+        for entry in self.directory.glob("*" + _SUFFIX):
+            self._remove(entry)
+
+    @staticmethod
+    def _key(mode: bytes, data: bytes, indentation: Optional[str]) -> bytes:
+        h = hashlib.sha256()
+        for part in (__version__.encode(), mode, repr(indentation).encode()):
+            h.update(part)
+            h.update(b"\0")
+        h.update(data)
+        return h.digest()
+
+    def _load(self, entry: pathlib.Path, key: bytes) -> Optional[ast.Module]:
+        try:
+            with open(entry, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        header = _MAGIC + bytes((FORMAT,)) + key
+        try:
+            if data[:_HEADER_SIZE] != header:
+                raise ValueError("stale entry")
+            module = load(data[_HEADER_SIZE:])
+            if not isinstance(module, ast.Module):
+                raise ValueError("entry is not a module")
+        except Exception:
+            self._remove(entry)
+            return None
+        # mark as recently used for eviction
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return module
+
+    def _store(self, entry: pathlib.Path, key: bytes, module: ast.Module) -> None:
+        data = dump(module)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_MAGIC)
+                f.write(bytes((FORMAT,)))
+                f.write(key)
+                f.write(data)
+            os.replace(tmp, entry)
+        except BaseException:
+            self._remove(pathlib.Path(tmp))
+            raise
+        self._evict(entry)
+
+    def _evict(self, keep: pathlib.Path) -> None:
+        """
+        Removes the least recently used entries, other than ``keep``, until the cache
+        fits in max_size
+        """
+        entries = []
+        total = 0
+        for entry in self.directory.glob("*" + _SUFFIX):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            total += stat.st_size
+            if entry != keep:
+                entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_size:
+                break
+            self._remove(entry)
+            total -= size
+
+    @staticmethod
+    def _remove(entry: pathlib.Path) -> None:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
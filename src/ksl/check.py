@@ -0,0 +1,247 @@
+"""
+Checking that sources are valid KSL without building their ASTs.
+
+:func:`check` runs the grammar of :class:`ksl.parse.Parser` over a source and finds
+the same errors, but keeps nothing of what it recognizes, so the memory it needs
+only grows with how deeply the source nests, as it recurses once per level of
+blocks and expressions. Its lexer hands it plain tuples rather than tokens, which
+are only built to describe errors, so it's also faster than parsing.
+"""
+
+import itertools
+import re
+import typing
+
+import ksl.tokens as tokens
+from ksl.lex import BufferLexer, LexError
+from ksl.parse import (
+    _BLOCK_ENDS,
+    _COLON,
+    _COMMA,
+    _DEDENT,
+    _END,
+    _INDENT,
+    _LINE_ENDS,
+    _LITERALS,
+    _NAME,
+    _RBRACKET,
+    _RCURLY,
+    _RPAREN,
+    _SEMICOLON,
+    ParseError,
+)
+from ksl.source import SourceError
+from ksl.types import Path
+
+# a token as lexed for checking: its kind, type, value, start, and end
+_Token = typing.Tuple[int, typing.Type[tokens.Token], typing.Any, int, int]
+
+# kinds the parser doesn't check for
+_NODENT = tokens.Nodent.kind
+_LPAREN = tokens.LParen.kind
+_LCURLY = tokens.LCurly.kind
+_LBRACKET = tokens.LBracket.kind
+_ATOMS = _LITERALS | 1 << _NAME
+
+# the starts of top-level lines, after which checking can go on past an error
+_str_blocks = re.compile("\n(?=[^ \t\n#])")
+_bytes_blocks = re.compile(b"[\r\n](?=[^ \t\r\n#])")
+
+
+def check(
+    source: typing.Optional[typing.Union[str, typing.TextIO]] = None,
+    path: Path = "",
+    indentation: typing.Optional[str] = None,
+    all_errors: bool = False,
+) -> typing.List[SourceError]:
+    """
+    Checks whether a module is valid, returning its errors, if any.
+
+    Only the first error is returned unless ``all_errors`` is given; then checking
+    goes on from the next top-level block after each error. As with
+    :func:`ksl.parse.parse_module`, if no ``source`` is given the file at ``path`` is
+    memory-mapped.
+    """
+    errors = Checker(source, path, indentation).iter_errors()
+    if all_errors:
+        return list(errors)
+    first = list(itertools.islice(errors, 1))
+    errors.close()
+    return first
+
+
+class _CheckLexer(BufferLexer):
+    """BufferLexer which lexes tokens as :data:`_Token` tuples"""
+
+    def _emit(self, ttype: typing.Type[tokens.Token], value: typing.Any = None) -> None:
+        token = (ttype.kind, ttype, value, self._start, self._pos)
+        self._lookahead.append(token)  # type: ignore
+
+
+class Checker:
+    """Recognizer of the grammar of :class:`ksl.parse.Parser`"""
+
+    def __init__(
+        self,
+        source: typing.Optional[typing.Union[str, typing.TextIO]],
+        path: Path,
+        indentation: typing.Optional[str] = None,
+    ):
+        self.lexer = _CheckLexer(source=source, path=path, indentation=indentation)
+        self._tokens = typing.cast(typing.Deque[_Token], self.lexer._lookahead)
+        self.curr: _Token = (tokens.Start.kind, tokens.Start, None, 0, 0)
+
+    def iter_errors(self) -> typing.Generator[SourceError, None, None]:
+        """
+        Checks the module, yielding each error and going on from the next top-level
+        block after it
+        """
+        start = 0
+        with self.lexer:
+            while True:
+                try:
+                    self._next()
+                    self._check_blocks()
+                    return
+                except (LexError, ParseError) as e:
+                    yield e
+                    assert e.offset is not None
+                    offset = e.offset
+                    # a block cut short by the end of its line leaves the next intact
+                    if isinstance(e, ParseError) and self.curr[0] == _NODENT:
+                        offset = max(offset - 1, start)
+                    start = self._next_block(offset)
+                    if start < 0:
+                        return
+                    self.lexer._resume(start)
+
+    def _next_block(self, offset: int) -> int:
+        """Start of the first top-level line after ``offset``, or -1 if there's none"""
+        buf = self.lexer._buffer
+        blocks = _str_blocks if isinstance(buf, str) else _bytes_blocks
+        match = blocks.search(buf, offset)  # type: ignore
+        return -1 if match is None else match.end()
+
+    def _check_blocks(self) -> None:
+        paragraph = False
+        while self.curr[0] != _END:
+            if not paragraph:
+                self._assert(tokens.Nodent)
+            paragraph = self._check_block()
+
+    def _check_block(self) -> bool:
+        """Checks a block, returning whether it was a paragraph"""
+        self._check_expr()
+        if 1 << self.curr[0] & _BLOCK_ENDS:
+            return False
+        count = 1
+        while not 1 << self.curr[0] & _LINE_ENDS:
+            self._check_expr()
+            count += 1
+        kind = self.curr[0]
+        if kind == _SEMICOLON:
+            self._next()
+            kind = self.curr[0]
+        if 1 << kind & _BLOCK_ENDS:
+            if count < 2:
+                self._error("line must contain at least 2 sub-expressions")
+            return False
+        if kind == _COLON:
+            self._next()
+            kind = self.curr[0]
+        if kind == _INDENT:
+            self._next()
+            paragraph = self._check_block()
+            while self.curr[0] != _DEDENT:
+                if not paragraph:
+                    self._assert(tokens.Nodent)
+                paragraph = self._check_block()
+            self._next()
+            return True
+        self._fail()
+
+    def _check_expr(self) -> None:
+        kind = self.curr[0]
+        if 1 << kind & _ATOMS:
+            return self._next()
+        if kind == _LPAREN:
+            self._next()
+            while self.curr[0] != _RPAREN:
+                self._check_expr()
+                if self.curr[0] == _COMMA:
+                    self._next()
+        elif kind == _LBRACKET:
+            self._next()
+            while self.curr[0] != _RBRACKET:
+                self._check_expr()
+                self._assert(tokens.Comma)
+        elif kind == _LCURLY:
+            self._next()
+            if self.curr[0] != _RCURLY:
+                self._check_expr()
+                kind = self.curr[0]
+                if kind == _COLON:
+                    # map
+                    self._next()
+                    self._check_expr()
+                    self._assert(tokens.Comma)
+                    while self.curr[0] != _RCURLY:
+                        self._check_expr()
+                        self._assert(tokens.Colon)
+                        self._check_expr()
+                        self._assert(tokens.Comma)
+                elif kind == _COMMA:
+                    # set
+                    self._next()
+                    while self.curr[0] != _RCURLY:
+                        self._check_expr()
+                        self._assert(tokens.Comma)
+                else:
+                    self._fail()
+        else:
+            self._fail()
+        self._next()
+
+    def _next(self) -> None:
+        lookahead = self._tokens
+        if not lookahead:
+            self.lexer._lex()
+        self.curr = lookahead.popleft()
+
+    def _assert(self, expected: typing.Type[tokens.Token]) -> None:
+        if self.curr[0] != expected.kind:
+            self._error(
+                f"expected token of type: {expected.__name__}, found: {self._token()}"
+            )
+        self._next()
+
+    def _fail(self) -> typing.NoReturn:
+        self._error(f"unexpected token: {self._token()}")
+
+    def _token(self) -> tokens.Token:
+        """The current token, as the parser would have it"""
+        _, ttype, value, start, end = self.curr
+        return ttype(value, start, end)
+
+    def _error(self, msg: str) -> typing.NoReturn:
+        lexer = self.lexer
+        raise ParseError(msg, lexer.path, self.curr[3], lexer.lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    argparser = argparse.ArgumentParser(prog="python -m ksl.check")
+    argparser.add_argument("paths", nargs="+", help="modules to check")
+    argparser.add_argument(
+        "--all", action="store_true", help="report every error, not just the first"
+    )
+    args = argparser.parse_args()
+
+    failed = False
+    for path in args.paths:
+        for error in check(path=path, all_errors=args.all):
+            print(error)
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,212 @@
+from typing import List, Optional, Tuple, cast
+
+import ksl.ast as ast
+import ksl.tokens as tokens
+from ksl.lex import BufferLexer
+from ksl.parse import Parser
+from ksl.types import Path
+
+
+class _Relexer(BufferLexer):
+    """BufferLexer which notes where it detected the indentation"""
+
+    indented_at: Optional[int] = None
+
+    def _indent(self, capture: str) -> None:
+        detected = self.indentation is None
+        super()._indent(capture)
+        if detected and self.indentation is not None:
+            self.indented_at = self._start
+
+
+def _blocks(module: ast.Module, start: int, end: Optional[int]) -> List[ast.Node]:
+    """``module[start:end]``, without moving the blocks of a lazy module"""
+    return list.__getitem__(module, slice(start, end))  # type: ignore
+
+
+def _moved(module: ast.Module) -> Tuple[int, int]:
+    """Index of the first block of a module yet to be moved, and by how much"""
+    if isinstance(module, ast.LazyModule):
+        return module.moved_from, module.delta
+    return len(module), 0
+
+
+def _start(module: ast.Module, i: int) -> int:
+    """Where the i-th block of a module starts, once moved"""
+    moved_from, delta = _moved(module)
+    start = list.__getitem__(module, i).start
+    return start + delta if i >= moved_from else start
+
+
+def _bisect(module: ast.Module, pos: int) -> int:
+    """Index of the first block of a module starting at or after ``pos``"""
+    lo = 0
+    hi = list.__len__(module)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _start(module, mid) < pos:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _move_tail(
+    module: ast.Module, reuse: int, moved_from: int, moved_delta: int, delta: int
+) -> Tuple[List[ast.Node], int, int]:
+    """
+    Blocks of a module from ``reuse`` on, given its blocks from ``moved_from`` on are
+    yet to be moved by ``moved_delta``, and all of them by ``delta``
+
+    Returns them with the index of the first yet to be moved, and by how much. Only
+    the fewer of those already moved and those yet to be moved are moved now.
+    """
+    tail = _blocks(module, reuse, None)
+    moved_from = max(moved_from - reuse, 0)
+    if moved_from <= len(tail) - moved_from:
+        for block in tail[:moved_from]:
+            ast.shift(block, delta)
+        return tail, moved_from, moved_delta + delta
+    for block in tail[moved_from:]:
+        ast.shift(block, moved_delta)
+    return tail, 0, delta
+
+
+class Document:
+    """
+    Text of a module and its AST, kept up to date as the text is edited.
+
+    An edit is re-lexed and re-parsed from the start of the top-level block it falls
+    in, with the indentation state from before that block. Parsing stops at the first
+    top-level block past the edit where lexing is back in step with the old text, and
+    the old blocks from there on are reused. Reparsing only restarts at top-level
+    blocks, so an edit anywhere in a long paragraph reparses all of it.
+
+    The spans of the reused blocks are moved lazily: the module returned by
+    :meth:`edit` is a :class:`ksl.ast.LazyModule`, which moves them when first used,
+    and reading :attr:`module` moves them too. Until then, the moves of a run of
+    edits add up, and each edit only moves the blocks between it and the last one.
+
+    If an edit leaves the text without a valid parse, :meth:`edit` raises and
+    :attr:`module` is ``None`` until an edit parses again.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        path: Path = "",
+        indentation: Optional[str] = None,
+    ):
+        self.text = text
+        self.path = path
+        self.indentation = indentation
+        # where the indentation was detected, -1 if it was given
+        self._indented_at: Optional[int] = None if indentation is None else -1
+        self._module: Optional[ast.Module] = None
+        self._reparse(ast.Module(), 0, 0, 0)
+
+    @property
+    def module(self) -> Optional[ast.Module]:
+        """AST of the text, with the spans of its blocks up to date"""
+        if isinstance(self._module, ast.LazyModule):
+            self._module.expand()
+        return self._module
+
+    def _indentation_at(self, pos: int) -> Optional[str]:
+        """Indentation known to the lexer when it reached ``pos`` in the text"""
+        if self._indented_at is not None and self._indented_at < pos:
+            return self.indentation
+        return None
+
+    def edit(self, start: int, end: int, replacement: str) -> ast.Module:
+        """Replaces ``text[start:end]`` with ``replacement``, returning the new AST"""
+        self.text = self.text[:start] + replacement + self.text[end:]
+        new_end = start + len(replacement)
+        old = self._module
+        if old is None:
+            if self._indented_at != -1:
+                self.indentation = None
+                self._indented_at = None
+            return self._reparse(ast.Module(), 0, new_end, 0)
+        # an edit can only change the block it starts in and those after it, but
+        # text inserted at the start of a line could join it to the block before
+        first = _bisect(old, start) - 1
+        return self._reparse(old, max(first, 0), new_end, new_end - end)
+
+    def _reparse(
+        self, old: ast.Module, first: int, new_end: int, delta: int
+    ) -> ast.Module:
+        """
+        Parses the new text from the start of ``old[first]`` until back in step with
+        the old blocks, given the edit ended at ``new_end`` and moved the text after it
+        by ``delta``
+        """
+        restart = _start(old, first) if first > 0 else 0
+        indentation = self._indentation_at(restart)
+        parser = Parser(self.text, self.path, indentation, lexer_type=_Relexer)
+        lexer = cast(_Relexer, parser.lexer)
+        lexer._resume(restart)
+        self._module = None
+
+        blocks, reuse = self._parse_blocks(parser, old, new_end, delta)
+        # the blocks before the edit are kept as they are, so any an earlier edit has
+        # yet to move are moved now
+        moved_from, moved_delta = _moved(old)
+        for block in _blocks(old, moved_from, first):
+            ast.shift(block, moved_delta)
+        tail: List[ast.Node] = []
+        if reuse is not None:
+            tail, moved_from, moved_delta = _move_tail(
+                old, reuse, max(moved_from, first), moved_delta, delta
+            )
+
+        if indentation is None:
+            if lexer.indented_at is not None:
+                self.indentation = lexer.indentation
+                self._indented_at = lexer.indented_at
+            elif tail and self._indented_at is not None:
+                # detected in the reused blocks
+                self._indented_at += delta
+            else:
+                self.indentation = None
+                self._indented_at = None
+
+        head = _blocks(old, 0, first) + blocks
+        module: ast.Module
+        if moved_from < len(tail) and moved_delta:
+            module = ast.LazyModule(head + tail, len(head) + moved_from, moved_delta)
+        else:
+            module = ast.Module(head + tail)
+        module.start = 0
+        module.end = old.end + delta if tail else lexer.curr.start
+        self._module = module
+        return module
+
+    def _parse_blocks(
+        self, parser: Parser, old: ast.Module, new_end: int, delta: int
+    ) -> Tuple[List[ast.Node], Optional[int]]:
+        """
+        Parses blocks until the end of the text, or until the old blocks can be reused
+
+        Returns the new blocks and the index of the first old block to reuse, if any.
+        """
+        lexer = parser.lexer
+        blocks: List[ast.Node] = []
+        parser._assert(tokens.Start)
+        for block in parser._iter_blocks():
+            blocks.append(block)
+            curr = lexer.curr
+            if type(curr) is tokens.End or curr.start < new_end:
+                continue
+            # the next block starts after the edit; if an old block started at the
+            # same place in the old text, with the same indentation known, the rest
+            # of the text lexes and parses the same as before
+            old_start = curr.start - delta
+            i = _bisect(old, old_start)
+            if (
+                i < list.__len__(old)
+                and _start(old, i) == old_start
+                and lexer.indentation == self._indentation_at(old_start)
+            ):
+                return blocks, i
+        return blocks, None
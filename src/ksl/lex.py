@@ -1,63 +1,103 @@
-from ast import literal_eval
+import asyncio
+import codecs
+import copy
+import mmap
+import re
 from collections import deque
-from io import StringIO
+from io import IncrementalNewlineDecoder, StringIO
 from typing import (
     Any,
+    Callable,
     Collection,
     Deque,
+    Dict,
+    FrozenSet,
     Iterator,
     List,
+    Match,
+    NamedTuple,
     Optional,
     TextIO,
+    Tuple,
     Type,
+    TypeVar,
     Union,
     cast,
 )
 
 import ksl.tokens as tokens
-from ksl.types import Path
+from ksl.literals import (
+    ESCAPES,
+    decode_based_int,
+    decode_float,
+    decode_int,
+    decode_string,
+)
+from ksl.source import LineIndex, SourceError
+from ksl.types import Buffer, Path
+
+# how much input the streaming lexers read at a time
+CHUNK_SIZE = 64 * 1024
+
+_L = TypeVar("_L", bound="BaseLexer")
+_T = TypeVar("_T", bound=tokens.Token)
+_Run = Callable[[Any, int], Match[Any]]
+
+
+_new = object.__new__
+
+
+def _token(ttype: Type[_T], value: Any, start: int, end: int) -> _T:
+    """
+    Same as ``ttype(value, start, end)``, but without the __init__ of frozen
+    dataclasses, which sets each field through ``object.__setattr__``
+    """
+    token = _new(ttype)
+    fields = token.__dict__
+    fields["value"] = value
+    fields["start"] = start
+    fields["end"] = end
+    return token
 
 
-class LexError(Exception):
+# tokens which are never the last of a block
+_INDENT = tokens.Indent.kind
+_DEDENT = tokens.Dedent.kind
+_SEPARATORS = (1 << tokens.Nodent.kind) | (1 << tokens.Semicolon.kind)
+_SEPARATORS |= 1 << tokens.Colon.kind
+
+
+class LexError(SourceError):
     pass
 
 
-class Lexer(Iterator[tokens.Token]):
+class BaseLexer(Iterator[tokens.Token]):
+    """Token stream and indentation tracking shared by the lexing engines"""
+
     indentation: Optional[str]
     curr: tokens.Token
     path: Path
-    lineno: int
-    charno: int
+    lines: LineIndex
 
     START = tokens.Start()
     END = tokens.End()
-    _START = "START"
-    _END = ""
 
     def __init__(
         self,
         *,
-        source: Union[str, TextIO],
+        source: Optional[Union[str, TextIO]],
         path: Path,
         indentation: Optional[str] = None,
     ):
-        self._source: TextIO
-        if source is None:
-            self._source = open(path)
-        elif isinstance(source, str):
-            self._source = StringIO(source)
-        else:
-            self._source = source
         self.indentation = indentation
         self.curr = self.START
         self.path = path
-        self.lineno = 1
-        self.charno = 0
+        self.lines = LineIndex()
         self._lookahead: Deque[tokens.Token] = deque()
         self._indentations = [0]
-        self._capture: List[str] = []
-        self._curr = self._START
-        self._src_lookahead: Deque[str] = deque()
+        # offsets of the start of the token being lexed and the current position
+        self._start = 0
+        self._pos = 0
 
     def peek(self, i: int = 1) -> tokens.Token:
         missing = i - len(self._lookahead)
@@ -67,7 +107,7 @@ class Lexer(Iterator[tokens.Token]):
         return self._lookahead[i - 1]
 
     def next(self) -> tokens.Token:
-        if self.curr == self.END:
+        if type(self.curr) is tokens.End:
             return self.curr
         if not self._lookahead:
             self._lex()
@@ -76,32 +116,194 @@ class Lexer(Iterator[tokens.Token]):
 
     def __next__(self) -> tokens.Token:
         nxt = self.next()
-        if nxt == self.END:
+        if type(nxt) is tokens.End:
             raise StopIteration
         return nxt
 
+    def _lex(self) -> None:
+        """Lex at least one more token into the lookahead"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Releases what the lexer holds of the source, like the map of a file"""
+
+    def __enter__(self: _L) -> _L:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _skip_line(self, offset: int) -> bool:
+        """
+        Goes on lexing from the end of the line holding ``offset``, after an error
+        there, returning whether that could be done
+        """
+        return False
+
+    # whether _branch can be used, which needs the whole source to be held
+    _branches = False
+
+    def _branch(self) -> "BaseLexer":
+        """Copy of the lexer in its current state, which lexes on independently"""
+        lexer = copy.copy(self)
+        lexer._lookahead = deque(self._lookahead)
+        lexer._indentations = list(self._indentations)
+        return lexer
+
+    def _skip_body(self) -> int:
+        """
+        Lexes past the indented body starting at the current Indent, up to its
+        Dedent, returning the end of the last token in the body but separators
+        """
+        end = self.curr.end
+        depth = 1
+        while depth:
+            token = self.next()
+            kind = token.kind
+            if kind == _INDENT:
+                depth += 1
+            elif kind == _DEDENT:
+                depth -= 1
+            elif not 1 << kind & _SEPARATORS:
+                end = token.end
+        return end
+
+    def _emit(self, ttype: Type[tokens.Token], value: Optional[Any] = None) -> None:
+        self._lookahead.append(_token(ttype, value, self._start, self._pos))
+
+    def _error(self, msg: str, offset: Optional[int] = None) -> LexError:
+        """Makes a LexError at ``offset``, or the current position if not given"""
+        if offset is None:
+            offset = self._pos
+        return LexError(msg, self.path, offset, self.lines)
+
+    def _indent(self, capture: str) -> None:
+        """Emits the Indent, Nodent, or Dedents for a line starting with ``capture``"""
+        if self.indentation is None:
+            if len(capture) == 0:
+                return self._emit(tokens.Nodent)
+            if len(set(capture)) > 1:
+                raise self._error(
+                    "detected indentation is comprised of both spaces and tabs"
+                )
+            self.indentation = capture
+        indents = len(capture) // len(self.indentation)
+        if capture != (self.indentation * indents):
+            raise self._error("mixing indentation")
+        elif indents > self._indentations[-1]:
+            self._indentations.append(indents)
+            return self._emit(tokens.Indent)
+        elif indents < self._indentations[-1]:
+            while indents < self._indentations[-1]:
+                self._indentations.pop()
+                self._emit(tokens.Dedent)
+            return
+        else:
+            return self._emit(tokens.Nodent)
+
+    def _end(self) -> None:
+        for _ in range(len(self._indentations) - 1):
+            self._indentations.pop()
+            self._emit(tokens.Dedent)
+        return self._emit(tokens.End)
+
+
+class Lexer(BaseLexer):
+    """
+    Reference lexer which lexes the source one character at a time, but for runs of
+    characters like names, digits, and the text of strings, which it moves past at
+    once.
+
+    Streams are read ``chunk_size`` characters at a time, or a line at a time when
+    interactive, and only the current chunk and the token being lexed are held, so
+    streams of any size can be lexed.
+    """
+
+    _START = "START"
+    _END = ""
+
+    # line starts recorded before old ones are dropped
+    _KEPT_LINES = 1024
+
+    def __init__(
+        self,
+        *,
+        source: Optional[Union[str, TextIO]],
+        path: Path,
+        indentation: Optional[str] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        super().__init__(source=source, path=path, indentation=indentation)
+        self._source: TextIO
+        if source is None:
+            self._source = open(path)
+        elif isinstance(source, str):
+            self._source = StringIO(source)
+        else:
+            self._source = source
+        # the source isn't kept, so line starts are recorded as they are passed
+        self._line_starts = [0]
+        self.lines = LineIndex(starts=self._line_starts)
+        self._capture: List[str] = []
+        self._curr = self._START
+        self._pos = -1
+        self._chunk_size = chunk_size
+        self._interactive = self._source.isatty()
+        # the characters after the current one are _chunk[_chunk_pos:]
+        self._chunk = ""
+        self._chunk_pos = 0
+        # runs of characters which are moved past at once
+        self._runs = BufferLexer._str_runs
+
+    @property
+    def lineno(self) -> int:
+        return self.lines.location(max(self._pos, 0))[0]
+
+    @property
+    def charno(self) -> int:
+        return self.lines.location(max(self._pos, 0))[1]
+
+    def _read(self, size: int) -> None:
+        """Reads until at least ``size`` characters are buffered, or the source ends"""
+        chunk = self._chunk[self._chunk_pos :]
+        self._chunk_pos = 0
+        while len(chunk) < size:
+            if self._interactive:
+                data = self._source.readline()
+            else:
+                data = self._source.read(self._chunk_size)
+            if not data:
+                break
+            chunk += data
+        self._chunk = chunk
+
     def _peek(self, i: int = 1) -> str:
         assert i > 0
-        missing = i - len(self._src_lookahead)
-        if missing > 0:
-            self._src_lookahead.extend(self._source.read(missing))
-        try:
-            return self._src_lookahead[i - 1]
-        except IndexError:
-            return self._END
+        pos = self._chunk_pos + i - 1
+        if pos >= len(self._chunk):
+            self._read(i)
+            pos = i - 1
+            if pos >= len(self._chunk):
+                return self._END
+        return self._chunk[pos]
 
     def _next(self) -> str:
-        if self._src_lookahead:
-            nxt = self._src_lookahead.popleft()
-        else:
-            nxt = self._source.read(1)
-        if nxt == self._END:
-            pass
-        elif self._curr == "\n":
-            self.lineno += 1
-            self.charno = 1
+        pos = self._chunk_pos
+        if pos >= len(self._chunk):
+            self._read(1)
+            pos = 0
+        if pos < len(self._chunk):
+            nxt = self._chunk[pos]
+            self._chunk_pos = pos + 1
         else:
-            self.charno += 1
+            nxt = self._END
+        if self._curr != self._END:
+            self._pos += 1
+            if self._curr == "\n":
+                self._line_starts.append(self._pos)
+                if len(self._line_starts) > self._KEPT_LINES:
+                    # errors are only ever raised at the current token or later
+                    self.lines.discard(self.curr.start)
         self._curr = nxt
         return nxt
 
@@ -112,13 +314,36 @@ class Lexer(Iterator[tokens.Token]):
         self._save()
         return self._next()
 
+    def _take(self, run: _Run) -> str:
+        """
+        Moves past the current character, which mustn't be a newline, and the ones
+        after it which ``run`` matches, which mustn't be either, returning them
+
+        Runs are sliced out of the chunk rather than moved through one character at a
+        time, only going through :meth:`_next` where they reach the end of it.
+        """
+        taken = ""
+        while True:
+            chunk = self._chunk
+            pos = self._chunk_pos
+            end = run(chunk, pos).end()
+            taken += self._curr + chunk[pos:end]
+            if end > pos:
+                self._pos += end - pos
+                self._curr = chunk[end - 1]
+                self._chunk_pos = end
+            self._next()
+            # a run reaching the end of the chunk may go on in the next one
+            if end < len(chunk) or not run(self._curr, 0).end():
+                return taken
+
     def _assert_save_and_next(self, expected: Union[str, Collection[str]]) -> str:
         if isinstance(expected, str):
             fail = self._curr != expected
         else:
             fail = self._curr not in expected
         if fail:
-            raise LexError(
+            raise self._error(
                 f"caught unexpected character {self._curr!r}, expecting {expected!r}"
             )
         return self._save_and_next()
@@ -126,19 +351,13 @@ class Lexer(Iterator[tokens.Token]):
     def _reset(self) -> None:
         self._capture.clear()
 
-    def _emit(self, ttype: Type[tokens.Token], value: Optional[Any] = None) -> None:
-        self._lookahead.append(ttype(value))
-
-    def _error(self, msg: str) -> LexError:
-        return LexError(msg)
-
     _whitespace = frozenset(" \t")
     _separators = frozenset(")]}#,;:`") | _whitespace | frozenset((_END, "\n"))
     _digits = frozenset("0123456789")
     _hex_chars = frozenset("0123456789abcdefABCDEF")
     _octal_chars = frozenset("01234567")
     _binary_chars = frozenset("01")
-    _string_escapes = frozenset("abfnrtv\\'\"")
+    _string_escapes = frozenset(ESCAPES)
     _name_chars = (
         frozenset(
             "~!@$%^&*-_=+|<.>/?abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
@@ -146,102 +365,77 @@ class Lexer(Iterator[tokens.Token]):
         | _digits
     )
 
+    # what _lex does on each character, other than whitespace, newlines, and comments:
+    # emit a single-character token (in place, rather than through _emit), or call the
+    # named scanner; scanners are called by name so wrappers set on an instance (see
+    # ksl.stats) still see the calls
+    _actions: Dict[str, Union[Type[tokens.Token], str]] = {
+        "(": tokens.LParen,
+        ")": tokens.RParen,
+        "{": tokens.LCurly,
+        "}": tokens.RCurly,
+        "[": tokens.LBracket,
+        "]": tokens.RBracket,
+        ":": tokens.Colon,
+        ",": tokens.Comma,
+        ";": tokens.Semicolon,
+        "`": tokens.Tick,
+        "-": "_capture_minus",
+        "0": "_capture_zero",
+        "'": "_capture_string",
+        '"': "_capture_string",
+        _END: "_end",
+    }
+    _actions.update(
+        (c, "_capture_name") for c in _name_chars - _digits - {"-"} | {"\\"}
+    )
+    _actions.update((c, "_capture_number") for c in _digits - {"0"})
+
     def _lex(self) -> None:
+        whitespace = self._whitespace
+        actions = self._actions
         while True:
-            if self._curr in self._whitespace:
+            curr = self._curr
+            if curr in whitespace:
                 self._next()
                 continue
-            if self._curr in ("\n", self._START):
+            if curr == "\n" or curr == self._START:
                 self._next()
-                self._reset()
-                while self._curr in self._whitespace:
-                    self._save_and_next()
+                self._start = self._pos
+                capture = ""
+                if self._curr in whitespace:
+                    capture = self._take(self._runs.whitespace)
                 if self._curr in ("\n", "#", self._END):
                     continue
-                if self.indentation is None:
-                    if len(self._capture) == 0:
-                        return self._emit(tokens.Nodent)
-                    if len(set(self._capture)) > 1:
-                        raise self._error(
-                            "detected indentation is comprised of both spaces and tabs"
-                        )
-                    self.indentation = "".join(self._capture)
-                capture = "".join(self._capture)
-                indents = len(capture) // len(self.indentation)
-                if capture != (self.indentation * indents):
-                    raise self._error("mixing indentation")
-                elif indents > self._indentations[-1]:
-                    self._indentations.append(indents)
-                    return self._emit(tokens.Indent)
-                elif indents < self._indentations[-1]:
-                    while len(self._capture) < self._indentations[-1]:
-                        self._indentations.pop()
-                        self._emit(tokens.Dedent)
-                    return
-                else:
-                    return self._emit(tokens.Nodent)
-            if self._curr == "#":
-                while self._curr != "\n":
-                    self._next()
+                return self._indent(capture)
+            if curr == "#":
+                self._take(self._runs.comment)
                 continue
-            if self._curr == "-":
-                if self._peek() in self._digits:
-                    return self._capture_number()
-                else:
-                    return self._capture_name()
-            if self._curr == "0":
-                if self._peek() in ("x", "X"):
-                    return self._capture_hex()
-                elif self._peek() in ("o", "O"):
-                    return self._capture_octal()
-                elif self._peek() in ("b", "B"):
-                    return self._capture_binary()
-                else:
-                    return self._capture_number()
-            if self._curr in self._digits:
-                self._capture_number()
-                return
-            if self._curr in self._name_chars or self._curr == "\\":
-                self._capture_name()
-                return
-            if self._curr in ('"', "'"):
-                return self._capture_string()
-            if self._curr == "(":
-                self._next()
-                return self._emit(tokens.LParen)
-            if self._curr == ")":
-                self._next()
-                return self._emit(tokens.RParen)
-            if self._curr == "{":
-                self._next()
-                return self._emit(tokens.LCurly)
-            if self._curr == "}":
-                self._next()
-                return self._emit(tokens.RCurly)
-            if self._curr == "[":
-                self._next()
-                return self._emit(tokens.LBracket)
-            if self._curr == "]":
-                self._next()
-                return self._emit(tokens.RBracket)
-            if self._curr == ":":
-                self._next()
-                return self._emit(tokens.Colon)
-            if self._curr == ",":
-                self._next()
-                return self._emit(tokens.Comma)
-            if self._curr == ";":
-                self._next()
-                return self._emit(tokens.Semicolon)
-            if self._curr == "`":
-                self._next()
-                return self._emit(tokens.Tick)
-            if self._curr == self._END:
-                for _ in range(len(self._indentations) - 1):
-                    self._indentations.pop()
-                    self._emit(tokens.Dedent)
-                return self._emit(tokens.End)
-            raise self._error(f"unexpected character {self._curr!r}")
+            start = self._start = self._pos
+            action = actions.get(curr)
+            if action is None:
+                raise self._error(f"unexpected character {curr!r}")
+            if type(action) is str:
+                return getattr(self, cast(str, action))()
+            self._next()
+            ttype = cast(Type[tokens.Token], action)
+            self._lookahead.append(_token(ttype, None, start, start + 1))
+            return
+
+    def _capture_minus(self) -> None:
+        if self._peek() in self._digits:
+            return self._capture_number()
+        return self._capture_name()
+
+    def _capture_zero(self) -> None:
+        prefix = self._peek()
+        if prefix in ("x", "X"):
+            return self._capture_hex()
+        elif prefix in ("o", "O"):
+            return self._capture_octal()
+        elif prefix in ("b", "B"):
+            return self._capture_binary()
+        return self._capture_number()
 
     def _capture_name(self) -> None:
         self._reset()
@@ -255,7 +449,7 @@ class Lexer(Iterator[tokens.Token]):
             raise self._error("found number, not name")
         while True:
             if self._curr in self._name_chars:
-                self._save_and_next()
+                self._capture.append(self._take(self._runs.name))
             elif self._curr == "\\":
                 self._next()
                 self._save_and_next()
@@ -268,19 +462,23 @@ class Lexer(Iterator[tokens.Token]):
     def _capture_string(self) -> None:
         self._reset()
         start_char = self._curr
-        self._assert_save_and_next(("'", '"'))
+        # the opening quote, and the text after it up to any escapes or new lines
+        self._capture.append(self._take(self._runs.plain))
         while self._curr != self._END:
             if self._curr == start_char:
                 self._save_and_next()
-                value = self._parse_string(self._capture)
+                string = "".join(self._capture)
+                value = decode_string(string, 1, len(string) - 1)
                 return self._emit(tokens.String, value)
             elif self._curr == "\\":
                 self._save_and_next()
                 if self._curr not in self._string_escapes:
                     raise self._error(f"Invalid string escape {self._curr}")
                 self._save_and_next()
-            else:
+            elif self._curr == "\n":
                 self._save_and_next()
+            else:
+                self._capture.append(self._take(self._runs.plain))
         raise self._error("unterminated string")
 
     def _capture_number(self) -> None:
@@ -288,39 +486,33 @@ class Lexer(Iterator[tokens.Token]):
         if self._curr == "-":
             self._save_and_next()
         if self._curr not in self._digits:
-            raise LexError("number must have at least one digit")
-        while self._curr in self._digits:
-            self._save_and_next()
+            raise self._error("number must have at least one digit")
+        self._capture.append(self._take(self._runs.digits))
         if self._curr in self._separators:
-            value = self._parse_int(self._capture)
+            value = decode_int("".join(self._capture))
             return self._emit(tokens.Integer, value)
         if self._curr == ".":
-            self._save_and_next()
-            while self._curr in self._digits:
-                self._save_and_next()
+            # the point, and the digits after it
+            self._capture.append(self._take(self._runs.digits))
         if self._curr in ("e", "E"):
             self._save_and_next()
-            if self._curr in self._digits:
-                self._save_and_next()
-            else:
+            if self._curr not in self._digits:
                 raise self._error("exponent must contain at least one digit")
-            while self._curr in self._digits:
-                self._save_and_next()
+            self._capture.append(self._take(self._runs.digits))
         if self._curr in self._separators:
-            value = literal_eval("".join(self._capture))
-            return self._emit(tokens.Float, value)
+            return self._emit(tokens.Float, decode_float("".join(self._capture)))
         raise self._error(f"number contained unexpected character {self._curr!r}")
 
     def _capture_hex(self) -> None:
         self._reset()
         self._assert_save_and_next("0")
         self._assert_save_and_next(("x", "X"))
-        while self._curr in self._hex_chars:
-            self._save_and_next()
+        if self._curr in self._hex_chars:
+            self._capture.append(self._take(self._runs.hex))
         if len(self._capture) == 2:
             raise self._error("hex literal must have at least one hex digit")
         if self._curr in self._separators:
-            value = literal_eval("".join(self._capture))
+            value = decode_based_int("".join(self._capture))
             return self._emit(tokens.Integer, value)
         raise self._error(f"unexpected character in hex literal {self._curr!r}")
 
@@ -328,12 +520,12 @@ class Lexer(Iterator[tokens.Token]):
         self._reset()
         self._assert_save_and_next("0")
         self._assert_save_and_next(("o", "O"))
-        while self._curr in self._octal_chars:
-            self._save_and_next()
+        if self._curr in self._octal_chars:
+            self._capture.append(self._take(self._runs.octal))
         if len(self._capture) == 2:
             raise self._error("octal literal must have at least one octal digit")
         if self._curr in self._separators:
-            value = literal_eval("".join(self._capture))
+            value = decode_based_int("".join(self._capture))
             return self._emit(tokens.Integer, value)
         raise self._error(f"unexpected character in octal literal {self._curr!r}")
 
@@ -341,35 +533,627 @@ class Lexer(Iterator[tokens.Token]):
         self._reset()
         self._assert_save_and_next("0")
         self._assert_save_and_next(("b", "B"))
-        while self._curr in self._binary_chars:
-            self._save_and_next()
+        if self._curr in self._binary_chars:
+            self._capture.append(self._take(self._runs.binary))
         if self._curr in self._separators:
             if len(self._capture) == 2:
                 raise self._error("binary literal must have at least one binary digit")
-            value = literal_eval("".join(self._capture))
+            value = decode_based_int("".join(self._capture))
             return self._emit(tokens.Integer, value)
         raise self._error(f"unexpected character in binary literal {self._curr!r}")
 
-    @staticmethod
-    def _parse_string(capture: List[str]) -> str:
-        # because strings can cross multiple lines we turn them into Python long strings
-        # so literal_eval doesn't complain
-        s = capture[0]
-        string = "".join(capture)
-        return cast(str, literal_eval(f"{s}{s}{string}{s}{s}"))
+
+class _Runs(NamedTuple):
+    """Regexes for the runs of characters :class:`BufferLexer` scans over"""
+
+    whitespace: _Run
+    digits: _Run
+    hex: _Run
+    octal: _Run
+    binary: _Run
+    name: _Run
+    comment: _Run
+    strings: Dict[Any, _Run]
+    # characters which don't start strings, comments, escapes, or new lines
+    plain: _Run
+
+    @classmethod
+    def compile(cls, binary: bool) -> "_Runs":
+        def run(pattern: str) -> _Run:
+            # every pattern can match the empty string, so matching never fails
+            return cast(_Run, re.compile(pattern.encode() if binary else pattern).match)
+
+        def char_run(chars: Collection[str]) -> _Run:
+            return run("[" + "".join(re.escape(c) for c in sorted(chars)) + "]*")
+
+        return cls(
+            whitespace=char_run(Lexer._whitespace),
+            digits=char_run(Lexer._digits),
+            hex=char_run(Lexer._hex_chars),
+            octal=char_run(Lexer._octal_chars),
+            binary=char_run(Lexer._binary_chars),
+            name=char_run(Lexer._name_chars),
+            comment=run(r"[^\r\n]*" if binary else r"[^\n]*"),
+            strings={
+                q.encode() if binary else q: run(f"[^{q}\\\\]*") for q in ("'", '"')
+            },
+            plain=run(r"[^\r\n'\"#\\]*" if binary else r"[^\n'\"#\\]*"),
+        )
+
+
+def _both(chars: Collection[str]) -> FrozenSet[Union[str, bytes]]:
+    """Returns the set of ``chars`` as both 1-character strings and 1-byte strings"""
+    return frozenset(chars) | frozenset(c.encode() for c in chars)
+
+
+class BufferLexer(BaseLexer):
+    """
+    Lexer which works on the whole source as a single buffer.
+
+    Token boundaries are found with compiled regexes and token values are sliced
+    straight out of the buffer. Emits exactly the same tokens and errors as the
+    reference :class:`Lexer`.
+
+    When no ``source`` is given, the file at ``path`` is memory-mapped and its UTF-8
+    bytes are lexed in place; only name and string values are decoded. Line endings
+    are treated as if the file were read in text mode, so ``"\\r\\n"`` and ``"\\r"``
+    act as ``"\\n"``. The map is closed by :meth:`close`, or on leaving a ``with``
+    block, which the parse functions do once they're done with the file.
+    """
+
+    def __init__(
+        self,
+        *,
+        source: Optional[Union[str, TextIO]],
+        path: Path,
+        indentation: Optional[str] = None,
+    ):
+        super().__init__(source=source, path=path, indentation=indentation)
+        self._buffer: Buffer
+        if source is None:
+            self._buffer = self._map(path)
+        elif isinstance(source, str):
+            self._buffer = source
+        else:
+            self._buffer = source.read()
+        self._runs = self._bytes_runs if self._is_binary() else self._str_runs
+        self.lines = LineIndex(self._buffer)
+        self._line_start = True
+        if isinstance(self._buffer, mmap.mmap):
+            # the file may change or go away before a branch is used
+            self._branches = False
+
+    _branches = True
+
+    def close(self) -> None:
+        buffer = self._buffer
+        if isinstance(buffer, mmap.mmap) and not buffer.closed:
+            self.lines._close()
+            buffer.close()
 
     @staticmethod
-    def _parse_int(capture: List[str]) -> int:
-        # skip negative if present
-        if capture[0] == "-":
-            negative = "-"
-            capture = capture[1:]
+    def _map(path: Path) -> Buffer:
+        with open(path, "rb") as f:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files can't be mapped
+                return b""
+
+    def _resume(self, pos: int) -> None:
+        """
+        Starts lexing from ``pos`` rather than where the lexer is
+
+        ``pos`` must be the start of a line outside of any string, where the
+        indentation stack is empty, as it is before a top-level block. Tokens
+        already lexed ahead are dropped.
+        """
+        self._pos = pos
+        self._line_start = True
+        self._indentations[:] = [0]
+        self._lookahead.clear()
+
+    def _skip_line(self, offset: int) -> bool:
+        self._pos = self._runs.comment(self._buffer, offset).end()
+        self._line_start = False
+        return True
+
+    def _is_binary(self) -> bool:
+        return not isinstance(self._buffer, str)
+
+    _str_runs = _Runs.compile(binary=False)
+    _bytes_runs = _Runs.compile(binary=True)
+
+    _newlines = frozenset(("\n", b"\n", b"\r"))
+    _comments = _both("#")
+    _separators = _both(Lexer._separators) | {b"\r"}
+    _digits = _both(Lexer._digits)
+    _name_chars = _both(Lexer._name_chars)
+    _name_prefixes = _both("-.")
+    _string_escapes = _both(Lexer._string_escapes)
+    _quotes = _both("'\"")
+    _backslash = _both("\\")
+    _dot = _both(".")
+    _minus = _both("-")
+    _zero = _both("0")
+    _hex_prefixes = _both("xX")
+    _octal_prefixes = _both("oO")
+    _binary_prefixes = _both("bB")
+    _exponents = _both("eE")
+    _punctuation: Dict[Union[str, bytes], Type[tokens.Token]] = {
+        key: ttype
+        for char, ttype in (
+            ("(", tokens.LParen),
+            (")", tokens.RParen),
+            ("{", tokens.LCurly),
+            ("}", tokens.RCurly),
+            ("[", tokens.LBracket),
+            ("]", tokens.RBracket),
+            (":", tokens.Colon),
+            (",", tokens.Comma),
+            (";", tokens.Semicolon),
+            ("`", tokens.Tick),
+        )
+        for key in (char, char.encode())
+    }
+
+    def _text(self, value: Union[str, bytes]) -> str:
+        """Decodes a slice of the buffer"""
+        if isinstance(value, str):
+            return value
+        text = value.decode("utf-8")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def _char_end(self, buf: Buffer, pos: int) -> int:
+        """Finds the end of the (possibly multi-byte) character starting at ``pos``"""
+        if isinstance(buf, str):
+            return min(pos + 1, len(buf))
+        lead = buf[pos : pos + 2]
+        if lead == b"\r\n":
+            size = 2
+        elif not lead or lead[0] < 0xC0:
+            size = 1
+        elif lead[0] < 0xE0:
+            size = 2
+        elif lead[0] < 0xF0:
+            size = 3
         else:
-            negative = ""
-        fixed_string = "".join(
-            (negative, "".join(capture[:-1]).lstrip("0"), capture[-1])
+            size = 4
+        return min(pos + size, len(buf))
+
+    def _char(self, buf: Buffer, pos: int) -> str:
+        return self._text(buf[pos : self._char_end(buf, pos)])
+
+    def _lex(self) -> None:
+        buf = self._buffer
+        pos = self._pos
+        runs = self._runs
+        while True:
+            if self._line_start:
+                end = runs.whitespace(buf, pos).end()
+                c = buf[end : end + 1]
+                if c in self._newlines:
+                    pos = end + 1
+                    continue
+                if c in self._comments:
+                    pos = runs.comment(buf, end).end()
+                    continue
+                if c:
+                    self._line_start = False
+                    self._start = pos
+                    self._pos = end
+                    return self._indent(self._text(buf[pos:end]))
+                pos = end
+            pos = runs.whitespace(buf, pos).end()
+            c = buf[pos : pos + 1]
+            if c in self._newlines:
+                pos += 1
+                self._line_start = True
+                continue
+            if c in self._comments:
+                pos = runs.comment(buf, pos).end()
+                continue
+            self._start = self._pos = pos
+            ttype = self._punctuation.get(c)
+            if ttype is not None:
+                self._pos = pos + 1
+                return self._emit(ttype)
+            if c in self._minus:
+                if buf[pos + 1 : pos + 2] in self._digits:
+                    return self._scan_number(buf, pos)
+                else:
+                    return self._scan_name(buf, pos)
+            if c in self._zero:
+                prefix = buf[pos + 1 : pos + 2]
+                if prefix in self._hex_prefixes:
+                    return self._scan_hex(buf, pos)
+                elif prefix in self._octal_prefixes:
+                    return self._scan_octal(buf, pos)
+                elif prefix in self._binary_prefixes:
+                    return self._scan_binary(buf, pos)
+                else:
+                    return self._scan_number(buf, pos)
+            if c in self._digits:
+                return self._scan_number(buf, pos)
+            if c in self._name_chars or c in self._backslash:
+                return self._scan_name(buf, pos)
+            if c in self._quotes:
+                return self._scan_string(buf, pos)
+            if not c:
+                return self._end()
+            raise self._error(f"unexpected character {self._char(buf, pos)!r}", pos)
+
+    def _skip_body(self) -> int:
+        """
+        Like :meth:`BaseLexer._skip_body`, but only looks for the end of the body,
+        as the first line indented less, so the body isn't checked for errors
+        """
+        if self._lookahead:
+            return super()._skip_body()
+        buf = self._buffer
+        runs = self._runs
+        trailing: Any = self._trailing_bytes if self._is_binary() else self._trailing
+        assert self.indentation is not None
+        width = self._indentations[-1] * len(self.indentation)
+        pos = self._pos
+        end = pos
+        while True:
+            start = pos
+            pos = runs.plain(buf, pos).end()
+            content = len(buf[start:pos].rstrip(trailing))
+            if content:
+                end = start + content
+            c = buf[pos : pos + 1]
+            if c in self._quotes:
+                run = runs.strings[c]
+                pos += 1
+                while True:
+                    pos = run(buf, pos).end()
+                    if buf[pos : pos + 1] in self._backslash:
+                        pos += 2
+                    else:
+                        break
+                # leaves unterminated strings to be found when the body is parsed
+                pos = end = min(pos + 1, len(buf))
+                continue
+            if c in self._backslash:
+                pos = end = min(pos + 2, len(buf))
+                continue
+            if c in self._comments:
+                pos = runs.comment(buf, pos).end()
+                c = buf[pos : pos + 1]
+            if not c:
+                break
+            # find the next line which isn't blank or a comment
+            line = pos + 1
+            pos = runs.whitespace(buf, line).end()
+            c = buf[pos : pos + 1]
+            while c in self._newlines or c in self._comments:
+                if c in self._comments:
+                    pos = runs.comment(buf, pos).end()
+                line = pos + 1
+                pos = runs.whitespace(buf, line).end()
+                c = buf[pos : pos + 1]
+            if not c:
+                break
+            if pos - line < width:
+                pos = line
+                break
+        self._pos = pos
+        self._line_start = True
+        self.next()
+        return end
+
+    # characters after the last token of a line
+    _trailing = " \t;:"
+    _trailing_bytes = _trailing.encode()
+
+    def _scan_name(self, buf: Buffer, pos: int) -> None:
+        start = pos
+        if buf[pos : pos + 1] in self._name_prefixes:
+            pos += 1
+            if buf[pos : pos + 1] in self._dot:
+                pos += 1
+            if buf[pos : pos + 1] in self._separators:
+                self._pos = pos
+                return self._emit(tokens.Name, self._text(buf[start:pos]))
+        if buf[pos : pos + 1] in self._digits:
+            raise self._error("found number, not name", pos)
+        parts = []
+        while True:
+            pos = self._runs.name(buf, pos).end()
+            c = buf[pos : pos + 1]
+            if c in self._backslash:
+                # drop the backslash, the escaped character starts the next run
+                parts.append(self._text(buf[start:pos]))
+                start = pos + 1
+                pos = self._char_end(buf, start)
+            elif c in self._separators:
+                parts.append(self._text(buf[start:pos]))
+                self._pos = pos
+                return self._emit(tokens.Name, "".join(parts))
+            else:
+                char = self._char(buf, pos)
+                raise self._error(f"unexpected name character {char!r}", pos)
+
+    def _scan_string(self, buf: Buffer, pos: int) -> None:
+        start = pos
+        quote = buf[pos : pos + 1]
+        run = self._runs.strings[quote]
+        pos += 1
+        while True:
+            pos = run(buf, pos).end()
+            c = buf[pos : pos + 1]
+            if c == quote:
+                self._pos = pos + 1
+                value = decode_string(buf, start + 1, pos)
+                return self._emit(tokens.String, value)
+            elif c in self._backslash:
+                if buf[pos + 1 : pos + 2] not in self._string_escapes:
+                    escape = self._char(buf, pos + 1)
+                    raise self._error(f"Invalid string escape {escape}", pos + 1)
+                pos += 2
+            else:
+                raise self._error("unterminated string", pos)
+
+    def _scan_number(self, buf: Buffer, pos: int) -> None:
+        start = pos
+        if buf[pos : pos + 1] in self._minus:
+            pos += 1
+        end = self._runs.digits(buf, pos).end()
+        if end == pos:
+            raise self._error("number must have at least one digit", pos)
+        c = buf[end : end + 1]
+        if c in self._separators:
+            self._pos = end
+            value = decode_int(buf[start:end])
+            return self._emit(tokens.Integer, value)
+        if c in self._dot:
+            end = self._runs.digits(buf, end + 1).end()
+            c = buf[end : end + 1]
+        if c in self._exponents:
+            pos = end + 1
+            end = self._runs.digits(buf, pos).end()
+            if end == pos:
+                raise self._error("exponent must contain at least one digit", pos)
+            c = buf[end : end + 1]
+        if c in self._separators:
+            self._pos = end
+            return self._emit(tokens.Float, decode_float(buf[start:end]))
+        raise self._error(
+            f"number contained unexpected character {self._char(buf, end)!r}", end
+        )
+
+    def _scan_hex(self, buf: Buffer, pos: int) -> None:
+        end = self._runs.hex(buf, pos + 2).end()
+        if end == pos + 2:
+            raise self._error("hex literal must have at least one hex digit", end)
+        if buf[end : end + 1] in self._separators:
+            self._pos = end
+            value = decode_based_int(buf[pos:end])
+            return self._emit(tokens.Integer, value)
+        raise self._error(
+            f"unexpected character in hex literal {self._char(buf, end)!r}", end
+        )
+
+    def _scan_octal(self, buf: Buffer, pos: int) -> None:
+        end = self._runs.octal(buf, pos + 2).end()
+        if end == pos + 2:
+            raise self._error("octal literal must have at least one octal digit", end)
+        if buf[end : end + 1] in self._separators:
+            self._pos = end
+            value = decode_based_int(buf[pos:end])
+            return self._emit(tokens.Integer, value)
+        raise self._error(
+            f"unexpected character in octal literal {self._char(buf, end)!r}", end
+        )
+
+    def _scan_binary(self, buf: Buffer, pos: int) -> None:
+        end = self._runs.binary(buf, pos + 2).end()
+        if buf[end : end + 1] in self._separators:
+            if end == pos + 2:
+                raise self._error(
+                    "binary literal must have at least one binary digit", end
+                )
+            self._pos = end
+            value = decode_based_int(buf[pos:end])
+            return self._emit(tokens.Integer, value)
+        raise self._error(
+            f"unexpected character in binary literal {self._char(buf, end)!r}", end
+        )
+
+
+_line_ends = re.compile("\n")
+
+
+class _ChunkLexer(BufferLexer):
+    """
+    BufferLexer over a window of a stream, which is fed the text as it arrives.
+
+    A token is only taken once the text after it has arrived, since that's what ends
+    it; a lex which runs into the end of the window is undone, to be redone once more
+    text is fed. The window only holds the text from the last token on, so offsets in
+    it are relative to ``_base``.
+    """
+
+    _branches = False
+
+    def __init__(self, *, path: Path, indentation: Optional[str] = None):
+        super().__init__(source="", path=path, indentation=indentation)
+        self._base = 0
+        self._eof = False
+        self._line_starts = [0]
+        self.lines = LineIndex(starts=self._line_starts)
+
+    def _feed(self, text: str, eof: bool = False) -> None:
+        buffer = cast(str, self._buffer)
+        if self._pos:
+            buffer = buffer[self._pos :]
+            self._base += self._pos
+            self._pos = 0
+        end = self._base + len(buffer)
+        self._line_starts.extend(end + m.end() for m in _line_ends.finditer(text))
+        self._buffer = buffer + text
+        self._eof = eof
+
+    def _skip_line(self, offset: int) -> bool:
+        # the rest of the line may not have been fed yet
+        return False
+
+    def _pending(self) -> int:
+        """Amount of text fed but not lexed yet"""
+        return len(self._buffer) - self._pos
+
+    def _lex(self) -> None:
+        if not self._lex_fed():
+            raise RuntimeError("lexed past the end of the text fed")
+
+    def _lex_fed(self) -> bool:
+        """Lexes at least one more token if the text fed so far is enough to"""
+        state = (
+            self._pos,
+            self._start,
+            self._line_start,
+            self.indentation,
+            list(self._indentations),
+            len(self._lookahead),
+        )
+        try:
+            super()._lex()
+        except LexError as e:
+            # left as it was, so lexing again raises again
+            self._restore(state)
+            if self._eof or cast(int, e.offset) < self._base + len(self._buffer):
+                raise
+            return False
+        if self._eof or (
+            self._pos < len(self._buffer)
+            and type(self._lookahead[-1]) is not tokens.End
+        ):
+            return True
+        self._restore(state)
+        return False
+
+    def _restore(self, state: Tuple[Any, ...]) -> None:
+        pos, self._start, self._line_start, self.indentation, indentations, n = state
+        self._pos = pos
+        self._indentations[:] = indentations
+        while len(self._lookahead) > n:
+            self._lookahead.pop()
+
+    def _emit(self, ttype: Type[tokens.Token], value: Optional[Any] = None) -> None:
+        base = self._base
+        self._lookahead.append(
+            _token(ttype, value, self._start + base, self._pos + base)
+        )
+
+    def _error(self, msg: str, offset: Optional[int] = None) -> LexError:
+        if offset is None:
+            offset = self._pos
+        return super()._error(msg, offset + self._base)
+
+
+class AsyncLexer:
+    """
+    Lexes a stream read from an :class:`asyncio.StreamReader`.
+
+    The stream is read a chunk at a time and decoded as UTF-8, with line endings
+    translated as for a file read in text mode. Lexing waits for more input wherever
+    a chunk ends, even in the middle of a token, so it only ever holds the text of
+    the token being lexed. Emits the same tokens and errors as :class:`Lexer`.
+
+    Only the lines from the current token on are kept for error locations.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        path: Path = "",
+        indentation: Optional[str] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.path = path
+        self._reader = reader
+        self._chunk_size = chunk_size
+        self._decoder = IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(), translate=True
         )
-        return cast(int, literal_eval(fixed_string))
+        self._lexer = _ChunkLexer(path=path, indentation=indentation)
+
+    @property
+    def curr(self) -> tokens.Token:
+        return self._lexer.curr
+
+    @property
+    def indentation(self) -> Optional[str]:
+        return self._lexer.indentation
+
+    @property
+    def lines(self) -> LineIndex:
+        return self._lexer.lines
+
+    async def next(self) -> tokens.Token:
+        lexer = self._lexer
+        if not lexer._lookahead and type(lexer.curr) is not tokens.End:
+            await self._lex()
+        token = lexer.next()
+        lexer.lines.discard(token.start)
+        return token
+
+    def __aiter__(self) -> "AsyncLexer":
+        return self
+
+    async def __anext__(self) -> tokens.Token:
+        token = await self.next()
+        if type(token) is tokens.End:
+            raise StopAsyncIteration
+        return token
+
+    async def _lex(self) -> None:
+        """Lexes at least one more token, reading as much input as that takes"""
+        lexer = self._lexer
+        while not lexer._lex_fed():
+            # read at least as much again as is waiting, so lexing a long token
+            # doesn't start over once for every chunk of it
+            wanted = max(self._chunk_size, lexer._pending())
+            while wanted > 0 and not lexer._eof:
+                wanted -= await self._read(wanted)
+
+    async def _read(self, size: int) -> int:
+        data = await self._reader.read(size)
+        text = self._decoder.decode(data, final=not data)
+        self._lexer._feed(text, eof=not data)
+        return len(text) if data else 0
+
+    async def _lex_block(self) -> None:
+        """
+        Lexes ahead to the token the next top-level block starts at, or the End
+
+        That is a Nodent, or the first token after the Dedents, at the top level.
+        """
+        lexer = self._lexer
+        lookahead = lexer._lookahead
+        while True:
+            try:
+                await self._lex()
+            except LexError:
+                # raised again once parsing gets here, after any errors before it
+                return
+            last = type(lookahead[-1])
+            if last is tokens.End:
+                return
+            if len(lexer._indentations) > 1:
+                continue
+            if last is tokens.Nodent:
+                return
+            if (
+                last is not tokens.Dedent
+                and len(lookahead) > 1
+                and type(lookahead[-2]) is tokens.Dedent
+            ):
+                return
 
 
 if __name__ == "__main__":  # pragma: no cover
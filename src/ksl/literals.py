@@ -0,0 +1,122 @@
+"""
+Decoding of literal text into values.
+
+The lexers check the syntax of a literal before decoding it, so these functions
+only ever see well formed text. They give the same values as :func:`ast.literal_eval`
+without going through the Python parser. Numeric text may be ``str``, or ``bytes``
+sliced from a mapped file, since numeric literals are always ASCII. Strings are
+decoded straight out of the lexed buffer.
+"""
+
+import re
+from typing import Dict, TypeVar, Union
+
+from ksl.types import Buffer
+
+Text = Union[str, bytes]
+
+# the characters which may follow a backslash in a string, and what they stand for
+ESCAPES = {
+    "a": "\a",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+    "\\": "\\",
+    "'": "'",
+    '"': '"',
+}
+
+# looking for two characters is faster through a regex than with str.find
+_escaped_backslash = re.compile(r"\\\\")
+_escaped_letter = re.compile(r"\\[abfnrtv]")
+# once the other escapes are replaced, escaped quotes are left, which only need
+# their backslash dropped
+_unquote = str.maketrans({"\\": None})
+
+_V = TypeVar("_V", int, float)
+
+# short literals like "0", "1", and "-1" repeat a lot in data-heavy modules, so their
+# values are cached; the cache stops growing once full rather than evicting
+_CACHED_LENGTH = 8
+_CACHE_SIZE = 4096
+_ints: Dict[Text, int] = {}
+_based_ints: Dict[Text, int] = {}
+_floats: Dict[Text, float] = {}
+
+
+def _cache(cache: Dict[Text, _V], text: Text, value: _V) -> _V:
+    if len(text) <= _CACHED_LENGTH and len(cache) < _CACHE_SIZE:
+        cache[text] = value
+    return value
+
+
+def decode_int(text: Text) -> int:
+    """Decodes a decimal integer literal, which may be negative or have leading zeros"""
+    value = _ints.get(text)
+    if value is None:
+        return _cache(_ints, text, int(text, 10))
+    return value
+
+
+def decode_based_int(text: Text) -> int:
+    """Decodes a hex (``0x``), octal (``0o``), or binary (``0b``) integer literal"""
+    value = _based_ints.get(text)
+    if value is None:
+        return _cache(_based_ints, text, int(text, 0))
+    return value
+
+
+def decode_float(text: Text) -> float:
+    """Decodes a float literal, with a fraction, an exponent, or both"""
+    value = _floats.get(text)
+    if value is None:
+        return _cache(_floats, text, float(text))
+    return value
+
+
+def decode_string(buf: Buffer, start: int, end: int) -> str:
+    """
+    Decodes the body of a string literal, found at ``buf[start:end]`` without quotes.
+
+    The body must only contain the escapes in :data:`ESCAPES`. Line endings are all
+    read as ``"\\n"``, like Python does for its multi-line strings. The body is
+    sliced (or for mapped files, decoded) straight from the buffer, split on its
+    escaped backslashes, and the other escapes replaced in each piece a kind at a
+    time, so the work is done in C rather than once per escape.
+    """
+    if isinstance(buf, str):
+        text = buf[start:end]
+    else:
+        with memoryview(buf) as view:
+            text = str(view[start:end], "utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "\\" not in text:
+        return text
+    if not _escaped_backslash.search(text):
+        return _unescape(text)
+    if "\0" not in text:
+        # all the pieces are handled in one go, joined by a character they don't have
+        return _unescape(text.replace("\\\\", "\0")).replace("\0", "\\")
+    return "\\".join(
+        [_unescape(piece) if "\\" in piece else piece for piece in text.split("\\\\")]
+    )
+
+
+def _unescape(text: str) -> str:
+    """Replaces the escapes in ``text``, which has no escaped backslashes"""
+    # every backslash left starts an escape, and none are put back, so each kind of
+    # escaped letter can be replaced all at once, when the first of it is found
+    match = _escaped_letter.search(text)
+    while match:
+        start = match.start()
+        text = text.replace(text[start : start + 2], ESCAPES[text[start + 1]])
+        if "\\" not in text:
+            return text
+        match = _escaped_letter.search(text, start)
+    if "\\" in text:
+        text = text.translate(_unquote)
+    return text
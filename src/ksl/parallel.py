@@ -0,0 +1,228 @@
+import mmap
+import multiprocessing
+import os
+import re
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Match,
+    NamedTuple,
+    Optional,
+    Tuple,
+    cast,
+)
+
+import ksl.ast as ast
+import ksl.tokens as tokens
+from ksl.lex import BufferLexer
+from ksl.parse import Parser, parse_module
+from ksl.serialize import dump, load
+from ksl.source import SourceError
+from ksl.types import Buffer, Path
+
+# errors which are raised for a chunk of a module, as parse_module would raise them
+_FILE_ERRORS = (SourceError, OSError, UnicodeError)
+
+
+class ParseResult(NamedTuple):
+    """Outcome of parsing one file; either ``module`` or ``error`` is set"""
+
+    path: Path
+    module: Optional[ast.Module]
+    error: Optional[Exception]
+
+
+def _parse_file(
+    task: Tuple[Path, Optional[str]],
+) -> Tuple[Path, Optional[bytes], Optional[Exception]]:
+    path, indentation = task
+    try:
+        module = parse_module(path=path, indentation=indentation)
+        # an encoded module is far smaller and quicker to send back than a pickled
+        # one
+        return path, dump(module), None
+    except Exception as e:
+        return path, None, e
+
+
+def _size(path: Path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def parse_many(
+    paths: Iterable[Path],
+    workers: Optional[int] = None,
+    indentation: Optional[str] = None,
+) -> Iterator[ParseResult]:
+    """
+    Parses many files across a pool of ``workers`` processes.
+
+    Results are yielded as files finish, not in the order given. Files are handed out
+    largest first so the work stays balanced to the end. A file which fails to read or
+    parse, with any exception, even one like a :class:`RecursionError` from nesting too
+    deep, gives a result with its error, and the rest of the batch carries on.
+
+    With one worker, or a single file, files are parsed in this process in order.
+    """
+    tasks = [(path, indentation) for path in paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        for path, indentation in tasks:
+            try:
+                module = parse_module(path=path, indentation=indentation)
+            except Exception as e:
+                yield ParseResult(path, None, e)
+            else:
+                yield ParseResult(path, module, None)
+        return
+    tasks.sort(key=lambda task: _size(task[0]), reverse=True)
+    with multiprocessing.Pool(workers) as pool:
+        for path, data, error in pool.imap_unordered(_parse_file, tasks):
+            if data is None:
+                yield ParseResult(path, None, error)
+            else:
+                yield ParseResult(path, cast(ast.Module, load(data)), None)
+
+
+# things which end a string at the start of a line, and line starts; the indentation
+# of a line is captured, which is empty for the start of a top-level block
+_line_starts_pattern = r"""
+    '(?:[^'\\]|\\.)*'?
+    | "(?:[^"\\]|\\.)*"?
+    | \#[^\r\n]*
+    | \\.
+    | (?:\r\n?|\n)([ \t]*)(?=[^\s\#])
+    | ^([ \t]*)(?=[^\s\#])
+"""
+_str_line_starts = re.compile(_line_starts_pattern, re.DOTALL | re.VERBOSE)
+_bytes_line_starts = re.compile(_line_starts_pattern.encode(), re.DOTALL | re.VERBOSE)
+
+
+def _split(
+    buf: Buffer, chunk_size: int, indentation: Optional[str]
+) -> List[Tuple[int, int, Optional[str]]]:
+    """
+    Splits a source into chunks of whole top-level blocks of about ``chunk_size``,
+    each with the indentation known to the lexer at its start
+    """
+    matches: Iterator[Match[Any]]
+    if isinstance(buf, str):
+        matches = _str_line_starts.finditer(buf)
+    else:
+        matches = _bytes_line_starts.finditer(buf)
+    starts = [0]
+    first_block = True
+    detected: Optional[str] = None
+    detected_at = 0
+    for match in matches:
+        capture = match.group(1) if match.group(1) is not None else match.group(2)
+        if capture is None:
+            continue
+        if capture:
+            # the lexer takes the indentation from the first indented line
+            if detected is None:
+                detected = capture if isinstance(capture, str) else capture.decode()
+                detected_at = match.start()
+        elif first_block:
+            # the first chunk holds the first block, after any leading comments
+            first_block = False
+        elif match.end() - starts[-1] >= chunk_size:
+            starts.append(match.end())
+
+    chunks: List[Tuple[int, int, Optional[str]]] = []
+    for start, end in zip(starts, starts[1:] + [len(buf)]):
+        if indentation is None and detected is not None and detected_at < start:
+            chunks.append((start, end, detected))
+        else:
+            chunks.append((start, end, indentation))
+    return chunks
+
+
+# the source being parsed by a worker of parse_module_parallel
+_chunk_source: Tuple[Optional[str], Path] = (None, "")
+
+
+def _init_chunks(source: Optional[str], path: Path) -> None:
+    global _chunk_source
+    _chunk_source = (source, path)
+
+
+def _parse_chunk(
+    task: Tuple[int, int, Optional[str]],
+) -> Tuple[Optional[bytes], Optional[int], Optional[Exception]]:
+    """
+    Parses the top-level blocks starting in ``source[start:end]``
+
+    Returns the encoded blocks, and the end of the module if it was reached.
+    """
+    start, end, indentation = task
+    source, path = _chunk_source
+    blocks: List[ast.Node] = []
+    try:
+        parser = Parser(source, path, indentation)
+        lexer = cast(BufferLexer, parser.lexer)
+        with lexer:
+            lexer._resume(start)
+            parser._assert(tokens.Start)
+            for block in parser._iter_blocks():
+                blocks.append(block)
+                if type(lexer.curr) is not tokens.End and lexer.curr.start >= end:
+                    break
+    except _FILE_ERRORS as e:
+        return None, None, e
+    module_end = lexer.curr.start if type(lexer.curr) is tokens.End else None
+    return dump(ast.Module(blocks)), module_end, None
+
+
+def parse_module_parallel(
+    source: Optional[str] = None,
+    path: Path = "",
+    indentation: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> ast.Module:
+    """
+    Parses a single large module across a pool of ``workers`` processes.
+
+    The source is split at the starts of top-level blocks into chunks of about
+    ``chunk_size``, which are parsed in parallel, each starting with the indentation
+    known at that point, and joined back into one module. The result, and any error,
+    is the same as from :func:`ksl.parse.parse_module`.
+
+    As there, if no ``source`` is given the file at ``path`` is memory-mapped, here
+    once by each worker.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks: List[Tuple[int, int, Optional[str]]] = []
+    if workers > 1:
+        buf = BufferLexer._map(path) if source is None else source
+        try:
+            if chunk_size is None:
+                chunk_size = max(len(buf) // (workers * 4), 1 << 16)
+            chunks = _split(buf, chunk_size, indentation)
+        finally:
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+    if len(chunks) <= 1:
+        return parse_module(source, path, indentation)
+
+    blocks: List[ast.Node] = []
+    with multiprocessing.Pool(
+        workers, initializer=_init_chunks, initargs=(source, path)
+    ) as pool:
+        for data, module_end, error in pool.imap(_parse_chunk, chunks):
+            if error is not None:
+                raise error
+            blocks.extend(cast(ast.Module, load(cast(bytes, data))))
+    module = ast.Module(blocks)
+    module.start = 0
+    module.end = cast(int, module_end)
+    return module
@@ -1,17 +1,57 @@
+import asyncio
+import functools
 import typing
 
 import ksl.ast as ast
 import ksl.tokens as tokens
-from ksl.lex import Lexer
+from ksl.lex import CHUNK_SIZE, AsyncLexer, BaseLexer, BufferLexer, Lexer, LexError
+from ksl.source import SourceError
+from ksl.symbols import SymbolTable
+from ksl.table import TableLexer, TokenTable
 from ksl.types import Path
 
+Source = typing.Optional[typing.Union[str, typing.TextIO, TokenTable]]
 
-class ParseError(Exception):
+_N = typing.TypeVar("_N", bound=ast.Node)
+
+
+def _bits(*ttypes: typing.Type[tokens.Token]) -> int:
+    """Set of token kinds, as a bitset"""
+    bits = 0
+    for ttype in ttypes:
+        bits |= 1 << ttype.kind
+    return bits
+
+
+# token kinds the parser checks for
+_INDENT = tokens.Indent.kind
+_DEDENT = tokens.Dedent.kind
+_END = tokens.End.kind
+_NAME = tokens.Name.kind
+_RPAREN = tokens.RParen.kind
+_RCURLY = tokens.RCurly.kind
+_RBRACKET = tokens.RBracket.kind
+_COLON = tokens.Colon.kind
+_COMMA = tokens.Comma.kind
+_SEMICOLON = tokens.Semicolon.kind
+_NODENT = tokens.Nodent.kind
+
+# tokens which end a block, and the sub-expressions of its first line
+_BLOCK_ENDS = _bits(tokens.Nodent, tokens.Dedent, tokens.End)
+_LINE_ENDS = _BLOCK_ENDS | _bits(tokens.Semicolon, tokens.Colon, tokens.Indent)
+_LITERALS = _bits(tokens.String, tokens.Integer, tokens.Float)
+# tokens recovery stops skipping at, and the brackets it keeps count of on the way
+_SYNCS = _BLOCK_ENDS | _bits(tokens.Indent)
+_OPENERS = _bits(tokens.LParen, tokens.LBracket, tokens.LCurly)
+_CLOSERS = _bits(tokens.RParen, tokens.RBracket, tokens.RCurly)
+
+
+class ParseError(SourceError):
     """Code does not contain a valid parse"""
 
 
 def parse_expr(
-    source: typing.Union[str, typing.TextIO],
+    source: Source = None,
     path: Path = "",
     indentation: typing.Optional[str] = None,
 ) -> ast.Node:
@@ -19,7 +59,7 @@ def parse_expr(
 
 
 def parse_block(
-    source: typing.Union[str, typing.TextIO],
+    source: Source = None,
     path: Path = "",
     indentation: typing.Optional[str] = None,
 ) -> ast.Node:
@@ -27,140 +67,343 @@ def parse_block(
 
 
 def parse_module(
-    source: typing.Union[str, typing.TextIO],
+    source: Source = None,
     path: Path = "",
     indentation: typing.Optional[str] = None,
-) -> ast.Node:
-    return Parser(source, path, indentation).parse_module()
+    symbols: typing.Optional[SymbolTable] = None,
+    lazy: bool = False,
+    errors: typing.Optional[typing.List[SourceError]] = None,
+) -> ast.Module:
+    """
+    Parses a whole module.
+
+    If no ``source`` is given, the file at ``path`` is memory-mapped and lexed in
+    place rather than read into memory. ``source`` may also be an already lexed
+    :class:`ksl.table.TokenTable`, which is read in place, see :class:`TableParser`,
+    unless ``lazy`` is given. Names and literals are interned in ``symbols``, if
+    given, see :mod:`ksl.symbols`. If ``lazy``, paragraph bodies are only parsed when
+    first used, see :class:`Parser`.
+
+    If a list is given as ``errors``, errors are added to it rather than raised, and
+    the module is parsed past them, with the parts which couldn't be parsed left as
+    :class:`ksl.ast.Error` nodes; see :class:`RecoveringParser`. Bodies are then
+    always parsed eagerly.
+    """
+    if errors is not None:
+        parser = RecoveringParser(source, path, indentation, symbols=symbols)
+        module = parser.parse_module()
+        errors.extend(parser.errors)
+        return module
+    if isinstance(source, TokenTable) and not lazy:
+        return TableParser(source, path, symbols).parse_module()
+    return Parser(source, path, indentation, symbols=symbols, lazy=lazy).parse_module()
+
+
+def iter_module(
+    source: Source = None,
+    path: Path = "",
+    indentation: typing.Optional[str] = None,
+    symbols: typing.Optional[SymbolTable] = None,
+) -> typing.Iterator[ast.Node]:
+    """
+    Parses a module one top-level block at a time.
+
+    Each block is yielded as soon as it is parsed and nothing of it is kept after, so
+    memory use stays flat however large the module is. Text streams are lexed as they
+    are read rather than read whole first.
+    """
+    if isinstance(source, TokenTable):
+        return TableParser(source, path, symbols).iter_module()
+    lexer_type: typing.Type[BaseLexer] = BufferLexer
+    if source is not None and not isinstance(source, (str, TokenTable)):
+        lexer_type = Lexer
+    return Parser(source, path, indentation, lexer_type, symbols).iter_module()
+
+
+async def iter_module_async(
+    reader: asyncio.StreamReader,
+    path: Path = "",
+    indentation: typing.Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> typing.AsyncIterator[ast.Node]:
+    """
+    Parses a module read from a stream one top-level block at a time.
+
+    The stream is lexed by an :class:`ksl.lex.AsyncLexer`, up to the end of a block
+    before the block is parsed, so parsing never waits on input and the event loop
+    can serve other streams in the meantime.
+    """
+    lexer = AsyncLexer(reader, path, indentation, chunk_size)
+    async for block in Parser(lexer._lexer, path)._iter_blocks_async(lexer):
+        yield block
+
+
+async def parse_module_async(
+    reader: asyncio.StreamReader,
+    path: Path = "",
+    indentation: typing.Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> ast.Module:
+    """Parses a whole module read from a stream, see :func:`iter_module_async`"""
+    lexer = AsyncLexer(reader, path, indentation, chunk_size)
+    parser = Parser(lexer._lexer, path)
+    lines = [block async for block in parser._iter_blocks_async(lexer)]
+    return parser._span(ast.Module(lines), 0, parser.lexer.curr.start)
 
 
 class Parser:
-    lexer: Lexer
+    """
+    Recursive descent parser.
+
+    If a :class:`ksl.symbols.SymbolTable` is given as ``symbols``, names and literals
+    are taken from it rather than each built anew, and so carry no spans.
+
+    If ``lazy``, the bodies of paragraphs are skipped over, and paragraphs are built
+    as :class:`ksl.ast.LazyParagraph` which parse their body when first used. Errors
+    in a body are only raised then. Sources which aren't held whole, like streams
+    lexed as they're read, are always parsed eagerly, as are memory-mapped files,
+    which may change or go away before the bodies are used.
+    """
+
+    lexer: BaseLexer
 
     def __init__(
         self,
-        source: typing.Union[str, typing.TextIO],
+        source: typing.Union[Source, BaseLexer],
         path: Path,
         indentation: typing.Optional[str] = None,
+        lexer_type: typing.Type[BaseLexer] = BufferLexer,
+        symbols: typing.Optional[SymbolTable] = None,
+        lazy: bool = False,
     ):
-        self.lexer = Lexer(source=source, path=path, indentation=indentation)
+        self.symbols = symbols
+        if isinstance(source, BaseLexer):
+            self.lexer = source
+        elif isinstance(source, TokenTable):
+            self.lexer = TableLexer(source, path)
+        else:
+            self.lexer = lexer_type(source=source, path=path, indentation=indentation)
+        self.lazy = lazy and self.lexer._branches
+        # end of the last block parsed
+        self._end = 0
+
+    # the public parse methods each read their source to the end, or as far as they
+    # need to, then close the lexer
 
     def parse_module(self) -> ast.Module:
+        with self.lexer:
+            self._assert(tokens.Start)
+            lines = list(self._iter_blocks())
+        return self._span(ast.Module(lines), 0, self.lexer.curr.start)
+
+    def iter_module(self) -> typing.Iterator[ast.Node]:
+        with self.lexer:
+            self._assert(tokens.Start)
+            for block in self._iter_blocks():
+                yield block
+                # errors can't point before the next block anymore
+                self.lexer.lines.discard(self.lexer.curr.start)
+
+    def _iter_blocks(self) -> typing.Iterator[ast.Node]:
+        """Parses top-level blocks until the end of the source"""
+        prev: typing.Optional[ast.Node] = None
+        while self.lexer.curr.kind != _END:
+            self._parse_separator(prev)
+            prev = self._parse_block()
+            yield prev
+
+    async def _iter_blocks_async(
+        self, lexer: AsyncLexer
+    ) -> typing.AsyncIterator[ast.Node]:
+        """
+        Like :meth:`_iter_blocks`, lexing each block ahead with ``lexer``, which must
+        feed this parser's lexer
+        """
+        await lexer._lex_block()
         self._assert(tokens.Start)
-        lines: typing.List[ast.Node] = []
-        while self.lexer.curr != tokens.End:
+        prev: typing.Optional[ast.Node] = None
+        while self.lexer.curr.kind != _END:
+            await lexer._lex_block()
+            self._parse_separator(prev)
+            prev = self._parse_block()
+            yield prev
+            lexer.lines.discard(self.lexer.curr.start)
+
+    def _parse_separator(self, prev: typing.Optional[ast.Node]) -> None:
+        """
+        Consumes the Nodent preceding a block.
+
+        The Dedent closing a paragraph also separates it from the following block, so
+        no Nodent is expected after one.
+        """
+        if not isinstance(prev, ast.Paragraph):
             self._assert(tokens.Nodent)
-            lines.append(self._parse_block())
-        return ast.Module(lines)
 
     def _parse_block(self) -> ast.Node:
+        # interned names and literals have no spans, so the spans of blocks are taken
+        # from their first and last tokens
+        lexer = self.lexer
+        first = last = lexer.curr
         exprs: typing.List[ast.Node] = []
         exprs.append(self._parse_expr())
-        if type(self.lexer.curr) in (
-            tokens.Indent,
-            tokens.Nodent,
-            tokens.Dedent,
-            tokens.End,
-        ):
+        if 1 << lexer.curr.kind & _BLOCK_ENDS:
+            self._end = max(exprs[0].end, first.end)
             return exprs[0]
-        while type(self.lexer.curr) not in (
-            tokens.Semicolon,
-            tokens.Indent,
-            tokens.Nodent,
-            tokens.Dedent,
-            tokens.End,
-        ):
+        while not 1 << lexer.curr.kind & _LINE_ENDS:
+            last = lexer.curr
             exprs.append(self._parse_expr())
-        self._optional(tokens.Semicolon)
-        if type(self.lexer.curr) in (tokens.Nodent, tokens.Dedent, tokens.End):
+        if lexer.curr.kind == _SEMICOLON:
+            lexer.next()
+        kind = lexer.curr.kind
+        if 1 << kind & _BLOCK_ENDS:
             if len(exprs) < 2:
                 self._error("line must contain at least 2 sub-expressions")
-            return ast.Line(exprs)
-        if type(self.lexer.curr) == tokens.Colon:
-            self.lexer.next()
-        if type(self.lexer.curr) == tokens.Indent:
-            self.lexer.next()
-            exprs.append(self._parse_block())
-            while type(self.lexer.curr) != tokens.Dedent:
-                self._assert(tokens.Nodent)
-                exprs.append(self._parse_block())
-            self.lexer.next()
-            return ast.Paragraph(exprs)
+            self._end = max(exprs[-1].end, last.end)
+            return self._span(ast.Line(exprs), first.start, self._end)
+        if kind == _COLON:
+            lexer.next()
+            kind = lexer.curr.kind
+        if kind == _INDENT:
+            if self.lazy:
+                return self._skip_body(exprs, first.start)
+            exprs.extend(self._parse_body())
+            return self._span(ast.Paragraph(exprs), first.start, self._end)
         self._fail()
 
-    def parse_block(self) -> ast.Node:
-        self._assert(tokens.Start)
-        self._assert(tokens.Nodent)
-        return self._parse_block()
+    def _parse_body(self) -> typing.List[ast.Node]:
+        """Parses the blocks of an indented body, from its Indent to past its Dedent"""
+        lexer = self.lexer
+        lexer.next()
+        blocks = [self._parse_block()]
+        while lexer.curr.kind != _DEDENT:
+            self._parse_separator(blocks[-1])
+            blocks.append(self._parse_block())
+        lexer.next()
+        return blocks
 
-    def _parse_expr(self) -> ast.Node:
-        if type(self.lexer.curr) == tokens.LParen:
-            return self._parse_list_expr()
-        return self._parse_value()
+    def _skip_body(self, exprs: typing.List[ast.Node], start: int) -> ast.LazyParagraph:
+        """
+        Lexes past the indented body starting at the current Indent, returning a
+        paragraph of ``exprs``, starting at ``start``, which parses the body when
+        first used
+        """
+        lexer = self.lexer
+        load = functools.partial(type(self)._load_body, lexer._branch(), self.symbols)
+        self._end = lexer._skip_body()
+        lexer.next()
+        return self._span(ast.LazyParagraph(exprs, load), start, self._end)
+
+    @classmethod
+    def _load_body(
+        cls, lexer: BaseLexer, symbols: typing.Optional[SymbolTable]
+    ) -> typing.List[ast.Node]:
+        """Parses a body skipped by :meth:`_skip_body`, given its lexer there"""
+        return cls(lexer._branch(), lexer.path, symbols=symbols)._parse_body()
+
+    def parse_block(self) -> ast.Node:
+        with self.lexer:
+            self._assert(tokens.Start)
+            self._assert(tokens.Nodent)
+            return self._parse_block()
 
     def parse_expr(self) -> ast.Node:
-        self._assert(tokens.Start)
-        self._assert(tokens.Nodent)
-        return self._parse_expr()
+        with self.lexer:
+            self._assert(tokens.Start)
+            self._assert(tokens.Nodent)
+            return self._parse_expr()
 
     def _parse_list_expr(self) -> ast.Expression:
-        self._assert(tokens.LParen)
+        lexer = self.lexer
+        start = lexer.curr.start
+        lexer.next()
         exprs: typing.List[ast.Node] = []
-        while type(self.lexer.curr) != tokens.RParen:
+        while lexer.curr.kind != _RPAREN:
             exprs.append(self._parse_expr())
-            self._optional(tokens.Comma)
-        self._assert(tokens.RParen)
-        return ast.Expression(exprs)
+            if lexer.curr.kind == _COMMA:
+                lexer.next()
+        end = lexer.curr.end
+        lexer.next()
+        return self._span(ast.Expression(exprs), start, end)
 
-    def _parse_value(self) -> ast.Value:
-        if type(self.lexer.curr) in (tokens.String, tokens.Integer, tokens.Float):
-            res = ast.Literal(self.lexer.curr.value)
+    # the rules _parse_expr calls for the tokens starting composite expressions,
+    # indexed by kind; they're called by name so wrappers set on an instance (see
+    # ksl.stats) still see the calls
+    _expr_rules: typing.List[typing.Optional[str]] = [None] * len(tokens.KINDS)
+    _expr_rules[tokens.LParen.kind] = "_parse_list_expr"
+    _expr_rules[tokens.LBracket.kind] = "_parse_list"
+    _expr_rules[tokens.LCurly.kind] = "_parse_set_or_map"
+
+    def _parse_expr(self) -> ast.Node:
+        curr = self.lexer.curr
+        kind = curr.kind
+        if 1 << kind & _LITERALS:
+            if self.symbols is None:
+                res: ast.Node = ast.Literal(curr.value, curr.start, curr.end)
+            else:
+                res = self.symbols.literal(curr.value)
             self.lexer.next()
             return res
-        if type(self.lexer.curr) == tokens.Name:
-            res2 = ast.Name(typing.cast(str, self.lexer.curr.value))
+        if kind == _NAME:
+            if self.symbols is None:
+                res = ast.Name(typing.cast(str, curr.value), curr.start, curr.end)
+            else:
+                res = self.symbols.name(typing.cast(str, curr.value))
             self.lexer.next()
-            return res2
-        if type(self.lexer.curr) == tokens.LBracket:
-            return self._parse_list()
-        if type(self.lexer.curr) == tokens.LCurly:
-            return self._parse_set_or_map()
-        self._fail()
+            return res
+        rule = self._expr_rules[kind]
+        if rule is None:
+            self._fail()
+        return typing.cast(ast.Node, getattr(self, rule)())
 
     def _parse_list(self) -> ast.List:
-        self._assert(tokens.LBracket)
+        lexer = self.lexer
+        start = lexer.curr.start
+        lexer.next()
         elems: typing.List[ast.Node] = []
-        while type(self.lexer.curr) != tokens.RBracket:
+        while lexer.curr.kind != _RBRACKET:
             elems.append(self._parse_expr())
             self._assert(tokens.Comma)
-        self.lexer.next()
-        return ast.List(elems)
+        end = lexer.curr.end
+        lexer.next()
+        return self._span(ast.List(elems), start, end)
 
     def _parse_set_or_map(self) -> typing.Union[ast.Set, ast.Map]:
-        self._assert(tokens.LCurly)
-        if type(self.lexer.curr) == tokens.RCurly:
+        lexer = self.lexer
+        start = lexer.curr.start
+        lexer.next()
+        if lexer.curr.kind == _RCURLY:
             # empty map literal "{}"
-            return ast.Map(())
+            end = lexer.curr.end
+            lexer.next()
+            return self._span(ast.Map(()), start, end)
         first = self._parse_expr()
-        if type(self.lexer.curr) == tokens.Colon:
+        kind = lexer.curr.kind
+        if kind == _COLON:
             # parse as map
             exprs: typing.List[typing.Tuple[ast.Node, ast.Node]] = []
-            self.lexer.next()
+            lexer.next()
             second = self._parse_expr()
+            self._assert(tokens.Comma)
             exprs.append((first, second))
-            while type(self.lexer.curr) != tokens.RCurly:
+            while lexer.curr.kind != _RCURLY:
                 first = self._parse_expr()
                 self._assert(tokens.Colon)
                 second = self._parse_expr()
                 self._assert(tokens.Comma)
-            return ast.Map(exprs)
-        elif type(self.lexer.curr) == tokens.Comma:
+                exprs.append((first, second))
+            end = lexer.curr.end
+            lexer.next()
+            return self._span(ast.Map(exprs), start, end)
+        elif kind == _COMMA:
             # parse as set
             exprs2: typing.List[ast.Node] = [first]
-            self.lexer.next()
-            while type(self.lexer.curr) != tokens.RCurly:
+            lexer.next()
+            while lexer.curr.kind != _RCURLY:
                 exprs2.append(self._parse_expr())
                 self._assert(tokens.Comma)
+            end = lexer.curr.end
+            lexer.next()
+            return self._span(ast.Set(exprs2), start, end)
         self._fail()
 
     def _assert(self, expected: typing.Type[tokens.Token]) -> None:
@@ -170,7 +413,7 @@ class Parser:
         Passing :value:`None` or giving no argument causes the assert to always fail
         and error.
         """
-        if type(self.lexer.curr) != expected:
+        if self.lexer.curr.kind != expected.kind:
             self._error(
                 f"expected token of type: {expected.__name__}, found: {self.lexer.curr}"
             )
@@ -179,20 +422,605 @@ class Parser:
     def _fail(self) -> typing.NoReturn:
         self._error(f"unexpected token: {self.lexer.curr}")
 
-    def _optional(self, expected: typing.Type[tokens.Token]) -> None:
+    def _error(self, msg: str) -> typing.NoReturn:
+        """Formats and raises a ParseError at the current token"""
+        lexer = self.lexer
+        raise ParseError(msg, lexer.path, lexer.curr.start, lexer.lines)
+
+    @staticmethod
+    def _span(node: _N, start: int, end: int) -> _N:
+        """Records the source span of a newly built node"""
+        node.start = start
+        node.end = end
+        return node
+
+
+# a parse rule of StackParser: it yields the rules for the nodes nested in its own,
+# and is sent back the node each one built
+_Rule = typing.Generator[typing.Any, typing.Any, typing.Any]
+
+
+class StackParser(Parser):
+    """
+    Parser which keeps track of nested blocks and expressions on an explicit stack
+    rather than by recursing, so nesting is only limited by memory.
+
+    Each nested block, or expression other than a name or literal, is parsed by a
+    generator. The generators are kept on a stack and run one at a time. Builds the
+    same trees, and raises the same errors, as :class:`Parser`.
+    """
+
+    def _parse_block(self) -> ast.Node:
+        return self._run(self._block())
+
+    def _parse_expr(self) -> ast.Node:
+        node = self._atom()
+        if node is None:
+            node = self._run(self._composite())
+        return node
+
+    @staticmethod
+    def _run(rule: _Rule) -> typing.Any:
+        """Runs a rule and the rules nested in it, returning the node it built"""
+        stack = [rule]
+        node = None
+        while True:
+            try:
+                nested = stack[-1].send(node)
+            except StopIteration as done:
+                stack.pop()
+                node = done.value
+                if not stack:
+                    return node
+            else:
+                stack.append(nested)
+                node = None
+
+    def _atom(self) -> typing.Optional[ast.Node]:
+        """Parses a name or a literal, if the current token is one"""
+        curr = self.lexer.curr
+        kind = curr.kind
+        symbols = self.symbols
+        if 1 << kind & _LITERALS:
+            if symbols is None:
+                res: ast.Node = ast.Literal(curr.value, curr.start, curr.end)
+            else:
+                res = symbols.literal(curr.value)
+        elif kind == _NAME:
+            if symbols is None:
+                res = ast.Name(typing.cast(str, curr.value), curr.start, curr.end)
+            else:
+                res = symbols.name(typing.cast(str, curr.value))
+        else:
+            return None
+        self.lexer.next()
+        return res
+
+    # the rules for the tokens starting composite expressions, indexed by kind
+    _composite_rules: typing.List[typing.Optional[str]] = [None] * len(tokens.KINDS)
+    _composite_rules[tokens.LParen.kind] = "_list_expr"
+    _composite_rules[tokens.LBracket.kind] = "_list"
+    _composite_rules[tokens.LCurly.kind] = "_set_or_map"
+
+    def _composite(self) -> _Rule:
+        rule = self._composite_rules[self.lexer.curr.kind]
+        if rule is None:
+            self._fail()
+        return typing.cast(_Rule, getattr(self, rule)())
+
+    def _block(self) -> _Rule:
+        lexer = self.lexer
+        first = last = lexer.curr
+        node = self._atom()
+        if node is None:
+            node = yield self._composite()
+        exprs: typing.List[ast.Node] = [node]
+        if 1 << lexer.curr.kind & _BLOCK_ENDS:
+            self._end = max(node.end, first.end)
+            return node
+        while not 1 << lexer.curr.kind & _LINE_ENDS:
+            last = lexer.curr
+            node = self._atom()
+            if node is None:
+                node = yield self._composite()
+            exprs.append(node)
+        if lexer.curr.kind == _SEMICOLON:
+            lexer.next()
+        kind = lexer.curr.kind
+        if 1 << kind & _BLOCK_ENDS:
+            if len(exprs) < 2:
+                self._error("line must contain at least 2 sub-expressions")
+            self._end = max(exprs[-1].end, last.end)
+            return self._span(ast.Line(exprs), first.start, self._end)
+        if kind == _COLON:
+            lexer.next()
+            kind = lexer.curr.kind
+        if kind == _INDENT:
+            if self.lazy:
+                return self._skip_body(exprs, first.start)
+            lexer.next()
+            exprs.append((yield self._block()))
+            while lexer.curr.kind != _DEDENT:
+                self._parse_separator(exprs[-1])
+                exprs.append((yield self._block()))
+            lexer.next()
+            return self._span(ast.Paragraph(exprs), first.start, self._end)
+        self._fail()
+
+    def _list_expr(self) -> _Rule:
+        lexer = self.lexer
+        start = lexer.curr.start
+        lexer.next()
+        exprs: typing.List[ast.Node] = []
+        while lexer.curr.kind != _RPAREN:
+            node = self._atom()
+            if node is None:
+                node = yield self._composite()
+            exprs.append(node)
+            if lexer.curr.kind == _COMMA:
+                lexer.next()
+        end = lexer.curr.end
+        lexer.next()
+        return self._span(ast.Expression(exprs), start, end)
+
+    def _list(self) -> _Rule:
+        lexer = self.lexer
+        start = lexer.curr.start
+        lexer.next()
+        elems: typing.List[ast.Node] = []
+        while lexer.curr.kind != _RBRACKET:
+            node = self._atom()
+            if node is None:
+                node = yield self._composite()
+            elems.append(node)
+            self._assert(tokens.Comma)
+        end = lexer.curr.end
+        lexer.next()
+        return self._span(ast.List(elems), start, end)
+
+    def _set_or_map(self) -> _Rule:
+        lexer = self.lexer
+        start = lexer.curr.start
+        lexer.next()
+        if lexer.curr.kind == _RCURLY:
+            # empty map literal "{}"
+            end = lexer.curr.end
+            lexer.next()
+            return self._span(ast.Map(()), start, end)
+        first = self._atom()
+        if first is None:
+            first = yield self._composite()
+        kind = lexer.curr.kind
+        if kind == _COLON:
+            # parse as map
+            exprs: typing.List[typing.Tuple[ast.Node, ast.Node]] = []
+            lexer.next()
+            second = self._atom()
+            if second is None:
+                second = yield self._composite()
+            self._assert(tokens.Comma)
+            exprs.append((first, second))
+            while lexer.curr.kind != _RCURLY:
+                first = self._atom()
+                if first is None:
+                    first = yield self._composite()
+                self._assert(tokens.Colon)
+                second = self._atom()
+                if second is None:
+                    second = yield self._composite()
+                self._assert(tokens.Comma)
+                exprs.append((first, second))
+            end = lexer.curr.end
+            lexer.next()
+            return self._span(ast.Map(exprs), start, end)
+        elif kind == _COMMA:
+            # parse as set
+            exprs2: typing.List[ast.Node] = [first]
+            lexer.next()
+            while lexer.curr.kind != _RCURLY:
+                node = self._atom()
+                if node is None:
+                    node = yield self._composite()
+                exprs2.append(node)
+                self._assert(tokens.Comma)
+            end = lexer.curr.end
+            lexer.next()
+            return self._span(ast.Set(exprs2), start, end)
+        self._fail()
+
+
+class TableParser(Parser):
+    """
+    Parser which reads a :class:`ksl.table.TokenTable` in place.
+
+    A :class:`ksl.table.TableLexer` gives the table back a Token object at a time;
+    this reads the kinds, offsets, and values straight from its arrays instead, so
+    nothing is made per token but the nodes built. Builds the same trees, and raises
+    the same errors, as :class:`Parser`. Paragraphs are always parsed eagerly.
+    """
+
+    def __init__(
+        self,
+        table: TokenTable,
+        path: Path = "",
+        symbols: typing.Optional[SymbolTable] = None,
+    ):
+        super().__init__(table, path, symbols=symbols)
+        self.lazy = False
+        self._kinds = table.kinds
+        self._starts = table.starts
+        self._ends = table.ends
+        self._values = table.values
+        # index of the current token, -1 being the Start token lexers begin with,
+        # and of the value of the next valued one
+        self._i = -1
+        self._v = 0
+
+    def parse_module(self) -> ast.Module:
+        self._assert(tokens.Start)
+        lines = list(self._iter_blocks())
+        return self._span(ast.Module(lines), 0, self._starts[self._i])
+
+    def iter_module(self) -> typing.Iterator[ast.Node]:
+        self._assert(tokens.Start)
+        yield from self._iter_blocks()
+
+    def _iter_blocks(self) -> typing.Iterator[ast.Node]:
+        kinds = self._kinds
+        prev: typing.Optional[ast.Node] = None
+        while kinds[self._i] != _END:
+            self._parse_separator(prev)
+            prev = self._parse_block()
+            yield prev
+
+    def _parse_block(self) -> ast.Node:
+        kinds = self._kinds
+        ends = self._ends
+        first = last = self._i
+        exprs: typing.List[ast.Node] = []
+        exprs.append(self._parse_expr())
+        if 1 << kinds[self._i] & _BLOCK_ENDS:
+            self._end = max(exprs[0].end, ends[first])
+            return exprs[0]
+        while not 1 << kinds[self._i] & _LINE_ENDS:
+            last = self._i
+            exprs.append(self._parse_expr())
+        if kinds[self._i] == _SEMICOLON:
+            self._i += 1
+        kind = kinds[self._i]
+        if 1 << kind & _BLOCK_ENDS:
+            if len(exprs) < 2:
+                self._error("line must contain at least 2 sub-expressions")
+            self._end = max(exprs[-1].end, ends[last])
+            return self._span(ast.Line(exprs), self._starts[first], self._end)
+        if kind == _COLON:
+            self._i += 1
+            kind = kinds[self._i]
+        if kind == _INDENT:
+            exprs.extend(self._parse_body())
+            return self._span(ast.Paragraph(exprs), self._starts[first], self._end)
+        self._fail()
+
+    def _parse_body(self) -> typing.List[ast.Node]:
+        kinds = self._kinds
+        self._i += 1
+        blocks = [self._parse_block()]
+        while kinds[self._i] != _DEDENT:
+            self._parse_separator(blocks[-1])
+            blocks.append(self._parse_block())
+        self._i += 1
+        return blocks
+
+    def _parse_expr(self) -> ast.Node:
+        i = self._i
+        kind = self._kinds[i]
+        if 1 << kind & _LITERALS:
+            value = self._values[self._v]
+            self._v += 1
+            self._i = i + 1
+            if self.symbols is None:
+                return ast.Literal(value, self._starts[i], self._ends[i])
+            return self.symbols.literal(value)
+        if kind == _NAME:
+            value = self._values[self._v]
+            self._v += 1
+            self._i = i + 1
+            if self.symbols is None:
+                return ast.Name(value, self._starts[i], self._ends[i])
+            return self.symbols.name(value)
+        rule = self._expr_rules[kind]
+        if rule is None:
+            self._fail()
+        return typing.cast(ast.Node, getattr(self, rule)())
+
+    def _parse_list_expr(self) -> ast.Expression:
+        kinds = self._kinds
+        start = self._starts[self._i]
+        self._i += 1
+        exprs: typing.List[ast.Node] = []
+        while kinds[self._i] != _RPAREN:
+            exprs.append(self._parse_expr())
+            if kinds[self._i] == _COMMA:
+                self._i += 1
+        end = self._ends[self._i]
+        self._i += 1
+        return self._span(ast.Expression(exprs), start, end)
+
+    def _parse_list(self) -> ast.List:
+        kinds = self._kinds
+        start = self._starts[self._i]
+        self._i += 1
+        elems: typing.List[ast.Node] = []
+        while kinds[self._i] != _RBRACKET:
+            elems.append(self._parse_expr())
+            self._assert(tokens.Comma)
+        end = self._ends[self._i]
+        self._i += 1
+        return self._span(ast.List(elems), start, end)
+
+    def _parse_set_or_map(self) -> typing.Union[ast.Set, ast.Map]:
+        kinds = self._kinds
+        start = self._starts[self._i]
+        self._i += 1
+        if kinds[self._i] == _RCURLY:
+            # empty map literal "{}"
+            end = self._ends[self._i]
+            self._i += 1
+            return self._span(ast.Map(()), start, end)
+        first = self._parse_expr()
+        kind = kinds[self._i]
+        if kind == _COLON:
+            # parse as map
+            exprs: typing.List[typing.Tuple[ast.Node, ast.Node]] = []
+            self._i += 1
+            second = self._parse_expr()
+            self._assert(tokens.Comma)
+            exprs.append((first, second))
+            while kinds[self._i] != _RCURLY:
+                first = self._parse_expr()
+                self._assert(tokens.Colon)
+                second = self._parse_expr()
+                self._assert(tokens.Comma)
+                exprs.append((first, second))
+            end = self._ends[self._i]
+            self._i += 1
+            return self._span(ast.Map(exprs), start, end)
+        elif kind == _COMMA:
+            # parse as set
+            exprs2: typing.List[ast.Node] = [first]
+            self._i += 1
+            while kinds[self._i] != _RCURLY:
+                exprs2.append(self._parse_expr())
+                self._assert(tokens.Comma)
+            end = self._ends[self._i]
+            self._i += 1
+            return self._span(ast.Set(exprs2), start, end)
+        self._fail()
+
+    def _assert(self, expected: typing.Type[tokens.Token]) -> None:
+        i = self._i
+        kind = tokens.Start.kind if i < 0 else self._kinds[i]
+        if kind != expected.kind:
+            self._error(
+                f"expected token of type: {expected.__name__}, found: {self._curr()}"
+            )
+        self._i = i + 1
+
+    def _fail(self) -> typing.NoReturn:
+        self._error(f"unexpected token: {self._curr()}")
+
+    def _error(self, msg: str) -> typing.NoReturn:
+        start = 0 if self._i < 0 else self._starts[self._i]
+        raise ParseError(msg, self.lexer.path, start, self.lexer.lines)
+
+    def _curr(self) -> tokens.Token:
+        """The current token, as a Token object, for error messages"""
+        if self._i < 0:
+            return self.lexer.START
+        return typing.cast(TableLexer, self.lexer)._table[self._i]
+
+
+class RecoveringParser(Parser):
+    """
+    Parser which goes on past errors, collecting them in ``errors``.
+
+    Whatever failed to parse is skipped, up to where parsing can pick up again, and
+    left in the tree as an :class:`ksl.ast.Error`. A composite expression is skipped
+    up to its closing bracket, or the end of its line if it has none. A block is
+    skipped up to the end of its line, and if that starts an indented body, the body
+    is still parsed, into a paragraph headed by the error. After a lexing error the
+    rest of its line is skipped, which needs the whole source to be held, so with
+    other lexers those errors are still raised.
+    """
+
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any):
+        super().__init__(*args, **kwargs)
+        self.lazy = False
+        self.errors: typing.List[SourceError] = []
+        # kinds of the brackets closing the composite expressions being parsed
+        self._closers: typing.List[int] = []
+
+    def parse_module(self) -> ast.Module:
+        with self.lexer:
+            try:
+                self._assert(tokens.Start)
+            except LexError as e:
+                self._lexed(e)
+            lines = list(self._iter_blocks())
+        return self._span(ast.Module(lines), 0, self.lexer.curr.start)
+
+    def _iter_blocks(self) -> typing.Iterator[ast.Node]:
+        prev: typing.Optional[ast.Node] = None
+        while self.lexer.curr.kind != _END:
+            prev = self._parse_separated_block(prev)
+            yield prev
+
+    def _parse_body(self) -> typing.List[ast.Node]:
+        lexer = self.lexer
+        indent = lexer.curr
+        try:
+            lexer.next()
+        except LexError as e:
+            self._lexed(e)
+            blocks: typing.List[ast.Node] = [self._error_block(e, indent.end)]
+        else:
+            blocks = [self._parse_block()]
+        while not 1 << lexer.curr.kind & (1 << _DEDENT | 1 << _END):
+            blocks.append(self._parse_separated_block(blocks[-1]))
+        if lexer.curr.kind == _DEDENT:
+            self._advance()
+        return blocks
+
+    def _parse_separated_block(self, prev: typing.Optional[ast.Node]) -> ast.Node:
+        """Parses a block and the separator before it"""
+        lexer = self.lexer
+        curr = lexer.curr
+        if curr.kind == _NODENT:
+            # only expected after lines, but it's just as clear where a block starts
+            # when a recovered error leaves one after a paragraph
+            try:
+                lexer.next()
+            except LexError as e:
+                self._lexed(e)
+                return self._error_block(e, curr.end)
+        elif not isinstance(prev, ast.Paragraph):
+            try:
+                self._assert(tokens.Nodent)
+            except ParseError as e:
+                self._report(e)
+        return self._parse_block()
+
+    def _parse_block(self) -> ast.Node:
+        lexer = self.lexer
+        first = lexer.curr
+        try:
+            return super()._parse_block()
+        except (LexError, ParseError) as e:
+            self._recovered(e)
+            end = typing.cast(int, e.offset)
+            if lexer.curr is first and first.kind != _END:
+                # nothing was consumed, so skip the culprit to not fail on it again
+                end = first.end
+                self._advance()
+            while not 1 << lexer.curr.kind & _SYNCS:
+                end = lexer.curr.end
+                self._advance()
+            self._end = max(first.start, end)
+            error = ast.Error(e, first.start, self._end)
+            if lexer.curr.kind != _INDENT:
+                return error
+            exprs = [error, *self._parse_body()]
+            return self._span(ast.Paragraph(exprs), error.start, self._end)
+
+    def _error_block(self, e: SourceError, start: int) -> ast.Error:
+        """The block left in place of one which failed to lex from ``start``"""
+        self._end = typing.cast(int, e.offset)
+        return ast.Error(e, start, self._end)
+
+    def _parse_list_expr(self) -> ast.Node:  # type: ignore
+        return self._parse_composite(super()._parse_list_expr, _RPAREN)
+
+    def _parse_list(self) -> ast.Node:  # type: ignore
+        return self._parse_composite(super()._parse_list, _RBRACKET)
+
+    def _parse_set_or_map(self) -> ast.Node:  # type: ignore
+        return self._parse_composite(super()._parse_set_or_map, _RCURLY)
+
+    def _parse_composite(
+        self, rule: typing.Callable[[], ast.Node], closer: int
+    ) -> ast.Node:
+        """Parses a composite expression with ``rule``, given its closing bracket"""
+        lexer = self.lexer
+        start = lexer.curr.start
+        self._closers.append(closer)
+        try:
+            return rule()
+        except (LexError, ParseError) as e:
+            self._recovered(e)
+            end = typing.cast(int, e.offset)
+            depth = 0
+            while True:
+                curr = lexer.curr
+                kind = curr.kind
+                if 1 << kind & _SYNCS:
+                    break
+                if 1 << kind & _OPENERS:
+                    depth += 1
+                elif 1 << kind & _CLOSERS:
+                    if depth:
+                        depth -= 1
+                    elif kind == closer:
+                        end = curr.end
+                        self._advance()
+                        break
+                    elif kind in self._closers:
+                        # closes an enclosing expression, so this one is unclosed
+                        break
+                end = curr.end
+                self._advance()
+            return ast.Error(e, start, max(start, end))
+        finally:
+            self._closers.pop()
+
+    def _recovered(self, error: Exception) -> None:
+        """Records an error recovered from"""
+        if isinstance(error, LexError):
+            self._lexed(error)
+        else:
+            self._report(typing.cast(ParseError, error))
+
+    def _report(self, error: SourceError) -> None:
         """
-        Check if the current token is the expected one and consumes it only if it is
+        Records an error, unless it's where the last one was, which it would only be
+        a consequence of
         """
-        if type(self.lexer.curr) == expected:
-            self.lexer.next()
+        errors = self.errors
+        if not errors or errors[-1].offset != error.offset:
+            errors.append(error)
 
-    def _error(self, msg: str) -> typing.NoReturn:
-        """Formats and raises a ParseError"""
-        raise ParseError(msg)
+    def _lexed(self, error: LexError) -> None:
+        """
+        Records a lexing error and moves on to the first token after its line, in place
+        of the token it was raised lexing
+        """
+        while True:
+            if not self.lexer._skip_line(typing.cast(int, error.offset)):
+                raise error
+            self._report(error)
+            try:
+                self.lexer.next()
+                return
+            except LexError as e:
+                error = e
+
+    def _advance(self) -> None:
+        """Moves on to the next token, recovering from lexing errors"""
+        try:
+            self.lexer.next()
+        except LexError as e:
+            self._lexed(e)
 
 
 if __name__ == "__main__":
+    import argparse
     import sys
 
-    while True:
-        print(parse_block(sys.stdin, "stdin"))
+    from ksl.stats import instrument
+
+    argparser = argparse.ArgumentParser(prog="python -m ksl.parse")
+    argparser.add_argument("path", nargs="?", help="module to parse, else stdin")
+    argparser.add_argument(
+        "--stats", action="store_true", help="print how lexing and parsing went"
+    )
+    args = argparser.parse_args()
+
+    if args.path is None:
+        while True:
+            print(parse_block(sys.stdin, "stdin"))
+    parser = Parser(None, args.path)
+    stats = instrument(parser) if args.stats else None
+    module = parser.parse_module()
+    if stats is None:
+        print(module)
+    else:
+        print(stats.report())
@@ -0,0 +1,230 @@
+"""
+Compact binary encoding of ASTs.
+
+An encoding starts with :data:`MAGIC` and the :data:`VERSION` byte, then a table of
+the strings used by Name nodes and string literals, then the nodes in depth-first
+order. Each node is its kind, its span, and then its payload: a string table index
+for names and string literals, the value for other literals, or the number of
+children (pairs, for maps) followed by the children.
+
+Kinds, counts, indexes, and integers are all varints, with signed numbers zigzag
+encoded; each span is given as the distance of its start from the start of the node
+before it, and its length.
+"""
+
+import struct
+from typing import Any, Dict, List, Tuple, Type, Union
+
+import ksl.ast as ast
+
+MAGIC = b"KSLA"
+VERSION = 1
+
+# node kinds, which :mod:`ksl.arena` stores nodes by too
+MODULE = 0
+EXPRESSION = 1
+LINE = 2
+PARAGRAPH = 3
+LIST = 4
+SET = 5
+MAP = 6
+NAME = 7
+STRING = 8
+INTEGER = 9
+FLOAT = 10
+_LITERALS = {str: STRING, int: INTEGER, float: FLOAT}
+
+_CONTAINERS: Dict[Type[ast.Node], int] = {
+    ast.Module: MODULE,
+    ast.Expression: EXPRESSION,
+    ast.Line: LINE,
+    ast.Paragraph: PARAGRAPH,
+    ast.List: LIST,
+    ast.Set: SET,
+    ast.Map: MAP,
+}
+# containers by kind
+_CLASSES: List[Type[Any]] = list(_CONTAINERS)
+# containers by type as encoded, where lazy containers become plain ones
+_ENCODED: Dict[Type[ast.Node], int] = {
+    **_CONTAINERS,
+    ast.LazyParagraph: PARAGRAPH,
+    ast.LazyModule: MODULE,
+}
+_float = struct.Struct("<d")
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return -((value + 1) >> 1) if value & 1 else value >> 1
+
+
+def dump(node: ast.Node) -> bytes:
+    """Encodes an AST"""
+    strings: Dict[str, int] = {}
+    out = bytearray()
+    prev_start = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Name):
+            kind = NAME
+        elif isinstance(node, ast.Literal):
+            kind = _LITERALS.get(type(node.value), -1)
+            if kind < 0:
+                raise ValueError(f"can't encode literal {node.value!r}")
+        elif type(node) in _ENCODED:
+            kind = _ENCODED[type(node)]
+        else:
+            raise ValueError(f"can't encode node {node!r}")
+        out.append(kind)
+        _write_varint(out, _zigzag(node.start - prev_start))
+        _write_varint(out, node.end - node.start)
+        prev_start = node.start
+
+        if isinstance(node, ast.Map):
+            _write_varint(out, len(node))
+            for key, value in reversed(node):
+                stack.append(value)
+                stack.append(key)
+        elif isinstance(node, list):
+            _write_varint(out, len(node))
+            stack.extend(reversed(node))
+        elif isinstance(node, ast.Name):
+            _write_varint(out, strings.setdefault(node.name, len(strings)))
+        elif isinstance(node, ast.Literal):
+            if kind == STRING:
+                _write_varint(out, strings.setdefault(node.value, len(strings)))
+            elif kind == INTEGER:
+                _write_varint(out, _zigzag(node.value))
+            else:
+                out += _float.pack(node.value)
+
+    header = bytearray(MAGIC)
+    header.append(VERSION)
+    _write_varint(header, len(strings))
+    for text in strings:
+        data = text.encode("utf-8", "surrogatepass")
+        _write_varint(header, len(data))
+        header += data
+    return bytes(header + out)
+
+
+def load(data: Union[bytes, bytearray, memoryview]) -> ast.Node:
+    """Decodes an AST encoded by :func:`dump`"""
+    data = bytes(data)
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("not an encoded AST")
+    version = data[len(MAGIC)]
+    if version != VERSION:
+        raise ValueError(f"unsupported AST encoding version {version}")
+    try:
+        return _load(data, len(MAGIC) + 1)
+    except IndexError:
+        raise ValueError("truncated AST encoding") from None
+
+
+def _load(data: bytes, pos: int) -> ast.Node:
+    count, pos = _read_varint(data, pos)
+    strings: List[str] = []
+    for _ in range(count):
+        size, pos = _read_varint(data, pos)
+        strings.append(data[pos : pos + size].decode("utf-8", "surrogatepass"))
+        pos += size
+
+    classes = _CLASSES
+    Name = ast.Name
+    Literal = ast.Literal
+    unpack_float = _float.unpack_from
+    # the container being filled: how many children are still to come, and for maps,
+    # the key waiting for its value; the root is collected in a plain list
+    root: List[Any] = []
+    append = root.append
+    remaining = 1
+    is_map = False
+    key: Any = None
+    stack: List[Tuple[Any, int, bool, Any]] = []
+    start = 0
+    while True:
+        kind = data[pos]
+        # varints are almost always a single byte, so that case is read inline
+        n = data[pos + 1]
+        if n < 0x80:
+            pos += 2
+        else:
+            n, pos = _read_varint(data, pos + 1)
+        start += -((n + 1) >> 1) if n & 1 else n >> 1
+        n = data[pos]
+        if n < 0x80:
+            pos += 1
+        else:
+            n, pos = _read_varint(data, pos)
+        end = start + n
+
+        if kind == FLOAT:
+            node: Any = Literal(unpack_float(data, pos)[0], start, end)
+            pos += 8
+            n = 0
+        else:
+            n = data[pos]
+            if n < 0x80:
+                pos += 1
+            else:
+                n, pos = _read_varint(data, pos)
+            if kind < NAME:
+                node = classes[kind]()
+                node.start = start
+                node.end = end
+            elif kind == NAME:
+                node = Name(strings[n], start, end)
+            elif kind == STRING:
+                node = Literal(strings[n], start, end)
+            elif kind == INTEGER:
+                node = Literal(_unzigzag(n), start, end)
+            else:
+                raise ValueError(f"unknown node kind {kind}")
+
+        if not is_map:
+            append(node)
+        elif key is None:
+            key = node
+        else:
+            append((key, node))
+            key = None
+        remaining -= 1
+
+        if kind < NAME and n:
+            stack.append((append, remaining, is_map, key))
+            append = node.append
+            is_map = kind == MAP
+            remaining = n * 2 if is_map else n
+            key = None
+        else:
+            while not remaining:
+                if not stack:
+                    if pos != len(data):
+                        raise ValueError("trailing data after encoded AST")
+                    return root[0]
+                append, remaining, is_map, key = stack.pop()
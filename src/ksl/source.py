@@ -0,0 +1,131 @@
+import re
+import weakref
+from array import array
+from bisect import bisect_right
+from typing import Any, Iterator, Match, MutableSequence, Optional, Tuple
+
+from ksl.types import Buffer, Path
+
+_str_newlines = re.compile("\n")
+# mapped files are lexed as if read in text mode, so all line endings count
+_bytes_newlines = re.compile(b"\r\n|\r|\n")
+
+
+class LineIndex:
+    """
+    Maps offsets into a source to 1-based (line, column) locations.
+
+    The offsets of line starts are only collected the first time a location is asked
+    for, then each lookup is a binary search. Columns count characters, even when the
+    offsets into a mapped file count bytes.
+
+    Before a mapped file is closed the errors still around which point into it are
+    located; nothing more can be once it is.
+    """
+
+    def __init__(
+        self, source: Buffer = "", starts: Optional[MutableSequence[int]] = None
+    ):
+        self._source = source
+        # sources which are read as a stream record their line starts as they go
+        self._recorded = starts is not None
+        self._starts = starts
+        # number of the line starting at _starts[0]
+        self._first_line = 1
+        self.closed = False
+        # errors which may still need to be located when the source is closed
+        self._errors: "weakref.WeakSet[SourceError]" = weakref.WeakSet()
+
+    def _line_starts(self) -> MutableSequence[int]:
+        if self._starts is None:
+            newlines: Iterator[Match[Any]]
+            if isinstance(self._source, str):
+                newlines = _str_newlines.finditer(self._source)
+            else:
+                newlines = _bytes_newlines.finditer(self._source)
+            starts = array("Q", [0])
+            starts.extend(m.end() for m in newlines)
+            self._starts = starts
+        return self._starts
+
+    def location(self, offset: int) -> Tuple[int, int]:
+        if self.closed:
+            raise ValueError("the source of the line index has been closed")
+        starts = self._line_starts()
+        i = bisect_right(starts, offset)
+        start = starts[i - 1]
+        line = self._first_line + i - 1
+        if isinstance(self._source, str):
+            return line, offset - start + 1
+        data = self._source[start:offset]
+        return line, len(data.decode("utf-8", "replace")) + 1
+
+    def _close(self) -> None:
+        """Stops using a mapped source, locating the errors which point into it first"""
+        for error in list(self._errors):
+            error.location
+        self._source = b""
+        self._starts = None
+        self.closed = True
+
+    def discard(self, offset: int) -> None:
+        """
+        Forgets the recorded starts of the lines before the one holding ``offset``
+
+        Only offsets from that line on can be located afterwards. Indexes of whole
+        sources are left as they are.
+        """
+        if self._recorded:
+            starts = self._line_starts()
+            i = bisect_right(starts, offset) - 1
+            if i > 0:
+                del starts[:i]
+                self._first_line += i
+
+
+class SourceError(Exception):
+    """
+    Error at a point in a source.
+
+    ``offset`` is where the error was found; its line and column are only worked out
+    when the error is formatted or :attr:`location` is asked for.
+    """
+
+    def __init__(
+        self,
+        msg: str,
+        path: Optional[Path] = None,
+        offset: Optional[int] = None,
+        lines: Optional[LineIndex] = None,
+    ):
+        super().__init__(msg)
+        self.msg = msg
+        self.path = path
+        self.offset = offset
+        self.lines = lines
+        if lines is not None and not isinstance(lines._source, str):
+            lines._errors.add(self)
+
+    _location: Optional[Tuple[int, int]] = None
+
+    @property
+    def location(self) -> Optional[Tuple[int, int]]:
+        if self._location is None:
+            lines = self.lines
+            if self.offset is not None and lines is not None and not lines.closed:
+                self._location = lines.location(self.offset)
+        return self._location
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # the source isn't sent along, so work out the location while it's at hand
+        state = {"_location": self.location}
+        return type(self), (self.msg, self.path, self.offset), state
+
+    def __str__(self) -> str:
+        location = self.location
+        if location is None:
+            return self.msg
+        line, column = location
+        if self.path:
+            return f"{self.path}:{line}:{column}: {self.msg}"
+        return f"{line}:{column}: {self.msg}"
@@ -0,0 +1,144 @@
+"""
+Opt-in instrumentation of lexing and parsing.
+
+:func:`instrument` wraps the routines of a single lexer or parser object in timing
+and counting shims, stored on the object itself; classes are left alone, so objects
+which aren't instrumented run exactly as fast as before.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Counter, Dict, List, Optional, Union
+
+from ksl.lex import BaseLexer
+from ksl.parse import Parser
+from ksl.tokens import Dedent, Indent, Token
+
+# prefixes of the routines timed: the lexers' token scanners and the parse rules
+_ROUTINES = ("_capture_", "_scan_", "_parse_")
+
+
+@dataclass
+class Stats:
+    """
+    What an instrumented lexer and parser did.
+
+    ``times`` are inclusive, so a rule's time includes that of the rules it called,
+    and include the overhead of the instrumentation itself. ``on_token`` is called
+    with each token taken from the lexer, ``on_call`` with the name of each timed
+    routine and the seconds it took.
+    """
+
+    tokens: Counter[str] = field(default_factory=Counter)
+    calls: Counter[str] = field(default_factory=Counter)
+    times: Dict[str, float] = field(default_factory=dict)
+    max_indentation: int = 0
+    max_nesting: int = 0
+    on_token: Optional[Callable[[Token], None]] = None
+    on_call: Optional[Callable[[str, float], None]] = None
+
+    def report(self) -> str:
+        lines = [f"tokens: {sum(self.tokens.values())}"]
+        for kind, count in self.tokens.most_common():
+            lines.append(f"  {kind:24}{count:>10}")
+        lines.append(f"{'routine':26}{'calls':>10}{'total ms':>12}{'per call us':>14}")
+        for name, seconds in sorted(self.times.items(), key=lambda item: -item[1]):
+            calls = self.calls[name]
+            lines.append(
+                f"  {name:24}{calls:>10}{seconds * 1e3:>12.2f}"
+                f"{seconds * 1e6 / calls:>14.2f}"
+            )
+        lines.append(f"max indentation depth: {self.max_indentation}")
+        lines.append(f"max expression nesting: {self.max_nesting}")
+        return "\n".join(lines)
+
+
+def instrument(
+    target: Union[BaseLexer, Parser], stats: Optional[Stats] = None
+) -> Stats:
+    """
+    Starts collecting :class:`Stats` on a lexer, or a parser and its lexer
+
+    Only calls made after this are counted. Returns ``stats``, or a new Stats if none
+    is given.
+    """
+    if stats is None:
+        stats = Stats()
+    if isinstance(target, BaseLexer):
+        _instrument_lexer(target, stats)
+        _instrument_routines(target, stats)
+    else:
+        _instrument_lexer(target.lexer, stats)
+        _instrument_routines(target.lexer, stats)
+        _instrument_parser(target, stats)
+        _instrument_routines(target, stats)
+    return stats
+
+
+def _instrument_routines(target: Any, stats: Stats) -> None:
+    names: List[str] = [
+        name
+        for name in dir(type(target))
+        if name.startswith(_ROUTINES) and callable(getattr(type(target), name))
+    ]
+    for name in names:
+        setattr(target, name, _timed(getattr(target, name), name, stats))
+
+
+def _timed(routine: Callable[..., Any], name: str, stats: Stats) -> Callable[..., Any]:
+    times = stats.times
+    calls = stats.calls
+    clock = time.perf_counter
+
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        start = clock()
+        try:
+            return routine(*args, **kwargs)
+        finally:
+            seconds = clock() - start
+            times[name] = times.get(name, 0.0) + seconds
+            calls[name] += 1
+            if stats.on_call is not None:
+                stats.on_call(name, seconds)
+
+    return timed
+
+
+def _instrument_lexer(lexer: BaseLexer, stats: Stats) -> None:
+    next_token = lexer.next
+    counts = stats.tokens
+    depth = 0
+
+    def next() -> Token:
+        nonlocal depth
+        token = next_token()
+        ttype = type(token)
+        counts[ttype.__name__] += 1
+        if ttype is Indent:
+            depth += 1
+            if depth > stats.max_indentation:
+                stats.max_indentation = depth
+        elif ttype is Dedent:
+            depth -= 1
+        if stats.on_token is not None:
+            stats.on_token(token)
+        return token
+
+    lexer.next = next  # type: ignore
+
+
+def _instrument_parser(parser: Parser, stats: Stats) -> None:
+    parse_expr = parser._parse_expr
+    depth = 0
+
+    def _parse_expr() -> Any:
+        nonlocal depth
+        depth += 1
+        if depth > stats.max_nesting:
+            stats.max_nesting = depth
+        try:
+            return parse_expr()
+        finally:
+            depth -= 1
+
+    parser._parse_expr = _parse_expr  # type: ignore
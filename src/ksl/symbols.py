@@ -0,0 +1,59 @@
+"""
+Interning of names and literals.
+
+A :class:`SymbolTable` given to a :class:`ksl.parse.Parser` makes every occurrence of
+a name or literal share a single node, so equal names are also identical and a
+module holds each distinct one only once. One table can be used for any number of
+modules.
+
+Shared nodes can't say where each occurrence of them is, so interned nodes have no
+span: their ``start`` and ``end`` are both 0.
+"""
+
+import typing
+
+import ksl.ast as ast
+
+
+class SymbolTable:
+    """
+    Canonical :class:`ksl.ast.Name` and :class:`ksl.ast.Literal` nodes.
+
+    Each distinct name is also given an integer id, in the order they're first seen.
+    """
+
+    def __init__(self) -> None:
+        self.names: typing.List[ast.Name] = []
+        self._ids: typing.Dict[str, int] = {}
+        self._literals: typing.Dict[typing.Tuple[type, typing.Any], ast.Literal] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def id(self, name: str) -> int:
+        """Id of the name, adding it if it's new"""
+        ids = self._ids
+        id = ids.get(name)
+        if id is None:
+            id = ids[name] = len(self.names)
+            self.names.append(ast.Name(name))
+        return id
+
+    def name(self, name: str) -> ast.Name:
+        """The node for a name"""
+        return self.names[self.id(name)]
+
+    def literal(self, value: typing.Any) -> ast.Literal:
+        """The node for a literal value"""
+        # 1 == 1.0 and -0.0 == 0.0, but they're all different literals
+        if type(value) is float:
+            key: typing.Tuple[type, typing.Any] = (float, repr(value))
+        else:
+            key = (type(value), value)
+        node = self._literals.get(key)
+        if node is None:
+            node = self._literals[key] = ast.Literal(value)
+        return node
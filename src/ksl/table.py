@@ -0,0 +1,151 @@
+import mmap
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Type, Union
+
+import ksl.tokens as tokens
+from ksl.lex import BaseLexer, BufferLexer
+from ksl.source import LineIndex
+from ksl.types import Path
+
+_VALUED = frozenset(
+    ttype.kind for ttype in (tokens.Name, tokens.Integer, tokens.Float, tokens.String)
+)
+
+
+class TokenTable:
+    """
+    Token stream stored as parallel arrays.
+
+    Token kinds (see :data:`ksl.tokens.KINDS`) are kept in an ``array("B")`` and the
+    start and end offsets of each token into the lexed buffer (characters for text,
+    bytes for mapped files) in integer arrays. Values of Name, Integer, Float, and
+    String tokens are kept in a side table. The stream ends with the End token.
+
+    Indexing or iterating gives back :class:`ksl.tokens.Token` views carrying their
+    spans. ``lines`` maps the offsets back to line and column numbers.
+    """
+
+    indentation: Optional[str]
+    lines: LineIndex
+
+    def __init__(self, size: int = 0):
+        # offsets can't exceed the size of the buffer, and there are never more
+        # tokens than characters plus indentation levels
+        offset_type = "I" if size < 1 << 31 else "Q"
+        self.kinds = array("B")
+        self.starts = array(offset_type)
+        self.ends = array(offset_type)
+        self.values: List[Any] = []
+        # index of the token each entry in values belongs to
+        self.valued = array(offset_type)
+        self.indentation = None
+        self.lines = LineIndex()
+
+    def append(self, kind: int, start: int, end: int, value: Any = None) -> None:
+        if kind in _VALUED:
+            self.valued.append(len(self.kinds))
+            self.values.append(value)
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, i: int) -> tokens.Token:
+        kind = self.kinds[i]
+        value = self.value(i) if kind in _VALUED else None
+        return tokens.KINDS[kind](value, self.starts[i], self.ends[i])
+
+    def __iter__(self) -> Iterator[tokens.Token]:
+        values = iter(self.values)
+        for kind, start, end in zip(self.kinds, self.starts, self.ends):
+            value = next(values) if kind in _VALUED else None
+            yield tokens.KINDS[kind](value, start, end)
+
+    def value(self, i: int) -> Any:
+        """Value of the i-th token, which must be a Name, Integer, Float, or String"""
+        if i < 0:
+            i += len(self.kinds)
+        return self.values[bisect_left(self.valued, i)]
+
+    def span(self, i: int) -> Tuple[int, int]:
+        return self.starts[i], self.ends[i]
+
+
+class _TableBuilder(BufferLexer):
+    """BufferLexer which emits into a TokenTable instead of making Token objects"""
+
+    def __init__(
+        self,
+        *,
+        source: Optional[Union[str, TextIO]],
+        path: Path,
+        indentation: Optional[str] = None,
+    ):
+        super().__init__(source=source, path=path, indentation=indentation)
+        self.table = TokenTable(len(self._buffer))
+        # names and strings repeat a lot, so the value table only keeps one copy
+        self._strings: Dict[str, str] = {}
+
+    def _emit(self, ttype: Type[tokens.Token], value: Optional[Any] = None) -> None:
+        if type(value) is str:
+            value = self._strings.setdefault(value, value)
+        self.table.append(ttype.kind, self._start, self._pos, value)
+
+    def build(self) -> TokenTable:
+        kinds = self.table.kinds
+        with self:
+            while not kinds or kinds[-1] != tokens.End.kind:
+                self._lex()
+            if isinstance(self._buffer, mmap.mmap):
+                # the table outlives the map, so it's located in a copy of the file
+                self.table.lines = LineIndex(self._buffer[:])
+            else:
+                self.table.lines = self.lines
+        self.table.indentation = self.indentation
+        return self.table
+
+
+def tokenize(
+    source: Optional[Union[str, TextIO]] = None,
+    path: Path = "",
+    indentation: Optional[str] = None,
+) -> TokenTable:
+    """
+    Lexes a whole source into a :class:`TokenTable`.
+
+    As with :class:`ksl.lex.BufferLexer`, if no ``source`` is given the file at
+    ``path`` is memory-mapped and lexed in place. The map is closed once lexed, so
+    the table's offsets are then located in a copy of the file.
+    """
+    return _TableBuilder(source=source, path=path, indentation=indentation).build()
+
+
+class TableLexer(BaseLexer):
+    """Replays the tokens of a :class:`TokenTable`, as if lexing them"""
+
+    _branches = True
+
+    def __init__(self, table: TokenTable, path: Path = ""):
+        super().__init__(source=None, path=path, indentation=table.indentation)
+        self.lines = table.lines
+        self._table = table
+        self._index = 0
+        self._value = 0
+
+    def _lex(self) -> None:
+        table = self._table
+        i = self._index
+        kind = table.kinds[i]
+        value = None
+        if kind in _VALUED:
+            value = table.values[self._value]
+            self._value += 1
+        self._lookahead.append(
+            tokens.KINDS[kind](value, table.starts[i], table.ends[i])
+        )
+        # like the other lexers, keep producing End once the source is exhausted
+        if kind != tokens.End.kind:
+            self._index += 1
@@ -1,102 +1,131 @@
-from dataclasses import dataclass
-from typing import Any, Optional
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Optional, Tuple, Type
 
 
 @dataclass(frozen=True)
 class Token:
     value: Optional[Any] = None
+    # offsets into the lexed source of the token's first character and the one past
+    # its last; they don't take part in comparisons
+    start: int = field(default=0, compare=False, repr=False)
+    end: int = field(default=0, compare=False, repr=False)
+    # small integer identifying the token type, indexes KINDS
+    kind: ClassVar[int]
 
 
 @dataclass(frozen=True)
 class Indent(Token):
-    pass
+    kind: ClassVar[int] = 0
 
 
 @dataclass(frozen=True)
 class Nodent(Token):
-    pass
+    kind: ClassVar[int] = 1
 
 
 @dataclass(frozen=True)
 class Dedent(Token):
-    pass
+    kind: ClassVar[int] = 2
 
 
 @dataclass(frozen=True)
 class Name(Token):
-    pass
+    kind: ClassVar[int] = 3
 
 
 @dataclass(frozen=True)
 class Integer(Token):
-    pass
+    kind: ClassVar[int] = 4
 
 
 @dataclass(frozen=True)
 class Float(Token):
-    pass
+    kind: ClassVar[int] = 5
 
 
 @dataclass(frozen=True)
 class String(Token):
-    pass
+    kind: ClassVar[int] = 6
 
 
 @dataclass(frozen=True)
 class LParen(Token):
-    pass
+    kind: ClassVar[int] = 7
 
 
 @dataclass(frozen=True)
 class RParen(Token):
-    pass
+    kind: ClassVar[int] = 8
 
 
 @dataclass(frozen=True)
 class LCurly(Token):
-    pass
+    kind: ClassVar[int] = 9
 
 
 @dataclass(frozen=True)
 class RCurly(Token):
-    pass
+    kind: ClassVar[int] = 10
 
 
 @dataclass(frozen=True)
 class LBracket(Token):
-    pass
+    kind: ClassVar[int] = 11
 
 
 @dataclass(frozen=True)
 class RBracket(Token):
-    pass
+    kind: ClassVar[int] = 12
 
 
 @dataclass(frozen=True)
 class Colon(Token):
-    pass
+    kind: ClassVar[int] = 13
 
 
 @dataclass(frozen=True)
 class Comma(Token):
-    pass
+    kind: ClassVar[int] = 14
 
 
 @dataclass(frozen=True)
 class Semicolon(Token):
-    pass
+    kind: ClassVar[int] = 15
 
 
 @dataclass(frozen=True)
 class Tick(Token):
-    pass
+    kind: ClassVar[int] = 16
 
 
 @dataclass(frozen=True)
 class Start(Token):
-    pass
+    kind: ClassVar[int] = 17
 
 
 @dataclass(frozen=True)
 class End(Token):
-    pass
+    kind: ClassVar[int] = 18
+
+
+KINDS: Tuple[Type[Token], ...] = (
+    Indent,
+    Nodent,
+    Dedent,
+    Name,
+    Integer,
+    Float,
+    String,
+    LParen,
+    RParen,
+    LCurly,
+    RCurly,
+    LBracket,
+    RBracket,
+    Colon,
+    Comma,
+    Semicolon,
+    Tick,
+    Start,
+    End,
+)
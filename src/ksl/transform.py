@@ -0,0 +1,111 @@
+"""
+Transformations of ASTs.
+
+:func:`to_prefix` rewrites infix expressions into prefix ones, following the rules
+in the README: the first two elements of an expression of 3 or more are swapped, and
+the rest are rewritten the same way, into a sub-expression of their own. So
+``a + b * c`` becomes ``+ a (* b c)``.
+"""
+
+import itertools
+import operator
+import typing
+from typing import List, Optional, Tuple
+
+import ksl.ast as ast
+
+# the nodes which hold infix expressions; other containers, and the ones derived
+# from these, like modules, only have their children rewritten
+_INFIX = (ast.Expression, ast.Line)
+# for checking whether any children are containers
+_LISTS = itertools.repeat(list)
+
+
+def to_prefix(node: ast.Node) -> ast.Node:
+    """
+    Rewrites the infix expressions and lines in an AST into prefix form.
+
+    Expressions of 0, 1, or 2 elements stay as they are. A single element left over
+    after the last swap is used as is, rather than put in a sub-expression, so
+    ``a + b`` becomes ``+ a b``. The sub-expressions made span the elements in them.
+
+    The tree is walked with an explicit stack and each chain is rewritten in one pass
+    from its end, so neither long chains nor deep nesting recurse. Nodes are only
+    rebuilt if they or their children change; the rest, including the whole tree if
+    nothing changes, are returned as they are.
+    """
+    if not isinstance(node, list):
+        return node
+    result: List[ast.Node] = [node]
+    # containers to rewrite, each with the list and index to put the result in, and
+    # once the containers nested in it have been rewritten, the list of its children
+    # they were put in; leaves are never rewritten, so they're left out
+    stack: List[Tuple[ast.Node, List[ast.Node], int, Optional[List[ast.Node]]]]
+    stack = [(typing.cast(ast.Node, node), result, 0, None)]
+    while stack:
+        node, out, index, children = stack.pop()
+        if children is None:
+            children = _children(node)
+            if any(map(isinstance, children, _LISTS)):
+                stack.append((node, out, index, children))
+                stack.extend(
+                    (child, children, i, None)
+                    for i, child in enumerate(children)
+                    if isinstance(child, list)
+                )
+                continue
+        out[index] = _rebuild(node, children)
+    return result[0]
+
+
+def _children(node: ast.Node) -> List[ast.Node]:
+    """Copy of a container's children, with the keys and values of maps interleaved"""
+    if isinstance(node, ast.Map):
+        return [child for pair in node for child in pair]
+    return node[:]  # type: ignore
+
+
+def _rebuild(node: ast.Node, children: List[ast.Node]) -> ast.Node:
+    """The node, given its rewritten children"""
+    if type(node) in _INFIX and len(children) > 2:
+        return _lower(node, children)
+    if isinstance(node, ast.Map):
+        if all(map(operator.is_, children, _children(node))):
+            return node
+        rebuilt: ast.Node = ast.Map(zip(children[::2], children[1::2]))
+    else:
+        if all(map(operator.is_, children, node)):  # type: ignore
+            return node
+        # lazy paragraphs have been expanded by now
+        cls = ast.Paragraph if isinstance(node, ast.Paragraph) else type(node)
+        rebuilt = cls(children)  # type: ignore
+    rebuilt.start = node.start
+    rebuilt.end = node.end
+    return rebuilt
+
+
+def _lower(node: ast.Node, elems: List[ast.Node]) -> ast.Node:
+    """Rewrites an infix expression of at least 3 elements into prefix form"""
+    # the last pair swapped starts at the last even index at least 3 from the end;
+    # what's after it is the innermost sub-expression, and the rest are built around
+    # it outwards
+    i = len(elems) - 3
+    i -= i % 2
+    rest = elems[i + 2 :]
+    inner = (
+        rest[0] if len(rest) == 1 else _span(ast.Expression(rest), rest[0], rest[-1])
+    )
+    while i > 0:
+        inner = _span(ast.Expression([elems[i + 1], elems[i], inner]), elems[i], inner)
+        i -= 2
+    lowered = type(node)([elems[1], elems[0], inner])  # type: ignore
+    lowered.start = node.start
+    lowered.end = node.end
+    return lowered
+
+
+def _span(node: ast.Expression, first: ast.Node, last: ast.Node) -> ast.Expression:
+    """Gives a new sub-expression the span from its first element to its last"""
+    node.start = first.start
+    node.end = last.end
+    return node
@@ -1,4 +1,9 @@
+import mmap
 import os
 from typing import Union
 
 Path = Union[str, "os.PathLike[str]"]
+
+# the source of a lexer held as a single buffer, either decoded text or the raw UTF-8
+# bytes of a (memory-mapped) file
+Buffer = Union[str, bytes, mmap.mmap]
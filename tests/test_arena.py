@@ -0,0 +1,55 @@
+import pytest
+from test_parse import L, N, dump, spans
+
+import ksl.ast as ast
+from ksl.arena import INTEGER, MAP, NAME, Arena
+from ksl.parse import parse_module
+
+SOURCE = """\
+def f [a, b,]:
+  set x {a: 1, b: 2.5, 'c': [a, {a, b,},],}
+  if (a < b):
+    print 'a' x
+"""
+
+
+def test_arena_round_trip():
+    module = parse_module(SOURCE)
+    arena = Arena.from_ast(module)
+    copy = arena.to_ast()
+    assert dump(copy) == dump(module)
+    assert spans(copy) == spans(module)
+
+
+def test_arena_subtree():
+    module = parse_module(SOURCE)
+    arena = Arena.from_ast(module)
+    line = arena.root[0]
+    assert dump(line.to_ast()) == dump(module[0])
+
+
+def test_arena_pools_values():
+    arena = Arena.from_ast(parse_module("a a a 1 1 '1' 1.0 0.0 -0.0 0.0\n"))
+    assert sorted(map(repr, arena.pool)) == ["'1'", "'a'", "-0.0", "0.0", "1", "1.0"]
+
+
+def test_cursor():
+    arena = Arena.from_ast(parse_module("set x {a: 1,}\n"))
+    (line,) = arena.root
+    assert len(line) == 3
+    assert line[0].kind == NAME and line[0].value == "set"
+    assert line[-1].kind == MAP
+    ((key, value),) = line[2]
+    assert (key.value, value.kind, value.value) == ("a", INTEGER, 1)
+    assert (value.start, value.end) == (10, 11)
+    with pytest.raises(IndexError):
+        line[3]
+    with pytest.raises(TypeError):
+        line.value
+
+
+def test_arena_leaves():
+    with pytest.raises(ValueError):
+        Arena.from_ast(ast.Literal(None))
+    assert dump(Arena.from_ast(N("a")).to_ast()) == dump(N("a"))
+    assert dump(Arena.from_ast(L(1.5)).to_ast()) == dump(L(1.5))
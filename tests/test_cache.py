@@ -0,0 +1,108 @@
+import os
+import pathlib
+import time
+
+import pytest
+from test_parse import dump, spans
+
+import ksl.cache
+from ksl.cache import ParseCache
+from ksl.lex import BufferLexer
+from ksl.parse import parse_module
+
+SRC = "a b\n  c [1, 'é',]\nd {e: 2.5,}\n"
+
+
+def no_lexing(self: BufferLexer) -> None:
+    raise AssertionError("lexed a cached module")
+
+
+def test_cache_hit(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ParseCache(tmp_path / "cache")
+    module = cache.parse_module(SRC)
+    assert len(list(cache.directory.iterdir())) == 1
+    monkeypatch.setattr(BufferLexer, "_lex", no_lexing)
+    cached = cache.parse_module(SRC)
+    assert dump(cached) == dump(module)
+    assert spans(cached) == spans(module)
+
+
+def test_cache_file(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "test.ksl"
+    path.write_text(SRC, encoding="utf-8")
+    cache = ParseCache(tmp_path / "cache")
+    expected = parse_module(path=path)
+    cache.parse_module(path=path)
+    # files and text are cached apart, since spans in files count bytes
+    cache.parse_module(SRC)
+    assert len(list(cache.directory.iterdir())) == 2
+    monkeypatch.setattr(BufferLexer, "_lex", no_lexing)
+    assert spans(cache.parse_module(path=path)) == spans(expected)
+
+
+def test_cache_file_stat(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "test.ksl"
+    path.write_text(SRC, encoding="utf-8")
+    old = time.time() - 60
+    os.utime(path, (old, old))
+    cache = ParseCache(tmp_path / "cache")
+    expected = dump(cache.parse_module(path=path))
+
+    def no_hashing(*args: object) -> bytes:
+        raise AssertionError("hashed an unchanged file")
+
+    # files whose size and mtime are as they were aren't read again
+    with monkeypatch.context() as m:
+        m.setattr(ParseCache, "_key", no_hashing)
+        m.setattr(BufferLexer, "_lex", no_lexing)
+        assert dump(cache.parse_module(path=path)) == expected
+    changed = SRC.replace("a b", "x y")
+    path.write_text(changed, encoding="utf-8")
+    os.utime(path, (old + 1, old + 1))
+    assert dump(cache.parse_module(path=path)) == dump(parse_module(changed))
+    # a change within the granularity of mtimes isn't told by them, so recently
+    # modified files are always hashed
+    path.write_text(SRC, encoding="utf-8")
+    cache.parse_module(path=path)
+    now = path.stat().st_mtime_ns
+    path.write_text(changed, encoding="utf-8")
+    os.utime(path, ns=(now, now))
+    assert dump(cache.parse_module(path=path)) == dump(parse_module(changed))
+
+
+def test_cache_key(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ParseCache(tmp_path)
+    cache.parse_module(SRC)
+    cache.parse_module(SRC, indentation="  ")
+    cache.parse_module(SRC + "f g\n")
+    monkeypatch.setattr(ksl.cache, "__version__", "999")
+    cache.parse_module(SRC)
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_cache_stale(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ParseCache(tmp_path)
+    expected = dump(cache.parse_module(SRC))
+    (entry,) = tmp_path.iterdir()
+    entry.write_bytes(entry.read_bytes()[:-10])
+    assert dump(cache.parse_module(SRC)) == expected
+    monkeypatch.setattr(ksl.cache, "FORMAT", ksl.cache.FORMAT + 1)
+    assert dump(cache.parse_module(SRC)) == expected
+    assert entry.read_bytes()[4] == ksl.cache.FORMAT
+
+
+def test_cache_eviction(tmp_path: pathlib.Path) -> None:
+    cache = ParseCache(tmp_path)
+    cache.parse_module(SRC)
+    (first,) = tmp_path.iterdir()
+    cache.max_size = first.stat().st_size * 3
+    for i in range(10):
+        cache.parse_module(f"{SRC}x{i}\n")
+    entries = list(tmp_path.iterdir())
+    assert 1 < len(entries) <= 3
+    assert first not in entries
+    assert sum(entry.stat().st_size for entry in entries) <= cache.max_size
+    cache.clear()
+    assert not list(tmp_path.iterdir())
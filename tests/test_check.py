@@ -0,0 +1,67 @@
+import pathlib
+from typing import List
+
+import pytest
+
+from ksl.check import check
+from ksl.lex import LexError
+from ksl.parse import ParseError, parse_module
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        "a [1, 2,] {3: 4.5, 'x': {},} {b, (c d),}\n  (e f) g\n    h i;\n  j k\nl m",
+        "a b\n  c d:\n\te f",
+        "a;",
+        "a b; c",
+        "(a",
+        "[a b]",
+        "{a b}",
+        "{a: b c}",
+        "{a: b, c d}",
+        ")",
+        "a b\n  c\n d",
+        "a 'unterminated",
+        "a 0x",
+        "",
+    ],
+)
+def test_check_matches_parse(src: str) -> None:
+    expected: List[str] = []
+    try:
+        parse_module(src)
+    except (LexError, ParseError) as e:
+        expected = [str(e)]
+    assert [str(e) for e in check(src)] == expected
+
+
+def test_check_all_errors() -> None:
+    src = "a b\nc (\nd e\n  f ]\n  # comment\n  g h\nx 0x\ni j\nk;\n"
+    errors = check(src, all_errors=True)
+    assert [(type(e), e.location) for e in errors] == [
+        (ParseError, (3, 1)),
+        (ParseError, (4, 5)),
+        (LexError, (7, 5)),
+        (ParseError, (10, 1)),
+    ]
+    assert [str(e) for e in check(src)] == [str(errors[0])]
+
+
+def test_check_all_errors_progress() -> None:
+    errors = check(")\n)\nb c\n)", all_errors=True)
+    assert [e.location for e in errors] == [(1, 1), (2, 1), (4, 1)]
+    errors = check("a (\nb c\nd (\ne", all_errors=True)
+    assert [e.location for e in errors] == [(2, 1), (4, 1)]
+
+
+def test_check_file(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "check.ksl"
+    path.write_bytes(b"a b\r\nc [d\r\n")
+    (error,) = check(path=path)
+    assert (
+        str(error)
+        == f"{path}:3:1: expected token of type: Comma, found: End(value=None)"
+    )
+    path.write_bytes(b"a b\r\n")
+    assert check(path=path) == []
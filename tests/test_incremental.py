@@ -0,0 +1,108 @@
+import random
+from typing import Any
+
+import pytest
+from test_parse import dump, spans
+
+import ksl.ast as ast
+from ksl.incremental import Document
+from ksl.lex import LexError
+from ksl.parse import ParseError, parse_module
+from ksl.serialize import dump as encode
+from ksl.serialize import load
+
+SRC = "a b\n  c d\n  e\nf [1, 2,]\ng:\n  h i\n"
+
+
+def check(doc: Document) -> None:
+    assert doc.module is not None
+    expected = parse_module(doc.text)
+    assert dump(doc.module) == dump(expected)
+    assert spans(doc.module) == spans(expected)
+
+
+def test_edit_reuses_blocks() -> None:
+    doc = Document(SRC)
+    assert doc.module is not None
+    first, second, third = doc.module
+    module = doc.edit(SRC.index("f") + 1, SRC.index("f") + 1, "oo")
+    check(doc)
+    assert module[0] is first
+    assert module[1] is not second
+    assert module[2] is third
+
+
+def test_edit_moves_spans_lazily() -> None:
+    doc = Document(SRC)
+    assert doc.module is not None
+    third = doc.module[2]
+    module: Any = doc.edit(0, 1, "xyz")
+    assert type(module) is ast.LazyModule
+    assert third.start == SRC.index("g")
+    # edits add up until the module is used
+    doc.edit(2, 3, "")
+    doc.edit(SRC.index("f") + 1, SRC.index("f") + 1, "")
+    assert third.start == SRC.index("g")
+    expected = parse_module(doc.text)
+    assert load(encode(doc.edit(0, 0, ""))) == expected
+    check(doc)
+    assert third.start == SRC.index("g") + 1
+    module = doc.edit(0, 1, "xy")
+    assert module[2] is third
+    assert type(module) is ast.Module
+    assert spans(module) == spans(parse_module(doc.text))
+
+
+def test_edit_joins_previous_block() -> None:
+    doc = Document(SRC)
+    doc.edit(SRC.index("f"), SRC.index("f"), "  ")
+    check(doc)
+    assert doc.module is not None
+    assert len(doc.module) == 2
+
+
+def test_edit_indentation() -> None:
+    doc = Document("a\nb c:\n  d\n")
+    doc.edit(0, 0, "x y:\n  z\n")
+    check(doc)
+    doc.edit(0, 9, "")
+    check(doc)
+    assert doc.indentation == "  "
+    with pytest.raises(LexError):
+        doc.edit(0, 0, "x y:\n\tz\n")
+
+
+def test_edit_error_recovers() -> None:
+    doc = Document(SRC)
+    with pytest.raises(ParseError):
+        doc.edit(0, 1, "(")
+    assert doc.module is None
+    doc.edit(0, 1, "z")
+    check(doc)
+
+
+def test_edit_random() -> None:
+    rng = random.Random(0)
+    pieces = ["a", "b c", "(d e)", "[1,]", "{x: 2,}", "\n", "\n  ", "\n\t", " "]
+    pieces += [":", ";", "'s\ntr'", "# c\n", "\n  x y\n  z"]
+    for _ in range(200):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        try:
+            doc = Document(text)
+        except (LexError, ParseError):
+            continue
+        for _ in range(5):
+            start = rng.randint(0, len(doc.text))
+            end = rng.randint(start, min(len(doc.text), start + 6))
+            replacement = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 2)))
+            text = doc.text[:start] + replacement + doc.text[end:]
+            try:
+                expected: Any = dump(parse_module(text))
+            except (LexError, ParseError) as e:
+                expected = str(e)
+            try:
+                doc.edit(start, end, replacement)
+            except (LexError, ParseError) as e:
+                assert str(e) == expected
+            else:
+                check(doc)
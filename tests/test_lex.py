@@ -1,11 +1,13 @@
+import asyncio
+import pathlib
 from io import StringIO
 from textwrap import dedent
-from typing import Any, Type
+from typing import Any, List, Type
 
 import pytest
 
 import ksl.tokens as tokens
-from ksl.lex import Lexer, LexError
+from ksl.lex import AsyncLexer, BaseLexer, BufferLexer, Lexer, LexError
 
 
 def simple_test(
@@ -218,3 +220,134 @@ def test_lexer_token_iter() -> None:
     assert lexer.next() == tokens.Identifier("abc")
     assert lexer.next() == tokens.End()
     assert lexer.next() == tokens.End()
+
+
+def lex_all(lexer_type: Type[BaseLexer], src: str) -> List[Any]:
+    """Returns all tokens up to the first error, followed by that error's message"""
+    result: List[Any] = []
+    try:
+        result.extend(lexer_type(source=src, path=""))
+    except LexError as e:
+        result.append(str(e))
+    return result
+
+
+SOURCES = [
+    "",
+    "\n\n# only a comment",
+    "a b\n    c d\n        e\n    f\ng",
+    "a\n\tb\n\t\tc\n",
+    "()[]{}:`,;",
+    "-- -. .. -.x .x \\(a\\ b\\",
+    "a(",
+    ".5",
+    "-.5",
+    "0x 0o 0b",
+    "0xfg",
+    "0o8",
+    "0b2",
+    "0b1 0o7 0xF 0 -0 007 -007",
+    "1. 1.5 1e5 1.5E10 -1.5e-3",
+    "1e",
+    "1.5.5",
+    "'wew' \"wew\\n\" 'a\\'b' \"multi\nline\"",
+    "'unterminated",
+    "'bad \\escape'",
+    "'ends with escape\\",
+    "a # comment\nb",
+    "  a\n\tb",
+    " \ta",
+    "a\r\n",
+    "@",
+    "\0",
+]
+
+
+@pytest.mark.parametrize("src", SOURCES)
+def test_buffer_lexer_matches_reference(src: str) -> None:
+    assert lex_all(BufferLexer, src) == lex_all(Lexer, src)
+
+
+@pytest.mark.parametrize("src", SOURCES)
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_lexer_chunks(src: str, chunk_size: int) -> None:
+    def lex(lexer: Lexer) -> List[Any]:
+        try:
+            return [(t, t.start, t.end) for t in lexer]
+        except LexError as e:
+            return [str(e)]
+
+    assert lex(Lexer(source=StringIO(src), path="", chunk_size=chunk_size)) == lex(
+        Lexer(source=src, path="")
+    )
+
+
+def test_lexer_long_stream() -> None:
+    lexer = Lexer(source=StringIO("a b\n" * 10000 + "c 1x"), path="", chunk_size=7)
+    with pytest.raises(LexError) as e:
+        list(lexer)
+    assert e.value.location == (10001, 4)
+    assert len(lexer._line_starts) <= Lexer._KEPT_LINES + 1
+
+
+async def lex_async(data: bytes, chunk_size: int) -> List[Any]:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    result: List[Any] = []
+    try:
+        async for token in AsyncLexer(reader, chunk_size=chunk_size):
+            result.append((token, token.start, token.end))
+    except LexError as e:
+        result.append(str(e))
+    return result
+
+
+@pytest.mark.parametrize("src", [src for src in SOURCES if "\r" not in src])
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_async_lexer_matches_reference(src: str, chunk_size: int) -> None:
+    expected = [
+        (t, t.start, t.end) if isinstance(t, tokens.Token) else t
+        for t in lex_all(Lexer, src)
+    ]
+    assert asyncio.run(lex_async(src.encode(), chunk_size)) == expected
+
+
+def test_async_lexer_decodes() -> None:
+    # multi-byte characters and line endings split across chunks
+    data = "a\r\n  'é\r\n'\r  b".encode()
+    toks = [t for t, _, _ in asyncio.run(lex_async(data, 1))]
+    assert toks == lex_all(Lexer, "a\n  'é\n'\n  b")
+
+
+def test_buffer_lexer_sources(tmp_path: pathlib.Path) -> None:
+    src = "a b\n  1 2.5 'c'\n"
+    expected = lex_all(Lexer, src)
+    assert list(BufferLexer(source=StringIO(src), path="")) == expected
+    path = tmp_path / "test.ksl"
+    path.write_text(src)
+    assert list(BufferLexer(source=None, path=path)) == expected
+
+
+def test_buffer_lexer_mapped_file(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "test.ksl"
+    path.write_bytes("a\r\n  b 'c\r\né' x\\é\r  -1.5e3 # é\r\n".encode())
+    assert list(BufferLexer(source=None, path=path)) == [
+        tokens.Nodent(),
+        tokens.Name("a"),
+        tokens.Indent(),
+        tokens.Name("b"),
+        tokens.String("c\né"),
+        tokens.Name("xé"),
+        tokens.Nodent(),
+        tokens.Float(-1.5e3),
+        tokens.Dedent(),
+    ]
+    assert list(BufferLexer(source=None, path=path)) == list(
+        Lexer(source=None, path=path)
+    )
+    path.write_bytes("a\n  é".encode())
+    with pytest.raises(LexError, match="unexpected character 'é'"):
+        list(BufferLexer(source=None, path=path))
+    path.write_bytes(b"")
+    assert list(BufferLexer(source=None, path=path)) == []
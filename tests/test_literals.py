@@ -0,0 +1,79 @@
+import random
+from ast import literal_eval
+
+import pytest
+
+from ksl.literals import (
+    ESCAPES,
+    decode_based_int,
+    decode_float,
+    decode_int,
+    decode_string,
+)
+
+
+@pytest.mark.parametrize("text", ["0", "7", "-1", "007", "-0010", "123456789" * 4])
+def test_decode_int(text: str) -> None:
+    expected = literal_eval(text.lstrip("-").lstrip("0") or "0")
+    if text.startswith("-"):
+        expected = -expected
+    assert decode_int(text) == expected
+    assert decode_int(text.encode()) == expected
+
+
+@pytest.mark.parametrize("text", ["0x1F", "0XfF", "0o17", "0O0", "0b101", "0B0"])
+def test_decode_based_int(text: str) -> None:
+    assert decode_based_int(text) == literal_eval(text)
+    assert decode_based_int(text.encode()) == literal_eval(text)
+
+
+@pytest.mark.parametrize("text", ["1.5", "-0.25", "1.", "1e5", "2.5E-3", "1e999"])
+def test_decode_float(text: str) -> None:
+    value = decode_float(text)
+    assert type(value) is float
+    assert value == literal_eval(text.lstrip("-")) * (-1 if text[0] == "-" else 1)
+    assert decode_float(text.encode()) == value
+
+
+def test_decode_cached() -> None:
+    assert decode_int("1234567") is decode_int("1234567")
+    assert decode_float("0.5") is decode_float("0.5")
+
+
+def literal_eval_string(string: str) -> str:
+    # how strings were decoded before, as a reference
+    s = string[0]
+    return literal_eval(f"{s}{s}{string}{s}{s}")
+
+
+@pytest.mark.parametrize(
+    "string",
+    [
+        "''",
+        "'abc'",
+        "'é\\n\\t\\\\'",
+        "'a\\'b\\\"c'",
+        '"a\'b"',
+        "'\\a\\b\\f\\r\\v'",
+        "'x\ny\r\nz\rw'",
+        "'\\\\\r\n'",
+    ],
+)
+def test_decode_string(string: str) -> None:
+    expected = literal_eval_string(string)
+    assert decode_string(string, 1, len(string) - 1) == expected
+    data = string.encode("utf-8")
+    assert decode_string(data, 1, len(data) - 1) == expected
+
+
+def test_decode_string_random() -> None:
+    rng = random.Random(0)
+    pieces = ["a", "é", " ", "\n", "\r", "\r\n", "'"]
+    pieces += ["\\" + c for c in ESCAPES]
+    for _ in range(500):
+        body = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 10)))
+        string = f'"{body}"'
+        expected = literal_eval_string(string)
+        assert decode_string(string, 1, len(string) - 1) == expected
+        data = f"xx{string}yy".encode("utf-8")
+        assert decode_string(data, 3, len(data) - 3) == expected
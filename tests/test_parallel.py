@@ -0,0 +1,119 @@
+import pathlib
+import pickle
+from typing import Dict, List
+
+import pytest
+from test_parse import dump, spans
+
+from ksl.lex import LexError
+from ksl.parallel import _split, parse_many, parse_module_parallel
+from ksl.parse import ParseError, parse_module
+
+SOURCES = {
+    "a.ksl": "a b\n  c [1, 2,]\n",
+    "b.ksl": "d {e: 'f',}\n" * 200,
+    "c.ksl": "g (h\n",
+    "d.ksl": "i 'j\n",
+    "e.ksl": "",
+}
+
+
+def write_sources(tmp_path: pathlib.Path) -> List[pathlib.Path]:
+    paths = []
+    for name, text in SOURCES.items():
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_many(tmp_path: pathlib.Path, workers: int) -> None:
+    paths = write_sources(tmp_path) + [tmp_path / "missing.ksl"]
+    results = {r.path: r for r in parse_many(paths, workers=workers)}
+    assert set(results) == set(paths)
+    for path in paths[:2] + paths[4:5]:
+        module = results[path].module
+        assert results[path].error is None
+        expected = parse_module(path=path)
+        assert dump(module) == dump(expected)
+        assert spans(module) == spans(expected)
+    errors: Dict[str, type] = {
+        "c.ksl": ParseError,
+        "d.ksl": LexError,
+        "missing.ksl": FileNotFoundError,
+    }
+    for path in paths[2:4] + paths[5:]:
+        assert results[path].module is None
+        assert type(results[path].error) is errors[path.name]
+    # errors from workers keep their locations
+    with pytest.raises(ParseError) as e:
+        parse_module(path=paths[2])
+    assert str(results[paths[2]].error) == str(e.value)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_many_pathological(tmp_path: pathlib.Path, workers: int) -> None:
+    # files which fail with errors other than parse errors still only fail themselves
+    paths = write_sources(tmp_path)[:2]
+    deep = tmp_path / "deep.ksl"
+    deep.write_text("a " + "(" * 5000 + ")" * 5000 + "\n")
+    long = tmp_path / "long.ksl"
+    long.write_text("a " + "1" * 5000 + "\n")
+    results = {r.path: r for r in parse_many([deep, *paths, long], workers=workers)}
+    assert isinstance(results[deep].error, RecursionError)
+    assert isinstance(results[long].error, ValueError)
+    for path in paths:
+        assert results[path].error is None
+        assert dump(results[path].module) == dump(parse_module(path=path))
+
+
+def test_source_error_pickle(tmp_path: pathlib.Path) -> None:
+    (path,) = write_sources(tmp_path)[3:4]
+    with pytest.raises(LexError) as e:
+        parse_module(path=path)
+    error = pickle.loads(pickle.dumps(e.value))
+    assert type(error) is LexError
+    assert error.location == e.value.location == (2, 1)
+    assert str(error) == str(e.value)
+
+
+BIG = "".join(
+    f"# {i} 'quoted\nf{i} [x, -{i},]:\n\tprint 'multi\nline {i}'\n\tz {{a: 1,}}\n"
+    for i in range(50)
+)
+
+
+@pytest.mark.parametrize("in_file", [False, True])
+def test_parse_module_parallel(tmp_path: pathlib.Path, in_file: bool) -> None:
+    path = tmp_path / "big.ksl"
+    path.write_text(BIG)
+    source = None if in_file else BIG
+    expected = parse_module(source, path)
+    module = parse_module_parallel(source, path, workers=2, chunk_size=100)
+    assert dump(module) == dump(expected)
+    assert spans(module) == spans(expected)
+
+
+def test_parse_module_parallel_split() -> None:
+    chunks = _split(BIG, 100, None)
+    assert len(chunks) > 10
+    # chunks start at top-level blocks, never in strings or comments, and only
+    # those after the first indented line know the indentation
+    assert chunks[0] == (0, chunks[1][0], None)
+    for start, end, indentation in chunks[1:]:
+        assert BIG[start] == "f"
+        assert BIG[start - 1] == "\n"
+        assert indentation == "\t"
+
+
+@pytest.mark.parametrize(
+    "error", ["f1 [x, -1,]:\n  print", "f3 (a\n", "f5 0x\n", "  f6 'a'\n"]
+)
+def test_parse_module_parallel_errors(error: str) -> None:
+    source = BIG + error + BIG
+    with pytest.raises((LexError, ParseError)) as expected:
+        parse_module(source)
+    with pytest.raises(expected.type) as e:
+        parse_module_parallel(source, workers=2, chunk_size=100)
+    assert str(e.value) == str(expected.value)
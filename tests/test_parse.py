@@ -0,0 +1,428 @@
+import asyncio
+import io
+import pathlib
+from typing import Any, List, Tuple, Type
+
+import pytest
+
+import ksl.ast as ast
+from ksl.lex import CHUNK_SIZE, BaseLexer, BufferLexer, Lexer, LexError
+from ksl.parse import (
+    ParseError,
+    Parser,
+    RecoveringParser,
+    StackParser,
+    iter_module,
+    iter_module_async,
+    parse_block,
+    parse_expr,
+    parse_module,
+    parse_module_async,
+)
+from ksl.source import SourceError
+from ksl.table import tokenize
+
+
+def dump(node: Any) -> Any:
+    """Converts an AST into nested tuples so node types take part in comparisons"""
+    if isinstance(node, ast.Literal):
+        return node
+    if isinstance(node, ast.Name):
+        return node
+    if isinstance(node, ast.Error):
+        return ("Error", node.error.args[0])
+    if isinstance(node, ast.Map):
+        return (type(node).__name__, tuple((dump(k), dump(v)) for k, v in node))
+    return (type(node).__name__, tuple(dump(n) for n in node))
+
+
+def spans(node: Any) -> List[Tuple[int, int]]:
+    """Lists the spans of every node in an AST, depth first"""
+    result = [(node.start, node.end)]
+    if isinstance(node, ast.Map):
+        for key, value in node:
+            result += spans(key) + spans(value)
+    elif isinstance(node, list):
+        for child in node:
+            result += spans(child)
+    return result
+
+
+def L(value: Any) -> ast.Literal:
+    return ast.Literal(value)
+
+
+def N(name: str) -> ast.Name:
+    return ast.Name(name)
+
+
+def test_parse_values() -> None:
+    assert parse_expr("a") == N("a")
+    assert parse_expr("12") == L(12)
+    assert parse_expr("'s'") == L("s")
+    assert dump(parse_expr("(a 1.5)")) == ("Expression", (N("a"), L(1.5)))
+    assert dump(parse_expr("(a, b,)")) == ("Expression", (N("a"), N("b")))
+    assert dump(parse_expr("[1, 2,]")) == ("List", (L(1), L(2)))
+    assert dump(parse_expr("{1, 2,}")) == ("Set", (L(1), L(2)))
+    assert dump(parse_expr("{1: a, 2: b,}")) == (
+        "Map",
+        ((L(1), N("a")), (L(2), N("b"))),
+    )
+    assert dump(parse_expr("{}")) == ("Map", ())
+
+
+def test_parse_block() -> None:
+    assert dump(parse_block("a b c")) == ("Line", (N("a"), N("b"), N("c")))
+    assert dump(parse_block("a b;")) == ("Line", (N("a"), N("b")))
+    assert dump(parse_block("a b:\n  c d\n  e")) == (
+        "Paragraph",
+        (N("a"), N("b"), ("Line", (N("c"), N("d"))), N("e")),
+    )
+
+
+def test_parse_module() -> None:
+    src = "a\nb c\nd\n  e f\n  g\n    h i\n  j\nk l\n"
+    assert dump(parse_module(src)) == (
+        "Module",
+        (
+            N("a"),
+            ("Line", (N("b"), N("c"))),
+            (
+                "Paragraph",
+                (
+                    N("d"),
+                    ("Line", (N("e"), N("f"))),
+                    ("Paragraph", (N("g"), ("Line", (N("h"), N("i"))))),
+                    N("j"),
+                ),
+            ),
+            ("Line", (N("k"), N("l"))),
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "src",
+    ["a;", "a b; c", "(a", "[a b]", "{a b}", "{a: b c}", ")"],
+)
+def test_parse_errors(src: str) -> None:
+    with pytest.raises(ParseError):
+        parse_module(src)
+
+
+def parse_or_error(lexer_type: Type[BaseLexer], src: str) -> Any:
+    try:
+        return dump(Parser(src, "", lexer_type=lexer_type).parse_module())
+    except (LexError, ParseError) as e:
+        return str(e)
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        "a [1, 2,] {3: 4.5,}\n  (b 'c') d\n  e\nf {g, h,}\n",
+        "a b\n  c\n\td",
+        "a b\n  c\n  d e f;\n  g (",
+    ],
+)
+def test_parse_lexer_engines_agree(src: str) -> None:
+    assert parse_or_error(BufferLexer, src) == parse_or_error(Lexer, src)
+
+
+def test_parse_module_path(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "test.ksl"
+    path.write_text("a b\n  c d\n")
+    assert dump(parse_module(path=path)) == dump(parse_module("a b\n  c d\n"))
+
+
+def test_iter_module() -> None:
+    src = "a b\n  c d\n  e f\ng h\n\n(i)\n"
+    module = parse_module(src)
+    assert [dump(b) for b in iter_module(src)] == list(dump(module)[1])
+    assert [spans(b) for b in iter_module(io.StringIO(src))] == [
+        spans(b) for b in module
+    ]
+
+
+def test_iter_module_streams() -> None:
+    stream = io.StringIO("a b\n" * 100000)
+    blocks = iter_module(stream, "stream")
+    assert dump(next(blocks)) == dump(parse_block("a b"))
+    assert stream.tell() == CHUNK_SIZE
+    assert len(list(blocks)) == 99999
+    assert stream.tell() == 400000
+
+
+def test_iter_module_error_location() -> None:
+    with pytest.raises(ParseError) as e:
+        list(iter_module(io.StringIO("a b\n" * 100 + "c ]\n"), "stream"))
+    assert e.value.location == (101, 3)
+
+
+def test_parse_module_async() -> None:
+    src = "a b\n  c d\n  e [f,]\ng h\n\n(i)\n"
+
+    async def parse(chunk_size: int) -> ast.Module:
+        reader = asyncio.StreamReader()
+        reader.feed_data(src.encode())
+        reader.feed_eof()
+        return await parse_module_async(reader, chunk_size=chunk_size)
+
+    for chunk_size in (1, 5, 1024):
+        module = asyncio.run(parse(chunk_size))
+        assert dump(module) == dump(parse_module(src))
+        assert spans(module) == spans(parse_module(src))
+
+
+def test_iter_module_async_streams() -> None:
+    async def consume(reader: asyncio.StreamReader) -> int:
+        count = 0
+        async for block in iter_module_async(reader, chunk_size=3):
+            assert dump(block) == dump(parse_block(f"a{count} b"))
+            count += 1
+        return count
+
+    async def main() -> List[int]:
+        readers = [asyncio.StreamReader() for _ in range(3)]
+        tasks = [asyncio.ensure_future(consume(r)) for r in readers]
+        # the streams are parsed concurrently as their lines arrive
+        for i in range(50):
+            for reader in readers:
+                reader.feed_data(f"a{i} b\n".encode())
+            await asyncio.sleep(0)
+        for reader in readers:
+            reader.feed_eof()
+        return list(await asyncio.gather(*tasks))
+
+    assert asyncio.run(main()) == [50, 50, 50]
+
+
+def test_parse_module_async_errors() -> None:
+    async def parse(src: str) -> ast.Module:
+        reader = asyncio.StreamReader()
+        reader.feed_data(src.encode())
+        reader.feed_eof()
+        return await parse_module_async(reader, chunk_size=2)
+
+    with pytest.raises(ParseError) as e:
+        asyncio.run(parse("a b\n" * 10 + "c ] 'unterminated\n"))
+    assert e.value.location == (11, 3)
+    with pytest.raises(LexError) as e2:
+        asyncio.run(parse("a b\n" * 10 + "c 'unterminated\n"))
+    assert e2.value.location == (12, 1)
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        "a [1, 2,] {3: 4.5, 'x': {},} {b, (c d),}\n  (e f) g\n    h i;\n  j k\nl m",
+        "a b\n  c d:\n\te f",
+        "a;",
+        "a b; c",
+        "(a",
+        "[a b]",
+        "{a b}",
+        "{a: b c}",
+        "{a: b, c d}",
+        ")",
+        "a b\n  c\n d",
+    ],
+)
+def test_stack_parser(src: str) -> None:
+    def parse(parser_type: Type[Parser]) -> Any:
+        try:
+            module = parser_type(src, "").parse_module()
+        except (LexError, ParseError) as e:
+            return str(e)
+        return dump(module), spans(module)
+
+    assert parse(StackParser) == parse(Parser)
+
+
+def test_stack_parser_deep() -> None:
+    depth = 10000
+    src = "a " + "([{k: " * depth + "x" + ",},])" * depth + "\n"
+    src += "".join(" " * i + f"b{i} c\n" for i in range(depth))
+    module: Any = StackParser(src, "").parse_module()
+    node = module[0][1]
+    for _ in range(depth):
+        assert [type(node), type(node[0]), type(node[0][0])] == [
+            ast.Expression,
+            ast.List,
+            ast.Map,
+        ]
+        node = node[0][0][0][1]
+    assert node == N("x")
+    node = module[1]
+    for i in range(depth - 1):
+        assert node[0] == N(f"b{i}")
+        node = node[2]
+    assert dump(node) == ("Line", (N(f"b{depth - 1}"), N("c")))
+
+
+LAZY_SOURCE = """\
+def f [a, b,]:
+  if (a < b):
+    print a;
+
+    # comment
+    print {a: [b,],}
+  return a
+def g [] x
+set x 1
+"""
+
+
+@pytest.mark.parametrize("parser_type", [Parser, StackParser])
+def test_lazy(parser_type: Type[Parser]) -> None:
+    eager: Any = parse_module(LAZY_SOURCE)
+    module: Any = parser_type(LAZY_SOURCE, "", lazy=True).parse_module()
+    assert [type(block) for block in module] == [
+        ast.LazyParagraph,
+        ast.Line,
+        ast.Line,
+    ]
+    assert [(b.start, b.end) for b in module] == [(b.start, b.end) for b in eager]
+    paragraph = module[0]
+    assert len(paragraph) == 5
+    assert type(paragraph) is ast.Paragraph
+    # bodies are parsed whole
+    assert type(paragraph[3]) is ast.Paragraph
+    assert dump(module) == dump(eager)
+    assert spans(module) == spans(eager)
+
+
+def test_lazy_errors() -> None:
+    src = "def f:\n  a (\nb c\n"
+    module: Any = parse_module(src, lazy=True)
+    with pytest.raises(ParseError) as e:
+        len(module[0])
+    assert e.value.location == (3, 1)
+    # the paragraph stays lazy, and raises again when used again
+    with pytest.raises(ParseError):
+        module[0] == []
+    module = parse_module("def f:\n  a 'unterminated\n", lazy=True)
+    with pytest.raises(LexError):
+        len(module[0])
+
+
+def test_lazy_sources(tmp_path: pathlib.Path) -> None:
+    src = "a:\n  b c\n"
+    path = tmp_path / "lazy.ksl"
+    path.write_bytes(LAZY_SOURCE.replace("\n", "\r\n").encode())
+    module = parse_module(LAZY_SOURCE, lazy=True)
+    assert type(module[0]) is ast.LazyParagraph
+    len(module[0])
+    assert dump(module) == dump(parse_module(path=path))
+    assert type(parse_module(tokenize(src), lazy=True)[0]) is ast.LazyParagraph
+    module = Parser(io.StringIO(src), "", lexer_type=Lexer, lazy=True).parse_module()
+    assert type(module[0]) is ast.Paragraph
+
+
+def test_lazy_mapped_file(tmp_path: pathlib.Path) -> None:
+    # mapped files are parsed eagerly, as they may change before bodies are used
+    path = tmp_path / "lazy.ksl"
+    path.write_text(LAZY_SOURCE)
+    module = parse_module(path=path, lazy=True)
+    assert type(module[0]) is ast.Paragraph
+    path.write_text("x\n")
+    assert dump(module) == dump(parse_module(LAZY_SOURCE))
+
+
+def test_recover() -> None:
+    src = "a b\nc (d e]\nf [g, h\ni {j: k l} [m, n,]\no )\np q"
+    errors: List[SourceError] = []
+    module: Any = parse_module(src, errors=errors)
+    assert [(type(e), e.location) for e in errors] == [
+        (ParseError, (2, 7)),
+        (ParseError, (4, 1)),
+        (ParseError, (4, 9)),
+        (ParseError, (5, 3)),
+    ]
+    assert dump(module) == (
+        "Module",
+        (
+            ("Line", (N("a"), N("b"))),
+            ("Line", (N("c"), ("Error", "unexpected token: RBracket(value=None)"))),
+            ("Line", (N("f"), ("Error", errors[1].msg))),
+            ("Line", (N("i"), ("Error", errors[2].msg), ("List", (N("m"), N("n"))))),
+            ("Error", "unexpected token: RParen(value=None)"),
+            ("Line", (N("p"), N("q"))),
+        ),
+    )
+    assert [(e.start, e.end) for e in (module[1][1], module[4])] == [(6, 11), (39, 42)]
+
+
+def test_recover_nesting() -> None:
+    # a bracket closing an enclosing expression ends the erroneous one
+    errors: List[SourceError] = []
+    module = parse_module("a (b [c d) e", errors=errors)
+    assert dump(module) == (
+        "Module",
+        (
+            (
+                "Line",
+                (N("a"), ("Expression", (N("b"), ("Error", errors[0].msg))), N("e")),
+            ),
+        ),
+    )
+    assert [e.location for e in errors] == [(1, 9)]
+    errors.clear()
+    module = parse_module("a [(b c] d\ne f", errors=errors)
+    # the list fails where the expression in it did, which is only reported once
+    error = "expected token of type: Comma, found: RBracket(value=None)"
+    assert dump(module[0]) == ("Line", (N("a"), ("Error", error), N("d")))
+    assert [e.location for e in errors] == [(1, 8)]
+
+
+def test_recover_blocks() -> None:
+    src = "a ) b\n  c d\n  'bad\\q' e\n  f:\n    0x\ng h\n"
+    errors: List[SourceError] = []
+    module = parse_module(src, errors=errors)
+    assert [(type(e), e.location) for e in errors] == [
+        (ParseError, (1, 3)),
+        (LexError, (3, 8)),
+        (LexError, (5, 7)),
+    ]
+    assert dump(module) == (
+        "Module",
+        (
+            (
+                "Paragraph",
+                (
+                    ("Error", errors[0].msg),
+                    ("Line", (N("c"), N("d"))),
+                    ("Error", errors[1].msg),
+                    ("Paragraph", (N("f"), ("Error", errors[2].msg))),
+                ),
+            ),
+            ("Line", (N("g"), N("h"))),
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "src", ["a;", "a b; c", "(a", "[a b]", "{a b}", "{a: b c}", ")", "a:\n  b c\n)"]
+)
+def test_recover_first_error(src: str) -> None:
+    with pytest.raises(ParseError) as e:
+        parse_module(src)
+    errors: List[SourceError] = []
+    parse_module(src, errors=errors)
+    assert str(errors[0]) == str(e.value)
+
+
+def test_recover_valid() -> None:
+    errors: List[SourceError] = []
+    module = parse_module(LAZY_SOURCE, errors=errors)
+    assert not errors
+    assert dump(module) == dump(parse_module(LAZY_SOURCE))
+    assert spans(module) == spans(parse_module(LAZY_SOURCE))
+
+
+def test_recover_stream() -> None:
+    # lexing errors can only be recovered from with the whole source at hand
+    parser = RecoveringParser(io.StringIO("a ]\nb c\nd 0x\n"), "", lexer_type=Lexer)
+    with pytest.raises(LexError):
+        parser.parse_module()
+    assert [e.location for e in parser.errors] == [(1, 3)]
@@ -0,0 +1,57 @@
+from typing import Any
+
+import pytest
+from test_parse import dump, spans
+
+import ksl.ast as ast
+from ksl.parse import parse_expr, parse_module
+from ksl.serialize import MAGIC
+from ksl.serialize import dump as encode
+from ksl.serialize import load
+
+SRC = (
+    "a [1, -2, 0x1F,] {b: 2.5, 'c': {},}\n"
+    "  (d 'é\\n' -1e300)\n"
+    "  {e, f,}\n"
+    "g h;\n"
+)
+
+
+@pytest.mark.parametrize("src", [SRC, "", "a\n", "[]"])
+def test_round_trip(src: str) -> None:
+    module = parse_module(src)
+    decoded = load(encode(module))
+    assert type(decoded) is ast.Module
+    assert dump(decoded) == dump(module)
+    assert spans(decoded) == spans(module)
+
+
+def test_round_trip_values() -> None:
+    node = parse_expr("(a 'a' 123456789012345678901234567890 -7 0.1)")
+    decoded: Any = load(encode(node))
+    assert dump(decoded) == dump(node)
+    assert [type(n.value) for n in decoded[1:]] == [str, int, int, float]
+
+
+def test_string_table() -> None:
+    data = encode(parse_module("abcdef 'abcdef'\n" * 50))
+    assert data.count(b"abcdef") == 1
+
+
+def test_load_errors() -> None:
+    data = encode(parse_module(SRC))
+    with pytest.raises(ValueError, match="not an encoded AST"):
+        load(b"nope" + data[len(MAGIC) :])
+    with pytest.raises(ValueError, match="version"):
+        load(MAGIC + b"\xff" + data[len(MAGIC) + 1 :])
+    with pytest.raises(ValueError, match="truncated"):
+        load(data[:-3])
+    with pytest.raises(ValueError, match="trailing"):
+        load(data + b"\0")
+
+
+def test_encode_errors() -> None:
+    with pytest.raises(ValueError):
+        encode(ast.Literal(b"bytes"))
+    with pytest.raises(ValueError):
+        encode(ast.Node())
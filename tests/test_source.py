@@ -0,0 +1,130 @@
+import pathlib
+
+import pytest
+
+from ksl.lex import BufferLexer, Lexer, LexError
+from ksl.parse import ParseError, parse_module
+from ksl.source import LineIndex, SourceError
+from ksl.table import tokenize
+
+
+def test_line_index() -> None:
+    lines = LineIndex("ab\ncd\n\ne")
+    assert lines.location(0) == (1, 1)
+    assert lines.location(2) == (1, 3)
+    assert lines.location(3) == (2, 1)
+    assert lines.location(6) == (3, 1)
+    assert lines.location(8) == (4, 2)
+
+
+def test_line_index_bytes() -> None:
+    # mapped files count all line endings, and columns count characters even though
+    # offsets count bytes
+    lines = LineIndex("é\r\néa\rb".encode("utf-8"))
+    assert lines.location(4) == (2, 1)
+    assert lines.location(6) == (2, 2)
+    assert lines.location(8) == (3, 1)
+
+
+def test_line_index_discard() -> None:
+    starts = [0, 3, 6, 7]
+    lines = LineIndex("ab\ncd\n\ne", starts)
+    lines.discard(4)
+    assert starts == [3, 6, 7]
+    assert lines.location(4) == (2, 2)
+    assert lines.location(8) == (4, 2)
+    # whole sources keep all their lines
+    lines = LineIndex("ab\ncd")
+    lines.discard(4)
+    assert lines.location(1) == (1, 2)
+
+
+def test_source_error_str() -> None:
+    lines = LineIndex("a\nbc")
+    assert str(SourceError("oops", "f.ksl", 3, lines)) == "f.ksl:2:2: oops"
+    assert str(SourceError("oops", None, 3, lines)) == "2:2: oops"
+    assert str(SourceError("oops")) == "oops"
+
+
+@pytest.mark.parametrize("lexer_type", [Lexer, BufferLexer])
+def test_token_spans(lexer_type: type) -> None:
+    src = "abc [1, 'x']\n  2.5"
+    toks = list(lexer_type(source=src, path=""))
+    assert [src[t.start : t.end] for t in toks] == [
+        "",
+        "abc",
+        "[",
+        "1",
+        ",",
+        "'x'",
+        "]",
+        "  ",
+        "2.5",
+        "",
+    ]
+
+
+def test_node_spans() -> None:
+    src = "a (b c) [1,]\n  {d: 'e',}\nf g"
+    module = parse_module(src)
+    para, line = module
+    assert (module.start, module.end) == (0, len(src))
+    assert src[para.start : para.end] == "a (b c) [1,]\n  {d: 'e',}"
+    assert [src[n.start : n.end] for n in para] == [
+        "a",
+        "(b c)",
+        "[1,]",
+        "{d: 'e',}",
+    ]
+    assert src[line.start : line.end] == "f g"
+
+
+def test_node_spans_token_table() -> None:
+    src = "a (b c)\n  [1,]"
+    assert [(n.start, n.end) for n in parse_module(tokenize(src))[0]] == [
+        (n.start, n.end) for n in parse_module(src)[0]
+    ]
+
+
+def test_lex_error_location() -> None:
+    with pytest.raises(LexError) as e:
+        list(BufferLexer(source="a\nb 0x", path="f.ksl"))
+    assert e.value.location == (2, 5)
+    assert str(e.value).startswith("f.ksl:2:5: ")
+
+
+def test_parse_error_location(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "test.ksl"
+    path.write_text("a b\n  c [d e]\n")
+    with pytest.raises(ParseError) as e:
+        parse_module(path=path)
+    assert e.value.location == (2, 8)
+    assert str(e.value).startswith(f"{path}:2:8: ")
+
+
+def test_line_index_close() -> None:
+    source = "é\r\néa\rb\nc".encode("utf-8")
+    lines = LineIndex(source)
+    expected = [lines.location(offset) for offset in range(len(source))]
+    errors = [SourceError("", offset=offset, lines=lines) for offset in range(10)]
+    lines._close()
+    assert [e.location for e in errors] == expected[:10]
+    assert SourceError("", offset=0, lines=lines).location is None
+    with pytest.raises(ValueError):
+        lines.location(0)
+
+
+def test_mapped_file_closed(tmp_path: pathlib.Path) -> None:
+    # errors and tables are located without the map, which is closed once parsed
+    path = tmp_path / "test.ksl"
+    path.write_text("a b\n  'é' [d e]\n")
+    with pytest.raises(ParseError) as e:
+        parse_module(path=path)
+    table = tokenize(path=path)
+    lexer = BufferLexer(source=None, path=path)
+    with lexer:
+        list(lexer)
+    path.write_bytes(b"")
+    assert str(e.value).startswith(f"{path}:2:10: ")
+    assert table.lines.location(len("a b\n  'é' [d e".encode())) == (2, 11)
+    assert lexer._buffer.closed  # type: ignore
@@ -0,0 +1,51 @@
+from typing import List, Tuple
+
+from test_parse import dump
+
+import ksl.tokens as tokens
+from ksl.lex import Lexer
+from ksl.parse import Parser
+from ksl.stats import Stats, instrument
+
+
+def test_instrument_parser() -> None:
+    src = "a [b, (c [d,]),]\n  e f\n    g h\ni j\n"
+    parser = Parser(src, "")
+    stats = instrument(parser)
+    module = parser.parse_module()
+    assert dump(module) == dump(Parser(src, "").parse_module())
+    assert stats.tokens["Name"] == 10
+    assert stats.tokens["Indent"] == stats.tokens["Dedent"] == 2
+    assert stats.max_indentation == 2
+    assert stats.max_nesting == 4
+    assert stats.calls["_parse_list"] == 2
+    assert stats.calls["_scan_name"] == 10
+    assert stats.times["_parse_block"] > 0
+    assert "max expression nesting: 4" in stats.report()
+
+
+def test_instrument_lexer_hooks() -> None:
+    seen: List[tokens.Token] = []
+    calls: List[Tuple[str, float]] = []
+    stats = Stats(on_token=seen.append, on_call=lambda *call: calls.append(call))
+    lexer = Lexer(source="a 1 'b'", path="")
+    assert instrument(lexer, stats) is stats
+    assert list(lexer) == [
+        tokens.Nodent(),
+        tokens.Name("a"),
+        tokens.Integer(1),
+        tokens.String("b"),
+    ]
+    assert seen[-1] == tokens.End()
+    assert [name for name, _ in calls] == [
+        "_capture_name",
+        "_capture_number",
+        "_capture_string",
+    ]
+
+
+def test_instrument_only_target() -> None:
+    instrument(Parser("a b", ""))
+    parser = Parser("a b", "")
+    assert "_parse_expr" not in vars(parser)
+    assert "next" not in vars(parser.lexer)
@@ -0,0 +1,72 @@
+from typing import Any, Type
+
+import pytest
+from test_parse import L, N, dump
+
+from ksl.parse import Parser, StackParser, iter_module, parse_module
+from ksl.symbols import SymbolTable
+
+SOURCE = """\
+def f [a, b,]:
+  set x {a: 1, b: 1.0, 'a': -0.0, c: 0.0,}
+  print a 'a' x 1
+"""
+
+
+def test_symbol_table() -> None:
+    symbols = SymbolTable()
+    assert symbols.id("a") == 0
+    assert symbols.id("b") == 1
+    assert symbols.id("a") == 0
+    assert "a" in symbols and "c" not in symbols
+    assert len(symbols) == 2
+    assert symbols.name("b") is symbols.names[1]
+    assert symbols.name("b") == N("b")
+    assert symbols.literal(1) is symbols.literal(1)
+    assert symbols.literal(1) is not symbols.literal(1.0)
+    assert symbols.literal(-0.0) is not symbols.literal(0.0)
+    assert repr(symbols.literal(-0.0).value) == "-0.0"
+    assert symbols.literal("a") == L("a")
+
+
+def test_parse_interned() -> None:
+    symbols = SymbolTable()
+    module: Any = parse_module(SOURCE, symbols=symbols)
+    assert dump(module) == dump(parse_module(SOURCE))
+    paragraph = module[0]
+    args, set_line, print_line = paragraph[2], paragraph[3], paragraph[4]
+    assert args[0] is set_line[2][0][0]
+    assert print_line[1] is symbols.name("a")
+    assert print_line[4] is set_line[2][0][1]
+    assert (print_line[1].start, print_line[1].end) == (0, 0)
+    # tables are shared between modules
+    other: Any = parse_module("print a 1\n", symbols=symbols)
+    assert other[0][1] is print_line[1]
+
+
+def test_stack_parser_interned() -> None:
+    symbols = SymbolTable()
+    module: Any = StackParser(SOURCE, "", symbols=symbols).parse_module()
+    assert dump(module) == dump(Parser(SOURCE, "").parse_module())
+    assert module[0][4][1] is symbols.name("a")
+
+
+def test_iter_module_interned() -> None:
+    symbols = SymbolTable()
+    block: Any
+    (block,) = iter_module(SOURCE, symbols=symbols)
+    assert block[0] is symbols.name("def")
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("parser_type", [Parser, StackParser])
+def test_interned_spans(parser_type: Type[Parser], lazy: bool) -> None:
+    source = "a b 1\nc (d):\n  e f\n  g\n"
+    symbols = SymbolTable()
+    module: Any = parser_type(source, "", symbols=symbols, lazy=lazy).parse_module()
+    line, paragraph = module
+    assert source[line.start : line.end] == "a b 1"
+    assert source[paragraph.start : paragraph.end] == "c (d):\n  e f\n  g"
+    assert source[paragraph[2].start : paragraph[2].end] == "e f"
+    recovered: Any = parse_module(source, symbols=symbols, errors=[])
+    assert (recovered[1].start, recovered[1].end) == (paragraph.start, paragraph.end)
@@ -0,0 +1,92 @@
+import pathlib
+from typing import Any
+
+import pytest
+from test_parse import dump, spans
+
+import ksl.tokens as tokens
+from ksl.lex import BufferLexer
+from ksl.parse import ParseError, Parser, TableParser, iter_module, parse_module
+from ksl.symbols import SymbolTable
+from ksl.table import tokenize
+
+SRC = "a [1, 2.5,] 'b'\n  (c 0x1F)\n  d e\nf\n"
+
+
+def test_tokenize_matches_lexer() -> None:
+    table = tokenize(SRC)
+    expected = list(BufferLexer(source=SRC, path=""))
+    assert list(table) == expected + [tokens.End()]
+    assert [table[i] for i in range(len(table))] == list(table)
+    assert table[-1] == tokens.End()
+    assert table.indentation == "  "
+
+
+def test_tokenize_spans() -> None:
+    src = "abc (1, 'x y')\n  -2.5e3"
+    table = tokenize(src)
+    assert [src[slice(*table.span(i))] for i in range(len(table))] == [
+        "",
+        "abc",
+        "(",
+        "1",
+        ",",
+        "'x y'",
+        ")",
+        "  ",
+        "-2.5e3",
+        "",
+        "",
+    ]
+
+
+def test_tokenize_compact() -> None:
+    table = tokenize("a b c\n" * 100)
+    assert len(table) == 401
+    assert table.kinds.itemsize == 1
+    assert table.starts.itemsize == table.ends.itemsize == 4
+    assert len(table.values) == 300
+    assert table.value(6) == "b"
+
+
+def test_tokenize_mapped_file(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "test.ksl"
+    path.write_text("\\é 'é'\n", encoding="utf-8")
+    table = tokenize(path=path)
+    assert list(table) == [
+        tokens.Nodent(),
+        tokens.Name("é"),
+        tokens.String("é"),
+        tokens.End(),
+    ]
+    # offsets into the mapped file are byte offsets
+    assert table.span(2) == (4, 8)
+
+
+def test_parse_token_table() -> None:
+    table = tokenize(SRC)
+    assert dump(parse_module(table)) == dump(parse_module(SRC))
+
+
+def test_table_parser() -> None:
+    table = tokenize(SRC)
+    module = TableParser(table).parse_module()
+    expected: Any = Parser(table, "").parse_module()
+    assert dump(module) == dump(expected)
+    assert spans(module) == spans(expected)
+    assert dump(list(iter_module(table))) == dump(list(expected))
+    assert dump(TableParser(table).parse_expr()) == dump(expected[0][0])
+    symbols = SymbolTable()
+    interned: Any = TableParser(table, symbols=symbols).parse_module()
+    assert dump(interned) == dump(expected)
+    assert interned[0][0] is symbols.name("a")
+
+
+@pytest.mark.parametrize("src", ["a (b\n", "a b\n  c,\n", "[a]\n", "{a: b, c,}\n"])
+def test_table_parser_errors(src: str) -> None:
+    table = tokenize(src)
+    with pytest.raises(ParseError) as expected:
+        Parser(table, "").parse_module()
+    with pytest.raises(ParseError) as e:
+        TableParser(table).parse_module()
+    assert str(e.value) == str(expected.value)
@@ -0,0 +1,86 @@
+from typing import Any
+
+import pytest
+
+import ksl.ast as ast
+from ksl.parse import StackParser, parse_module
+from ksl.symbols import SymbolTable
+from ksl.transform import to_prefix
+
+
+def prefix(src: str) -> Any:
+    return to_prefix(parse_module(src))
+
+
+@pytest.mark.parametrize(
+    "src, expected",
+    [
+        ("a b", "a b"),
+        ("a + b", "+ a b"),
+        ("x = a + b * c", "= x (+ a (* b c))"),
+        ("a + b * c d", "+ a (* b (c d))"),
+        ("()", "()"),
+        ("(a)", "(a)"),
+        ("(a b)", "(a b)"),
+        (
+            "f (a + b) * [(c - d),] {k: (x + y),} {(e f g),}",
+            "(+ a b) f ([(- c d),] * ({k: (+ x y),} {(f e g),}))",
+        ),
+    ],
+)
+def test_to_prefix(src: str, expected: str) -> None:
+    assert prefix(src) == parse_module(expected)
+
+
+def test_to_prefix_nested_blocks() -> None:
+    module: Any = prefix("def f [x,]:\n  y = x + 1\n  z\n  w:\n    a * b\n")
+    assert module == parse_module("def f [x,]:\n  = y (+ x 1)\n  z\n  w:\n    * a b\n")
+    assert type(module[0]) is ast.Paragraph
+    assert type(module[0][5][1]) is ast.Line
+    lazy: Any = to_prefix(parse_module("a:\n  b + c\n", lazy=True))
+    assert type(lazy[0]) is ast.Paragraph
+    assert lazy == parse_module("a:\n  + b c\n")
+
+
+def test_to_prefix_spans() -> None:
+    src = "x = a + (b - c) * d"
+    line: Any = prefix(src)[0]
+    assert (line.start, line.end) == (0, len(src))
+    assert src[line[2].start : line[2].end] == "a + (b - c) * d"
+    assert src[line[2][2].start : line[2][2].end] == "(b - c) * d"
+    assert src[line[2][2][1].start : line[2][2][1].end] == "(b - c)"
+
+
+def test_to_prefix_unchanged() -> None:
+    # lines of more than 2 elements always change
+    module: Any = parse_module("a b\nc (d e)\nf [(g),]\nh {i: (j k),}\nl:\n  m n\n")
+    assert to_prefix(module) is module
+    module = parse_module("a b\nc (d + e)\n")
+    lowered: Any = to_prefix(module)
+    assert lowered[0] is module[0]
+    assert lowered[1][0] is module[1][0]
+    assert lowered[1][1] is not module[1][1]
+    assert type(lowered[1][1]) is ast.Expression
+
+
+def test_to_prefix_long() -> None:
+    operands = 100_000
+    src = "x = " + " + ".join(f"a{i}" for i in range(operands))
+    symbols = SymbolTable()
+    module: Any = to_prefix(parse_module(src, symbols=symbols))
+    node = module[0]
+    assert node[:2] == [symbols.name("="), symbols.name("x")]
+    for i in range(operands - 1):
+        node = node[2]
+        assert node[:2] == [symbols.name("+"), symbols.name(f"a{i}")]
+    assert node[2] == symbols.name(f"a{operands - 1}")
+
+
+def test_to_prefix_deep() -> None:
+    depth = 10_000
+    src = "a " + "(b + " * depth + "c" + ")" * depth
+    module: Any = to_prefix(StackParser(src, "", symbols=SymbolTable()).parse_module())
+    node = module[0][1]
+    for _ in range(depth - 1):
+        assert node[:2] == [ast.Name("+"), ast.Name("b")]
+        node = node[2]